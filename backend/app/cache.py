@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+# ==========================================
+# CACHÉ EN MEMORIA CON EXPIRACIÓN
+# ==========================================
+class CacheTTL:
+    """
+    Resultados calculados que vencen a los `ttl` segundos. Además del
+    vencimiento, se vacía al invalidarla (p. ej. desde eventos.al_cambiar).
+
+    Para no guardar un resultado calculado antes de una invalidación, se lee
+    `generacion` antes de calcular y se pasa a guardar(): si cambió entre
+    medio, el valor se descarta.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.generacion = 0
+        self._datos: Dict[Hashable, Tuple[float, Any]] = {}
+        self._candado = threading.Lock()
+
+    def obtener(self, clave: Hashable, defecto: Any = None) -> Any:
+        with self._candado:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return defecto
+            vence, valor = entrada
+            if time.monotonic() >= vence:
+                del self._datos[clave]
+                return defecto
+            return valor
+
+    def guardar(self, clave: Hashable, valor: Any, generacion: Optional[int] = None):
+        with self._candado:
+            if generacion is not None and generacion != self.generacion:
+                return
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+
+    def invalidar(self, *_):
+        """Vacía la caché. Acepta argumentos para usarse directo como suscriptor."""
+        with self._candado:
+            self.generacion += 1
+            self._datos.clear()
+
+
+# ==========================================
+# CACHÉ LRU POR CLAVE
+# ==========================================
+class CacheLRU:
+    """
+    Como CacheTTL pero acotada a `max_entradas` (se desaloja la menos usada)
+    y con invalidación por clave. Cuenta aciertos, fallos y desalojos.
+    """
+
+    def __init__(self, max_entradas: int, ttl: float):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.generacion = 0
+        self._datos: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.invalidaciones = 0
+
+    def obtener_muchos(self, claves: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Los valores vigentes de las claves pedidas (las demás no vienen)."""
+        encontrados = {}
+        ahora = time.monotonic()
+        with self._candado:
+            for clave in claves:
+                entrada = self._datos.get(clave)
+                if entrada is not None and ahora >= entrada[0]:
+                    del self._datos[clave]
+                    entrada = None
+                if entrada is None:
+                    self.fallos += 1
+                    continue
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                encontrados[clave] = entrada[1]
+        return encontrados
+
+    def guardar_muchos(self, valores: Dict[Hashable, Any], generacion: Optional[int] = None):
+        with self._candado:
+            if generacion is not None and generacion != self.generacion:
+                return
+            vence = time.monotonic() + self.ttl
+            for clave, valor in valores.items():
+                self._datos[clave] = (vence, valor)
+                self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojos += 1
+
+    def invalidar(self, claves: Optional[Iterable[Hashable]] = None):
+        """Quita las claves dadas, o todo si no se indica ninguna."""
+        with self._candado:
+            self.generacion += 1
+            self.invalidaciones += 1
+            if claves is None:
+                self._datos.clear()
+            else:
+                for clave in claves:
+                    self._datos.pop(clave, None)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "max_entradas": self.max_entradas,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else None,
+            "desalojos": self.desalojos,
+            "invalidaciones": self.invalidaciones
+        }
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import cast, literal, null, select, union_all
+
+from app.cache import CacheLRU
+from app.database import Sesion
+from app.eventos import al_cambiar
+from app.models import Mecanico, Vehiculo
+from app.respuestas import a_json
+from app import registro
+
+log = registro.obtener("cache_entidades")
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Filas por colección que se guardan en memoria en cada worker
+MAX_ENTIDADES = int(os.getenv("CACHE_ENTIDADES_MAX", "5000"))
+# Las escrituras por la API invalidan al instante (en todos los workers, vía
+# eventos); el TTL acota lo que dura un cambio hecho directo en la base
+TTL_SEGUNDOS = float(os.getenv("CACHE_ENTIDADES_TTL", "600"))
+# Opcional: segundo nivel compartido entre workers en un servidor con
+# protocolo Redis (redis://localhost:6379/1). Vacío: solo memoria.
+CACHE_URL = os.getenv("CACHE_ENTIDADES_URL", "")
+PREFIJO = os.getenv("CACHE_ENTIDADES_PREFIJO", "taller:entidad:")
+
+SIN_INFORMACION = "Sin información"
+
+
+# ==========================================
+# NIVEL COMPARTIDO (OPCIONAL)
+# ==========================================
+class CompartidaRedis:
+    """
+    Filas como JSON en claves PREFIJO<colección>:<id> con vencimiento. Un
+    fallo del servidor no interrumpe la petición: se cuenta y se sigue con
+    la base de datos.
+
+    Las invalidaciones llegan desde cualquier hilo: se anotan y se borran en
+    el event loop, y en todo caso antes de la siguiente lectura de este worker.
+    """
+
+    def __init__(self, url: str, ttl: float):
+        self.url = url
+        self.ttl = ttl
+        self.errores = 0
+        self._cliente = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._por_borrar: List[Tuple[str, Optional[List[int]]]] = []
+        self._candado = threading.Lock()
+        self._tareas: Set[asyncio.Task] = set()
+
+    async def _conectar(self):
+        loop = asyncio.get_running_loop()
+        if self._cliente is None or self._loop is not loop:
+            # Dependencia opcional: solo hace falta con CACHE_ENTIDADES_URL
+            import redis.asyncio as redis
+
+            # El cliente queda atado al loop en que se creó
+            self._cliente = redis.from_url(self.url)
+            self._loop = loop
+        if self._por_borrar:
+            await self._borrar_pendientes()
+        return self._cliente
+
+    @staticmethod
+    def _clave(coleccion: str, id_: int) -> str:
+        return f"{PREFIJO}{coleccion}:{id_}"
+
+    async def obtener_muchos(self, coleccion: str, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        try:
+            valores = await (await self._conectar()).mget([self._clave(coleccion, i) for i in ids])
+        except Exception as e:
+            self.errores += 1
+            log.warning("Caché compartida no disponible", extra={"error": str(e)})
+            return {}
+        return {i: json.loads(v) for i, v in zip(ids, valores) if v is not None}
+
+    async def guardar_muchos(self, coleccion: str, filas: Dict[int, Dict[str, Any]]):
+        try:
+            async with (await self._conectar()).pipeline(transaction=False) as tuberia:
+                for id_, fila in filas.items():
+                    tuberia.set(self._clave(coleccion, id_), a_json(fila), ex=int(self.ttl))
+                await tuberia.execute()
+        except Exception as e:
+            self.errores += 1
+            log.warning("No se pudo guardar en la caché compartida", extra={"error": str(e)})
+
+    def invalidar(self, coleccion: str, ids: Optional[List[int]]):
+        """Suscriptor de eventos (cualquier hilo); `ids` None borra toda la colección."""
+        with self._candado:
+            self._por_borrar.append((coleccion, ids))
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            en_el_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            en_el_loop = False
+        if en_el_loop:
+            self._programar()
+        else:
+            loop.call_soon_threadsafe(self._programar)
+
+    def _programar(self):
+        tarea = asyncio.create_task(self._borrar_pendientes())
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    async def _borrar_pendientes(self):
+        with self._candado:
+            pendientes, self._por_borrar = self._por_borrar, []
+        try:
+            for coleccion, ids in pendientes:
+                if ids is None:
+                    claves = [c async for c in self._cliente.scan_iter(match=f"{PREFIJO}{coleccion}:*")]
+                else:
+                    claves = [self._clave(coleccion, i) for i in ids]
+                if claves:
+                    await self._cliente.unlink(*claves)
+        except Exception as e:
+            # Lo que no se borró vence con el TTL
+            self.errores += 1
+            log.warning("No se pudo invalidar la caché compartida", extra={"error": str(e)})
+
+    def estado(self) -> Dict[str, Any]:
+        return {"backend": "redis", "conectado": self._cliente is not None, "errores": self.errores}
+
+
+# ==========================================
+# CACHÉ DE LECTURA POR ID
+# ==========================================
+class CacheEntidades:
+    """
+    Filas de una tabla por id (solo las columnas de la respuesta de la API),
+    leídas de la base la primera vez que se piden. Las lecturas de varios
+    ids traen las que faltan con una sola consulta.
+    """
+
+    def __init__(
+        self,
+        coleccion: str,
+        modelo,
+        columnas: Iterable[str],
+        nombre: Callable[[Dict[str, Any]], Optional[str]],
+        compartida: Optional[CompartidaRedis] = None
+    ):
+        self.coleccion = coleccion
+        self.modelo = modelo
+        self.columnas = [getattr(modelo, c) for c in columnas]
+        self.nombre = nombre
+        self.local = CacheLRU(MAX_ENTIDADES, TTL_SEGUNDOS)
+        self.compartida = compartida
+        self.consultas = 0
+
+    async def obtener(self, db: Sesion, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """{id: fila} de los ids que existen."""
+        return (await obtener_juntos(db, (self, ids)))[0]
+
+    async def nombres(self, db: Sesion, ids: Iterable[int]) -> Dict[int, str]:
+        """{id: nombre para mostrar} de los ids que existen."""
+        return (await nombres_juntos(db, (self, ids)))[0]
+
+    async def _buscar_en_caches(self, ids: Iterable[int]) -> Tuple[int, Dict[int, Dict[str, Any]], List[int]]:
+        """(generación, filas encontradas, ids que faltan) sin ir a la base."""
+        pedidos = {i for i in ids if i is not None}
+        # Se lee antes de buscar: si hay una escritura mientras tanto, lo
+        # leído no se guarda (podría ser anterior a ella)
+        generacion = self.local.generacion
+        filas = self.local.obtener_muchos(pedidos)
+        faltan = sorted(pedidos - filas.keys())
+
+        if faltan and self.compartida is not None:
+            encontradas = await self.compartida.obtener_muchos(self.coleccion, faltan)
+            self.local.guardar_muchos(encontradas, generacion)
+            filas.update(encontradas)
+            faltan = [i for i in faltan if i not in encontradas]
+        return generacion, filas, faltan
+
+    async def _guardar_leidas(self, leidas: Dict[int, Dict[str, Any]], generacion: int):
+        # Los ids inexistentes no se guardan: al crearse se verán enseguida
+        self.local.guardar_muchos(leidas, generacion)
+        if leidas and self.compartida is not None and generacion == self.local.generacion:
+            await self.compartida.guardar_muchos(self.coleccion, leidas)
+
+    def al_cambiar(self, coleccion: str, operacion: str, datos: Dict[str, Any]):
+        """Suscriptor de eventos: las altas no invalidan (los inexistentes no se guardan)."""
+        if operacion == "crear":
+            return
+        self.invalidar(datos.get("ids"))
+
+    def invalidar(self, ids: Optional[List[int]]):
+        """Olvida esos ids (todos si es None) en la caché local y en la compartida."""
+        self.local.invalidar(ids)
+        if self.compartida is not None:
+            self.compartida.invalidar(self.coleccion, ids)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        estado = {**self.local.estadisticas(), "consultas": self.consultas}
+        if self.compartida is not None:
+            estado["compartida"] = self.compartida.estado()
+        return estado
+
+
+# ==========================================
+# LECTURA DE VARIAS COLECCIONES
+# ==========================================
+async def obtener_juntos(
+    db: Sesion, *pedidos: Tuple[CacheEntidades, Iterable[int]]
+) -> List[Dict[int, Dict[str, Any]]]:
+    """
+    CacheEntidades.obtener de varias colecciones a la vez: lo que falte en
+    todas las cachés se lee con una sola consulta (UNION ALL, con NULL en
+    las columnas que una tabla no tiene). Devuelve un {id: fila} por pedido.
+    """
+    buscados = [(cache, *(await cache._buscar_en_caches(ids))) for cache, ids in pedidos]
+    con_faltantes = [(n, cache, faltan) for n, (cache, _, _, faltan) in enumerate(buscados) if faltan]
+    if not con_faltantes:
+        return [filas for _, _, filas, _ in buscados]
+
+    tipos: Dict[str, Any] = {}
+    for _, cache, _ in con_faltantes:
+        for columna in cache.columnas:
+            tipos.setdefault(columna.key, columna.type)
+    partes = []
+    for n, cache, faltan in con_faltantes:
+        cache.consultas += 1
+        propias = {c.key: c for c in cache.columnas}
+        partes.append(
+            select(
+                literal(n).label("_pedido"),
+                *[propias[c].label(c) if c in propias else cast(null(), tipo).label(c) for c, tipo in tipos.items()]
+            ).where(cache.modelo.id.in_(faltan))
+        )
+    consulta = partes[0] if len(partes) == 1 else union_all(*partes)
+
+    leidas: Dict[int, Dict[int, Dict[str, Any]]] = {n: {} for n, _, _ in con_faltantes}
+    for fila in (await db.execute(consulta)).mappings():
+        cache = buscados[fila["_pedido"]][0]
+        leidas[fila["_pedido"]][fila["id"]] = {c.key: fila[c.key] for c in cache.columnas}
+    for n, cache, _ in con_faltantes:
+        generacion, filas = buscados[n][1], buscados[n][2]
+        await cache._guardar_leidas(leidas[n], generacion)
+        filas.update(leidas[n])
+    return [filas for _, _, filas, _ in buscados]
+
+
+async def nombres_juntos(db: Sesion, *pedidos: Tuple[CacheEntidades, Iterable[int]]) -> List[Dict[int, str]]:
+    """{id: nombre para mostrar} por pedido, con obtener_juntos."""
+    return [
+        {i: cache.nombre(f) or SIN_INFORMACION for i, f in filas.items()}
+        for (cache, _), filas in zip(pedidos, await obtener_juntos(db, *pedidos))
+    ]
+
+
+def _unir(*partes: Optional[str]) -> Optional[str]:
+    # Igual que la concatenación en SQL: NULL si falta una parte
+    return None if any(p is None for p in partes) else " ".join(partes)
+
+
+_compartida = CompartidaRedis(CACHE_URL, TTL_SEGUNDOS) if CACHE_URL else None
+
+vehiculos = CacheEntidades(
+    "vehiculos", Vehiculo,
+    ("id", "marca", "modelo", "anio", "kilometraje", "tipo_combustible", "caballos", "torque", "segmento"),
+    lambda f: _unir(f["marca"], f["modelo"]),
+    _compartida
+)
+mecanicos = CacheEntidades(
+    "mecanicos", Mecanico,
+    ("id", "nombre", "apellido"),
+    lambda f: _unir(f["nombre"], f["apellido"]),
+    _compartida
+)
+al_cambiar("vehiculos", vehiculos.al_cambiar)
+al_cambiar("mecanicos", mecanicos.al_cambiar)
+
+
+def estadisticas() -> Dict[str, Any]:
+    return {"vehiculos": vehiculos.estadisticas(), "mecanicos": mecanicos.estadisticas()}
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.eventos import al_cambiar, COLECCIONES
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Respuestas serializadas que se guardan (distintas combinaciones de filtros)
+MAX_ENTRADAS = int(os.getenv("CACHE_HTTP_ENTRADAS", "256"))
+# Una respuesta guardada se regenera pasado este tiempo aunque su versión
+# siga vigente (cambios hechos fuera de la API no generan eventos)
+TTL_SEGUNDOS = float(os.getenv("CACHE_HTTP_TTL", "300"))
+
+
+# ==========================================
+# VERSIONES POR COLECCIÓN
+# ==========================================
+class Versiones:
+    """Contador por colección que sube con cada escritura (vía app/eventos.py)."""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._valores: Dict[str, int] = {}
+
+    def actual(self, coleccion: str) -> int:
+        return self._valores.get(coleccion, 0)
+
+    def todas(self) -> Dict[str, int]:
+        return dict(self._valores)
+
+    def incrementar(self, coleccion: str, *_):
+        """Suscriptor de eventos.al_cambiar."""
+        with self._candado:
+            self._valores[coleccion] = self._valores.get(coleccion, 0) + 1
+
+
+versiones = Versiones()
+for _coleccion in COLECCIONES:
+    al_cambiar(_coleccion, versiones.incrementar)
+
+
+# ==========================================
+# RESPUESTAS SERIALIZADAS
+# ==========================================
+class Entrada:
+    def __init__(self, version: int, cuerpo: bytes, cabeceras: Dict[str, str]):
+        self.version = version
+        self.cuerpo = cuerpo
+        self.creada = time.monotonic()
+        # ETag del contenido: igual en todos los workers para los mismos datos.
+        # Sin Last-Modified: cada worker solo conoce la hora de sus propios
+        # eventos o de su arranque, y darían fechas distintas
+        self.etag = '"' + hashlib.blake2b(cuerpo, digest_size=16).hexdigest() + '"'
+        self.cabeceras = {
+            **cabeceras,
+            "ETag": self.etag,
+            # El navegador guarda la respuesta pero pregunta siempre (If-None-Match)
+            "Cache-Control": "no-cache",
+        }
+
+
+class CacheRespuestas:
+    """LRU de cuerpos JSON por (colección, consulta), válidos mientras no cambie la versión."""
+
+    def __init__(self, max_entradas: int = MAX_ENTRADAS, ttl: float = TTL_SEGUNDOS):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos: "OrderedDict[Hashable, Entrada]" = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.no_modificados = 0
+
+    def obtener(self, clave: Hashable, version: int) -> Optional[Entrada]:
+        with self._candado:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada.version != version or time.monotonic() - entrada.creada > self.ttl:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def guardar(self, clave: Hashable, entrada: Entrada):
+        with self._candado:
+            self._datos[clave] = entrada
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "entradas": len(self._datos),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "no_modificados": self.no_modificados,
+            "versiones": versiones.todas()
+        }
+
+
+cache_respuestas = CacheRespuestas()
+
+
+# ==========================================
+# GET CONDICIONAL
+# ==========================================
+def _no_modificado(request: Request, entrada: Entrada) -> bool:
+    si_no_coincide = request.headers.get("if-none-match")
+    if si_no_coincide is None:
+        return False
+    etiquetas = [e.strip().removeprefix("W/") for e in si_no_coincide.split(",")]
+    return "*" in etiquetas or entrada.etag in etiquetas
+
+
+async def respuesta_en_cache(
+    request: Request,
+    coleccion: str,
+    generar: Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+) -> Response:
+    """
+    Responde un listado desde la caché si la versión de la colección no
+    cambió (sin consultar la base ni serializar), o con 304 si el cliente ya
+    tiene ese contenido. `generar()` devuelve (cuerpo JSON, cabeceras).
+    """
+    # La versión se lee antes de consultar: si hay una escritura mientras
+    # tanto, el cuerpo queda guardado con la versión vieja y no se reutiliza
+    version = versiones.actual(coleccion)
+    clave = (coleccion, tuple(sorted(request.query_params.multi_items())))
+
+    entrada = cache_respuestas.obtener(clave, version)
+    if entrada is None:
+        cuerpo, cabeceras = await generar()
+        entrada = Entrada(version, cuerpo, cabeceras)
+        cache_respuestas.guardar(clave, entrada)
+
+    if _no_modificado(request, entrada):
+        cache_respuestas.no_modificados += 1
+        validacion = {k: v for k, v in entrada.cabeceras.items() if k in ("ETag", "Cache-Control")}
+        return Response(status_code=304, headers=validacion)
+    return Response(entrada.cuerpo, media_type="application/json", headers=entrada.cabeceras)
@@ -0,0 +1,306 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ==========================================
+# CONFIGURACIÓN DE LA CACHÉ DE UPLOADS
+# ==========================================
+# Los archivos ya parseados se guardan como Parquet en disco, con el hash
+# SHA-256 del contenido como nombre (= upload_id). Al vivir en disco y no
+# en memoria, todos los workers de uvicorn de la máquina comparten la caché.
+# /validar solo lee encabezados: guarda el archivo original tal cual y se
+# parsea a Parquet recién cuando preview o la carga necesitan las filas.
+DIRECTORIO_CACHE = os.getenv(
+    "EXCEL_DIR_CACHE",
+    os.path.join(tempfile.gettempdir(), "excel_cache")
+)
+MAX_ENTRADAS = int(os.getenv("EXCEL_CACHE_MAX_ENTRADAS", "32"))
+MAX_BYTES = int(os.getenv("EXCEL_CACHE_MAX_MB", "1024")) * 1024 * 1024
+TTL_SEGUNDOS = int(os.getenv("EXCEL_CACHE_TTL", "3600"))
+
+EXTENSION = ".parquet"
+# Archivo subido aún sin parsear: "<upload_id>.original.xlsx"
+ORIGINAL = ".original"
+# Nombre con que se subió el archivo (el de la última subida de ese contenido)
+NOMBRE = ".nombre"
+# Columna con la posición original de la fila, para numerar errores igual
+COLUMNA_FILA = "_fila"
+# Metadato del Parquet con el tipo de las columnas que eran numéricas,
+# booleanas o fechas en el archivo (las celdas se guardan como texto).
+# "mixto": números y textos en la misma columna (xlsx), se restaura celda a celda
+METADATO_TIPOS = b"tipos"
+TIPOS_RESTAURABLES = {"i": "int64", "f": "float64", "b": "bool", "M": "datetime64[ns]"}
+MIXTO = "mixto"
+
+
+def _ruta(upload_id: str) -> str:
+    return os.path.join(DIRECTORIO_CACHE, f"{upload_id}{EXTENSION}")
+
+
+def _rutas_original(upload_id: str) -> List[str]:
+    return glob.glob(os.path.join(DIRECTORIO_CACHE, f"{upload_id}{ORIGINAL}.*"))
+
+
+def _ruta_nombre(upload_id: str) -> str:
+    return os.path.join(DIRECTORIO_CACHE, f"{upload_id}{NOMBRE}")
+
+
+def es_parquet(ruta: str) -> bool:
+    return ruta.endswith(EXTENSION)
+
+
+def _id_valido(upload_id: str) -> bool:
+    return len(upload_id) == 64 and all(c in "0123456789abcdef" for c in upload_id)
+
+
+# ==========================================
+# CONSULTA
+# ==========================================
+def buscar(upload_id: str) -> Optional[str]:
+    """
+    Devuelve la ruta de la entrada si el upload está en caché y no expiró:
+    el Parquet si ya se parseó, si no el archivo original. Cada acceso
+    renueva su fecha de uso (LRU por mtime).
+    """
+    if not _id_valido(upload_id):
+        return None
+    for ruta in [_ruta(upload_id), *_rutas_original(upload_id)]:
+        try:
+            if time.time() - os.path.getmtime(ruta) > TTL_SEGUNDOS:
+                _borrar_entrada(ruta)
+                continue
+            os.utime(ruta)
+        except FileNotFoundError:
+            continue
+        return ruta
+    return None
+
+
+def nombre_archivo(upload_id: str) -> Optional[str]:
+    """Nombre original del archivo subido, si se conoce."""
+    if not _id_valido(upload_id):
+        return None
+    try:
+        with open(_ruta_nombre(upload_id), encoding="utf-8") as f:
+            return f.read() or None
+    except FileNotFoundError:
+        return None
+
+
+# ==========================================
+# ALTA DE UNA ENTRADA
+# ==========================================
+def guardar_nombre(upload_id: str, nombre: Optional[str]):
+    if not nombre:
+        return
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    with open(_ruta_nombre(upload_id), "w", encoding="utf-8") as f:
+        f.write(os.path.basename(nombre))
+
+
+def guardar_original(ruta_archivo: str, upload_id: str) -> Optional[str]:
+    """
+    Mueve el upload a la caché sin parsearlo. Devuelve None (y no lo mueve)
+    si por sí solo supera EXCEL_CACHE_MAX_MB.
+    """
+    if os.path.getsize(ruta_archivo) > MAX_BYTES:
+        return None
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    destino = os.path.join(DIRECTORIO_CACHE, f"{upload_id}{ORIGINAL}{os.path.splitext(ruta_archivo)[1]}")
+    fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=DIRECTORIO_CACHE)
+    os.close(fd)
+    try:
+        shutil.move(ruta_archivo, temporal)
+        os.replace(temporal, destino)
+    except Exception:
+        _borrar(temporal)
+        raise
+    evictar(conservar=destino)
+    return destino
+
+
+def registrar(ruta_archivo: str, upload_id: str) -> Optional[str]:
+    """
+    Parsea el archivo por lotes (sin materializarlo entero) y lo escribe como
+    Parquet normalizado: encabezados normalizados y todas las celdas como
+    texto, para que el esquema sea el mismo en todos los lotes. Las columnas
+    que en todos los lotes eran numéricas (o booleanas, o fechas) se anotan
+    en los metadatos y recuperan su tipo al leerlas (ver restaurar_tipos).
+
+    Devuelve None si el Parquet supera por sí solo EXCEL_CACHE_MAX_MB: no se
+    guarda, el llamador debe trabajar con el archivo original.
+    """
+    # Import local: ingesta importa este módulo para leer sus Parquet
+    from app.ingesta import leer_lotes, leer_encabezados
+
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    columnas = leer_encabezados(ruta_archivo)
+    esquema = pa.schema([(c, pa.string()) for c in columnas] + [(COLUMNA_FILA, pa.int64())])
+
+    # Tipos vistos por columna (kind de numpy), ignorando lotes en que la
+    # columna viene vacía; aparte, las columnas con algún vacío en algún lote
+    vistos: Dict[str, set] = {c: set() for c in columnas}
+    con_vacios: set = set()
+    fd, temporal = tempfile.mkstemp(suffix=".tmp", dir=DIRECTORIO_CACHE)
+    os.close(fd)
+    try:
+        with pq.ParquetWriter(temporal, esquema) as escritor:
+            for lote in leer_lotes(ruta_archivo):
+                for c in columnas:
+                    if c not in lote or lote[c].isna().any():
+                        con_vacios.add(c)
+                    if c in lote and lote[c].notna().any():
+                        vistos[c].add(_kind(lote[c]))
+                texto = lote.astype("string")
+                texto[COLUMNA_FILA] = lote.index
+                escritor.write_table(pa.Table.from_pandas(texto, schema=esquema, preserve_index=False))
+            escritor.add_key_value_metadata({METADATO_TIPOS: json.dumps(_tipos_comunes(vistos, con_vacios))})
+        if os.path.getsize(temporal) > MAX_BYTES:
+            _borrar(temporal)
+            return None
+        # Reemplazo atómico: otro worker puede estar registrando el mismo archivo
+        os.replace(temporal, _ruta(upload_id))
+    except Exception:
+        _borrar(temporal)
+        raise
+
+    # Si se parseó lo guardado por /validar, ya no hace falta
+    for original in _rutas_original(upload_id):
+        _borrar(original)
+    evictar(conservar=_ruta(upload_id))
+    return _ruta(upload_id)
+
+
+def _kind(serie: pd.Series) -> str:
+    """kind de numpy; "x" para columnas object que mezclan números y textos."""
+    if serie.dtype.kind == "O" and serie.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).any():
+        return "x"
+    return serie.dtype.kind
+
+
+def _tipos_comunes(vistos: Dict[str, set], con_vacios: set) -> Dict[str, str]:
+    tipos = {}
+    for columna, kinds in vistos.items():
+        if kinds == {"i"} and columna in con_vacios:
+            # Enteros con vacíos en otro lote (p. ej. anio): int64 no admite NaN
+            tipos[columna] = "float64"
+        elif len(kinds) == 1 and next(iter(kinds)) in TIPOS_RESTAURABLES:
+            tipos[columna] = TIPOS_RESTAURABLES[next(iter(kinds))]
+        elif kinds and kinds <= {"i", "f"}:
+            # Lotes con enteros y lotes con vacíos (float con NaN)
+            tipos[columna] = "float64"
+        elif "x" in kinds or (kinds & {"i", "f"} and kinds <= {"i", "f", "O"}):
+            tipos[columna] = MIXTO
+    return tipos
+
+
+def _numero_o_texto(valor):
+    if valor is None or valor is pd.NA:
+        return None
+    for tipo in (int, float):
+        try:
+            return tipo(valor)
+        except ValueError:
+            pass
+    return valor
+
+
+# ==========================================
+# LECTURA DE METADATOS
+# ==========================================
+def columnas(ruta: str) -> List[str]:
+    return [c for c in pq.read_schema(ruta).names if c != COLUMNA_FILA]
+
+
+def total_filas(ruta: str) -> int:
+    return pq.ParquetFile(ruta).metadata.num_rows
+
+
+def tipos(ruta: str) -> Dict[str, str]:
+    metadatos = pq.ParquetFile(ruta).metadata.metadata or {}
+    return json.loads(metadatos.get(METADATO_TIPOS, b"{}"))
+
+
+def restaurar_tipos(lote: pd.DataFrame, tipos_columnas: Dict[str, str]) -> pd.DataFrame:
+    """Devuelve a su tipo original las columnas que el Parquet guarda como texto."""
+    for columna, tipo in tipos_columnas.items():
+        if columna not in lote:
+            continue
+        if tipo == MIXTO:
+            lote[columna] = lote[columna].astype(object).map(_numero_o_texto)
+        elif tipo == "bool":
+            lote[columna] = lote[columna].map({"True": True, "False": False})
+        elif tipo.startswith("datetime"):
+            lote[columna] = pd.to_datetime(lote[columna])
+        else:
+            numeros = pd.to_numeric(lote[columna])
+            if tipo == "int64" and numeros.isna().any():
+                # Parquet de antes de anotar los vacíos: int64 no admite NaN
+                tipo = "float64"
+            lote[columna] = numeros.astype(tipo)
+    return lote
+
+
+# ==========================================
+# EVICCIÓN
+# ==========================================
+def evictar(conservar: Optional[str] = None):
+    """
+    Borra entradas expiradas y luego las menos usadas hasta respetar los
+    límites. `conservar` (la entrada recién agregada) nunca se borra: su
+    ruta se acaba de devolver al llamador.
+    """
+    try:
+        nombres = [n for n in os.listdir(DIRECTORIO_CACHE) if n.endswith(EXTENSION) or ORIGINAL in n]
+    except FileNotFoundError:
+        return
+
+    ahora = time.time()
+    entradas = []
+    for nombre in nombres:
+        ruta = os.path.join(DIRECTORIO_CACHE, nombre)
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        if ruta == conservar:
+            continue
+        if ahora - estado.st_mtime > TTL_SEGUNDOS:
+            _borrar_entrada(ruta)
+        else:
+            entradas.append((estado.st_mtime, estado.st_size, ruta))
+
+    entradas.sort()  # más antiguas primero
+    total_bytes = sum(tamano for _, tamano, _ in entradas)
+    cantidad = len(entradas)
+    if conservar is not None and os.path.exists(conservar):
+        total_bytes += os.path.getsize(conservar)
+        cantidad += 1
+    while entradas and (cantidad > MAX_ENTRADAS or total_bytes > MAX_BYTES):
+        _, tamano, ruta = entradas.pop(0)
+        _borrar_entrada(ruta)
+        total_bytes -= tamano
+        cantidad -= 1
+
+
+def _borrar_entrada(ruta: str):
+    """Borra una entrada y, si no queda otra del mismo upload, su nombre."""
+    _borrar(ruta)
+    upload_id = os.path.basename(ruta)[:64]
+    if not os.path.exists(_ruta(upload_id)) and not _rutas_original(upload_id):
+        _borrar(_ruta_nombre(upload_id))
+
+
+def _borrar(ruta: str):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,371 @@
+import asyncio
+import json
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from app.eventos import al_cambiar, al_notificar, COLECCIONES, REINICIO
+from app.pubsub import PUBSUB_URL, PREFIJO
+from app.respuestas import a_json
+from app import registro
+
+log = registro.obtener("cambios")
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Cambios recientes que se guardan para reanudar con ?desde=<secuencia>
+CAPACIDAD = int(os.getenv("CAMBIOS_CAPACIDAD", "5000"))
+# Cambios pendientes por cliente; si un cliente se atrasa más, recibe
+# "reinicio" en lugar de frenar a las escrituras
+MAX_PENDIENTES = int(os.getenv("CAMBIOS_MAX_PENDIENTES", "1000"))
+# Con PUBSUB_URL (varios workers) la secuencia es común y vive en el servidor
+CLAVE_EPOCA = f"{PREFIJO}cambios:epoca"
+CLAVE_SECUENCIA = f"{PREFIJO}cambios:seq"
+CLAVE_STREAM = f"{PREFIJO}cambios:stream"
+
+
+# ==========================================
+# CLIENTES
+# ==========================================
+class ClienteCambios:
+    def __init__(self, websocket: WebSocket, colecciones: Set[str]):
+        self.websocket = websocket
+        self.colecciones = colecciones
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        self.ultimo_enviado = 0
+
+    def encolar(self, cambio: Dict[str, Any]):
+        if cambio["tipo"] == "cambio" and cambio["coleccion"] not in self.colecciones:
+            return
+        try:
+            self.cola.put_nowait(cambio)
+        except asyncio.QueueFull:
+            # Se perdió al menos un cambio: el cliente debe recargar
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait({"tipo": "reinicio", "motivo": "cliente atrasado"})
+
+
+# ==========================================
+# FEED DE CAMBIOS
+# ==========================================
+class FeedCambios:
+    """
+    Numera los cambios de datos que llegan por app/eventos.py (de este y de
+    otros workers) y los reenvía a los WebSockets de /ws/cambios.
+
+    La secuencia es de este worker: `epoca` la identifica. Un cliente que
+    reconecta con la misma época y una secuencia aún guardada recibe lo
+    que se perdió; si no, recibe "reinicio" y debe volver a pedir las listas.
+    Con varios workers se usa FeedCambiosRedis, de secuencia común.
+    """
+
+    def __init__(self, capacidad: int = CAPACIDAD):
+        self.epoca = uuid.uuid4().hex[:12]
+        self.secuencia = 0
+        self.recientes: Deque[Dict[str, Any]] = deque(maxlen=capacidad)
+        self.clientes: Set[ClienteCambios] = set()
+        self._candado = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def suscribir(self):
+        # Los cambios de todos los workers llegan por eventos (vía pub/sub)
+        for coleccion in COLECCIONES:
+            al_cambiar(coleccion, self.registrar)
+
+    async def iniciar(self):
+        pass
+
+    async def cerrar(self):
+        pass
+
+    def posicion(self) -> Tuple[Optional[str], int]:
+        """(época, última secuencia repartida a los clientes de este worker)."""
+        with self._candado:
+            return self.epoca, self.secuencia
+
+    # ------ Entrada (desde eventos: cualquier hilo) ------
+    def registrar(self, coleccion: str, operacion: str, datos: Dict[str, Any]):
+        with self._candado:
+            self.secuencia += 1
+            cambio = {"tipo": "cambio", "seq": self.secuencia, "coleccion": coleccion, "operacion": operacion, **datos}
+            self.recientes.append(cambio)
+        if self._loop is None or not self.clientes:
+            return
+        try:
+            en_el_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            en_el_loop = False
+        if en_el_loop:
+            self._repartir(cambio)
+        else:
+            self._loop.call_soon_threadsafe(self._repartir, cambio)
+
+    def _repartir(self, cambio: Dict[str, Any]):
+        for cliente in list(self.clientes):
+            cliente.encolar(cambio)
+
+    async def pendientes_desde(self, epoca: Optional[str], desde: int) -> Optional[List[Dict[str, Any]]]:
+        """Cambios con seq > desde, o None si ya no se pueden reconstruir."""
+        with self._candado:
+            if epoca != self.epoca or desde > self.secuencia:
+                return None
+            if desde == self.secuencia:
+                return []
+            if not self.recientes or self.recientes[0]["seq"] > desde + 1:
+                return None
+            return [c for c in self.recientes if c["seq"] > desde]
+
+    # ------ Salida (WebSocket) ------
+    async def atender(self, websocket: WebSocket, colecciones: Set[str], epoca: Optional[str], desde: Optional[int]):
+        await websocket.accept()
+        self._loop = asyncio.get_running_loop()
+        cliente = ClienteCambios(websocket, colecciones)
+        # Primero se suscribe y después se lee el historial: un cambio que
+        # llegue entremedio sale dos veces y el segundo se descarta por seq
+        self.clientes.add(cliente)
+        try:
+            epoca_actual, actual = self.posicion()
+            await self._enviar(cliente, {"tipo": "hola", "epoca": epoca_actual, "seq": actual})
+
+            if desde is not None:
+                pendientes = await self.pendientes_desde(epoca, desde)
+                if pendientes is None:
+                    await self._enviar(cliente, {"tipo": "reinicio", "epoca": epoca_actual, "seq": actual})
+                    cliente.ultimo_enviado = actual
+                else:
+                    for cambio in pendientes:
+                        if cambio["coleccion"] in colecciones:
+                            await self._enviar(cliente, cambio)
+                        cliente.ultimo_enviado = cambio["seq"]
+            else:
+                cliente.ultimo_enviado = actual
+
+            await self._reenviar(cliente)
+        finally:
+            self.clientes.discard(cliente)
+
+    async def _reenviar(self, cliente: ClienteCambios):
+        # El cliente no manda datos; la lectura solo detecta que se desconectó
+        lectura = asyncio.create_task(cliente.websocket.receive_text())
+        try:
+            while True:
+                espera = asyncio.create_task(cliente.cola.get())
+                listos, _ = await asyncio.wait({espera, lectura}, return_when=asyncio.FIRST_COMPLETED)
+                if lectura in listos:
+                    espera.cancel()
+                    if lectura.exception() is not None:
+                        return
+                    lectura = asyncio.create_task(cliente.websocket.receive_text())
+                    continue
+                mensaje = espera.result()
+                if mensaje["tipo"] == "reinicio":
+                    if "seq" not in mensaje:
+                        epoca, secuencia = self.posicion()
+                        mensaje = {**mensaje, "epoca": epoca, "seq": secuencia}
+                    cliente.ultimo_enviado = mensaje["seq"]
+                elif mensaje["seq"] <= cliente.ultimo_enviado:
+                    continue
+                else:
+                    cliente.ultimo_enviado = mensaje["seq"]
+                await self._enviar(cliente, mensaje)
+        finally:
+            lectura.cancel()
+
+    async def _enviar(self, cliente: ClienteCambios, mensaje: Dict[str, Any]):
+        await cliente.websocket.send_text(a_json(mensaje).decode("utf-8"))
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "backend": "local",
+            "epoca": self.epoca,
+            "seq": self.secuencia,
+            "guardados": len(self.recientes),
+            "clientes": len(self.clientes)
+        }
+
+
+class FeedCambiosRedis(FeedCambios):
+    """
+    Varios workers: la época, la secuencia y los cambios recientes viven en
+    el servidor de PUBSUB_URL, así un cliente puede reconectar a cualquier
+    worker y reanudar. Solo el worker que escribió agrega el cambio, a un
+    stream con id `<seq>-0` (el contador sube en la misma transacción), y
+    cada worker lee el stream para repartirlo a sus clientes.
+
+    Si un cambio no se puede agregar (cola llena, servidor caído), al
+    volver se agrega un "reinicio" de cada colección para que todos recarguen.
+    """
+
+    def __init__(self, url: str, capacidad: int = CAPACIDAD):
+        super().__init__(capacidad)
+        self.url = url
+        self.capacidad = capacidad
+        self.epoca = None
+        self.descartados = 0
+        self.errores = 0
+        self._avisar_descarte = False
+        self._por_agregar: Optional[asyncio.Queue] = None
+        self._tareas: List[asyncio.Task] = []
+
+    def suscribir(self):
+        # Los de otros workers llegan por el stream, no por eventos
+        al_notificar(self.registrar)
+
+    async def iniciar(self):
+        # Dependencia opcional: solo hace falta con PUBSUB_URL
+        import redis.asyncio as redis
+
+        self._cliente = redis.from_url(self.url)
+        self._por_agregar = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        self._loop = asyncio.get_running_loop()
+        self._tareas = [
+            asyncio.create_task(self._agregar_pendientes()),
+            asyncio.create_task(self._leer()),
+        ]
+
+    async def cerrar(self):
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        if self._loop is not None:
+            await self._cliente.aclose()
+            self._loop = None
+
+    # ------ Entrada (desde eventos.al_notificar: cualquier hilo) ------
+    def registrar(self, coleccion: str, operacion: str, datos: Dict[str, Any]):
+        if self._loop is None:
+            # Sin iniciar (scripts, migraciones): no hay clientes
+            return
+        carga = a_json({"coleccion": coleccion, "operacion": operacion, **datos})
+        try:
+            en_el_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            en_el_loop = False
+        if en_el_loop:
+            self._encolar(carga)
+        else:
+            self._loop.call_soon_threadsafe(self._encolar, carga)
+
+    def _encolar(self, carga: bytes):
+        try:
+            self._por_agregar.put_nowait(carga)
+        except asyncio.QueueFull:
+            self.descartados += 1
+            self._avisar_descarte = True
+
+    async def _agregar_pendientes(self):
+        while True:
+            carga = await self._por_agregar.get()
+            try:
+                if self._avisar_descarte:
+                    self._avisar_descarte = False
+                    for coleccion in COLECCIONES:
+                        await self._agregar(a_json({"coleccion": coleccion, "operacion": REINICIO}))
+                await self._agregar(carga)
+            except Exception as e:
+                self.descartados += 1
+                self._avisar_descarte = True
+                log.warning("No se pudo agregar al feed de cambios", extra={"error": str(e)})
+                await asyncio.sleep(1)
+
+    async def _agregar(self, carga: bytes):
+        from redis.exceptions import WatchError
+
+        async with self._cliente.pipeline(transaction=True) as tuberia:
+            while True:
+                try:
+                    # Otro worker que agrega a la vez invalida el WATCH: se reintenta
+                    await tuberia.watch(CLAVE_SECUENCIA)
+                    secuencia = int(await tuberia.get(CLAVE_SECUENCIA) or 0) + 1
+                    tuberia.multi()
+                    tuberia.set(CLAVE_EPOCA, uuid.uuid4().hex[:12], nx=True)
+                    tuberia.set(CLAVE_SECUENCIA, secuencia)
+                    tuberia.xadd(
+                        CLAVE_STREAM, {"cambio": carga}, id=f"{secuencia}-0",
+                        maxlen=self.capacidad, approximate=True
+                    )
+                    await tuberia.execute()
+                    return
+                except WatchError:
+                    continue
+
+    # ------ Salida (lectura del stream) ------
+    async def _posicion_compartida(self) -> Tuple[str, int]:
+        # La época se crea con el primer lector o escritor; si el servidor
+        # pierde los datos, la siguiente es otra y los clientes recargan
+        await self._cliente.set(CLAVE_EPOCA, uuid.uuid4().hex[:12], nx=True)
+        epoca, secuencia = await self._cliente.mget(CLAVE_EPOCA, CLAVE_SECUENCIA)
+        return epoca.decode(), int(secuencia or 0)
+
+    @staticmethod
+    def _cambio(id_: bytes, campos: Dict[bytes, bytes]) -> Dict[str, Any]:
+        return {"tipo": "cambio", "seq": int(id_.split(b"-")[0]), **json.loads(campos[b"cambio"])}
+
+    def _reiniciar_clientes(self, motivo: str):
+        epoca, secuencia = self.posicion()
+        for cliente in list(self.clientes):
+            cliente.encolar({"tipo": "reinicio", "motivo": motivo, "epoca": epoca, "seq": secuencia})
+
+    async def _leer(self):
+        while True:
+            try:
+                epoca, secuencia = await self._posicion_compartida()
+                if epoca != self.epoca:
+                    anterior = self.epoca
+                    with self._candado:
+                        self.epoca, self.secuencia = epoca, secuencia
+                    if anterior is not None:
+                        self._reiniciar_clientes("nueva época")
+                respuesta = await self._cliente.xread({CLAVE_STREAM: f"{self.secuencia}-0"}, count=500, block=1000)
+                for _, entradas in respuesta:
+                    for id_, campos in entradas:
+                        cambio = self._cambio(id_, campos)
+                        if cambio["seq"] != self.secuencia + 1:
+                            # El stream se recortó antes de que este worker lo leyera
+                            with self._candado:
+                                self.secuencia = cambio["seq"] - 1
+                            self._reiniciar_clientes("cambios recortados")
+                        with self._candado:
+                            self.secuencia = cambio["seq"]
+                        self._repartir(cambio)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errores += 1
+                log.warning("No se pudo leer el feed de cambios; reintentando", extra={"error": str(e)})
+                await asyncio.sleep(1)
+
+    async def pendientes_desde(self, epoca: Optional[str], desde: int) -> Optional[List[Dict[str, Any]]]:
+        """Cambios con seq > desde según el servidor (pueden ir por delante de este worker)."""
+        epoca_actual, actual = await self._posicion_compartida()
+        if epoca != epoca_actual or desde > actual:
+            return None
+        if desde == actual:
+            return []
+        entradas = await self._cliente.xrange(CLAVE_STREAM, min=f"{desde + 1}-0", max=f"{actual}-0")
+        pendientes = [self._cambio(id_, campos) for id_, campos in entradas]
+        if not pendientes or pendientes[0]["seq"] != desde + 1:
+            return None
+        return pendientes
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "epoca": self.epoca,
+            "seq": self.secuencia,
+            "clientes": len(self.clientes),
+            "pendientes": self._por_agregar.qsize() if self._por_agregar is not None else 0,
+            "descartados": self.descartados,
+            "errores": self.errores
+        }
+
+
+feed_cambios = FeedCambiosRedis(PUBSUB_URL) if PUBSUB_URL else FeedCambios()
+feed_cambios.suscribir()
@@ -0,0 +1,120 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.eventos import notificar_cambio
+from app.models import Vehiculo
+from app.validacion import validar_lote, a_registros
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Filas por sentencia INSERT (executemany / multi-VALUES)
+TAMANO_LOTE_INSERT = int(os.getenv("DB_TAMANO_LOTE_INSERT", "1000"))
+# Máximo de errores detallados que se devuelven al cliente
+MAX_ERRORES_DETALLE = 1000
+
+
+# ==========================================
+# INSERCIÓN MASIVA
+# ==========================================
+def insertar_vehiculos(
+    db: Session,
+    filas: List[Dict[str, Any]],
+    tamano_lote: int = TAMANO_LOTE_INSERT
+) -> List[int]:
+    """
+    Inserta vehículos con INSERT de Core sobre la tabla, sin crear objetos
+    ORM ni pasar por el identity map. Cada bloque de `tamano_lote` filas se
+    envía como un único executemany (pymysql lo reescribe como un INSERT
+    multi-VALUES). No hace commit: la transacción la controla el llamador.
+
+    Devuelve la cantidad de filas insertadas en cada bloque.
+    """
+    if tamano_lote < 1:
+        raise ValueError("tamano_lote debe ser mayor que 0")
+
+    sentencia = insert(Vehiculo.__table__)
+    conteos = []
+    for inicio in range(0, len(filas), tamano_lote):
+        bloque = filas[inicio:inicio + tamano_lote]
+        db.execute(sentencia, bloque)
+        conteos.append(len(bloque))
+    return conteos
+
+
+# ==========================================
+# GUARDADO DE UN LOTE VALIDADO
+# ==========================================
+LotePreparado = Tuple[List[Dict[str, Any]], pd.DataFrame]
+
+
+def preparar_lote(lote: pd.DataFrame) -> LotePreparado:
+    """
+    Valida el lote y lo convierte a filas para el INSERT. Es solo CPU, sin
+    base de datos: con sesión asíncrona se ejecuta en un hilo aparte para
+    no validar dentro del event loop.
+    """
+    validos, errores = validar_lote(lote)
+    return a_registros(validos), errores
+
+
+def guardar_lote(
+    db: Session,
+    lote: pd.DataFrame,
+    registrar_avance: Optional[Callable[[Session, int, pd.DataFrame], None]] = None,
+    preparado: Optional[LotePreparado] = None
+) -> Tuple[List[int], pd.DataFrame]:
+    """
+    Valida el lote por columnas e inserta en bloque solo las filas válidas,
+    en una sola transacción. Devuelve las filas insertadas por cada INSERT
+    y la tabla de errores del lote. Si se pasa `preparado` (resultado de
+    preparar_lote), no se vuelve a validar.
+
+    `registrar_avance(db, guardados, errores)` se ejecuta dentro de la misma
+    transacción que el INSERT, de modo que un checkpoint y los datos que
+    representa se confirman (o se pierden) juntos. Si lanza TrabajoReclamado
+    (otro worker tomó el trabajo), el lote se descarta y la excepción se
+    propaga: no es un error de las filas.
+    """
+    # Import local: trabajos importa este módulo
+    from app.trabajos import TrabajoReclamado
+
+    registros, errores = preparado if preparado is not None else preparar_lote(lote)
+
+    try:
+        conteos = insertar_vehiculos(db, registros)
+        if registrar_avance:
+            registrar_avance(db, sum(conteos), errores)
+        db.commit()
+    except TrabajoReclamado:
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        error_lote = pd.DataFrame([{
+            'fila': int(lote.index[0]) + 1,
+            'columna': None,
+            'motivo': f"Filas {lote.index[0] + 1}-{lote.index[-1] + 1}: {str(e)}"
+        }])
+        errores = pd.concat([errores, error_lote], ignore_index=True)
+        if registrar_avance:
+            registrar_avance(db, 0, errores)
+            db.commit()
+        return [], errores
+    if conteos:
+        notificar_cambio("vehiculos", "crear", cantidad=sum(conteos))
+    return conteos, errores
+
+
+def acumular_errores(acumulados: List[Dict[str, Any]], errores: pd.DataFrame):
+    faltan = MAX_ERRORES_DETALLE - len(acumulados)
+    if faltan > 0 and len(errores):
+        acumulados.extend(errores.head(faltan).to_dict('records'))
+
+
+def formatear_errores(errores: List[Dict[str, Any]], limite: int) -> List[str]:
+    return [f"Fila {e['fila']}: {e['motivo']}" for e in errores[:limite]]
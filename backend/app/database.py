@@ -1,7 +1,15 @@
 import os
-from sqlalchemy import create_engine
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Union
+
+from sqlalchemy import CursorResult, create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+
+from app.pool import opciones_pool, configurar_pre_ping
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 # Variables de entorno
 DB_USER = os.getenv("DB_USER", "root")
@@ -10,18 +18,146 @@ DB_NAME = os.getenv("DB_NAME", "Db_JJV")
 DB_HOST = os.getenv("DB_HOST", "db")
 DB_PORT = os.getenv("DB_PORT", "3306")
 
-# URL de conexión
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# URL de conexión (DATABASE_URL permite apuntar a otra base, p. ej. SQLite en benchmarks)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+ES_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# Modo asíncrono: los routers usan AsyncSession sobre aiomysql / aiosqlite
+# en vez de ocupar un hilo del threadpool por consulta
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "si", "yes")
+
+# Drivers asíncronos equivalentes a los síncronos (DATABASE_URL_ASYNC los reemplaza)
+DRIVERS_ASYNC = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def url_async(url: str) -> str:
+    driver, resto = url.split("://", 1)
+    return f"{DRIVERS_ASYNC.get(driver, driver)}://{resto}"
+
+
+# SQLite en memoria necesita su pool propio (una sola conexión compartida)
+EN_MEMORIA = ES_SQLITE and (":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL.endswith(":///"))
 
-# Motor de conexión
+# Motor de conexión (tamaño, reciclado y pre-ping se configuran en app/pool.py)
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    connect_args={"connect_timeout": 30}
+    connect_args={"check_same_thread": False} if ES_SQLITE else {"connect_timeout": 30},
+    **({} if EN_MEMORIA else opciones_pool())
 )
+configurar_pre_ping(engine)
 
 # Sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor y sesión asíncronos (solo se crean si DB_ASYNC está activo, así el
+# driver asíncrono y greenlet no son obligatorios en modo síncrono)
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(
+        os.getenv("DATABASE_URL_ASYNC") or url_async(SQLALCHEMY_DATABASE_URL),
+        connect_args={} if ES_SQLITE else {"connect_timeout": 30},
+        **({} if EN_MEMORIA else opciones_pool(asincrono=True))
+    )
+    configurar_pre_ping(async_engine.sync_engine)
+    # expire_on_commit=False: en modo asíncrono no hay carga perezosa de
+    # atributos después del commit
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base para los modelos
 Base = declarative_base()
+
+
+# ==========================================
+# SESIÓN PARA LOS ROUTERS
+# ==========================================
+class SesionEnHilos:
+    """
+    Sesión síncrona con la interfaz de AsyncSession: cada operación que
+    toca la base de datos se ejecuta en el threadpool. Así los routers se
+    escriben una sola vez (async def + await) para ambos modos.
+    """
+
+    def __init__(self, sesion: Session):
+        self.sync_session = sesion
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self._execute, *args, **kwargs)
+
+    def _execute(self, *args, **kwargs):
+        resultado = self.sync_session.execute(*args, **kwargs)
+        # Igual que AsyncSession: las filas se leen completas en el hilo.
+        # Un UPDATE/DELETE sin filas se devuelve tal cual (para rowcount)
+        if isinstance(resultado, CursorResult) and not resultado.returns_rows:
+            return resultado
+        return resultado.freeze()()
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs):
+        return (await self.execute(*args, **kwargs)).scalars()
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    def add(self, instancia):
+        self.sync_session.add(instancia)
+
+    def add_all(self, instancias):
+        self.sync_session.add_all(instancias)
+
+    async def delete(self, instancia):
+        await run_in_threadpool(self.sync_session.delete, instancia)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instancia, *args, **kwargs):
+        await run_in_threadpool(self.sync_session.refresh, instancia, *args, **kwargs)
+
+    async def run_sync(self, funcion: Callable[..., Any], *args, **kwargs):
+        """Como AsyncSession.run_sync: llama funcion(sesion_sincrona, *args)."""
+        return await run_in_threadpool(funcion, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+# Tipo de la sesión que reciben los endpoints
+Sesion = Union["AsyncSession", SesionEnHilos]
+
+
+async def get_db() -> AsyncIterator[Sesion]:
+    """
+    Dependencia de sesión de todos los routers. Entrega una AsyncSession
+    (DB_ASYNC=true) o una SesionEnHilos; ambas se usan con await.
+    """
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as sesion:
+            yield sesion
+    else:
+        # Sin expirar al confirmar, igual que AsyncSessionLocal: leer un
+        # atributo después del commit no debe ir a la base desde el event loop
+        sesion = SesionEnHilos(SessionLocal(expire_on_commit=False))
+        try:
+            yield sesion
+        finally:
+            await sesion.close()
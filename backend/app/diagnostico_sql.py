@@ -0,0 +1,218 @@
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.database import engine, async_engine
+from app import registro
+
+log = registro.obtener("diagnostico_sql")
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Modo de diagnóstico (desarrollo / CI): activa el middleware que cuenta
+# sentencias por petición, avisa de N+1 y de consultas lentas. Tiene costo:
+# no usar en producción (para eso están las métricas de /metrics).
+DIAGNOSTICO_SQL = os.getenv("DIAGNOSTICO_SQL", "false").lower() in ("1", "true", "si", "yes")
+# Sentencias más lentas que esto se registran con su EXPLAIN
+LENTA_MS = float(os.getenv("DIAGNOSTICO_SQL_LENTA_MS", "100"))
+# La misma forma de SQL repetida estas veces en una petición: posible N+1
+UMBRAL_REPETIDAS = int(os.getenv("DIAGNOSTICO_SQL_REPETIDAS", "3"))
+
+# Máximo de sentencias por petición (método, plantilla de ruta), en frío
+# (cachés vacías). El listado de asignaciones: la página y, en una sola
+# consulta, los vehículos y mecánicos que no estén en caché; el alta: esa
+# misma lectura y el INSERT.
+PRESUPUESTOS: Dict[Tuple[str, str], int] = {
+    ("GET", "/vehiculos"): 1,
+    ("GET", "/vehiculos/"): 1,
+    ("GET", "/mecanicos/"): 1,
+    ("GET", "/asignaciones"): 2,
+    ("GET", "/asignaciones/"): 2,
+    ("POST", "/asignaciones/"): 2,
+    ("PATCH", "/asignaciones/{asignacion_id}"): 2,
+    ("DELETE", "/asignaciones/{asignacion_id}"): 1,
+}
+
+# "IN (?, ?, ?)" y "VALUES (...), (...)" cuentan como la misma forma
+_LISTA_PARAMETROS = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def forma_sql(sentencia: str) -> str:
+    """La sentencia sin la cantidad de parámetros de las listas ni espacios extra."""
+    return _ESPACIOS.sub(" ", _LISTA_PARAMETROS.sub("(…)", sentencia)).strip()
+
+
+# ==========================================
+# REGISTRO POR PETICIÓN
+# ==========================================
+class Conteo:
+    """Sentencias vistas (por forma) en una petición o un bloque presupuesto()."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.formas: Counter = Counter()
+        self._candado = threading.Lock()
+
+    def anotar(self, forma: str):
+        with self._candado:
+            self.consultas += 1
+            self.formas[forma] += 1
+
+    def repetidas(self, umbral: int = UMBRAL_REPETIDAS) -> List[Tuple[str, int]]:
+        return [(f, n) for f, n in self.formas.most_common() if n >= umbral]
+
+
+# Petición en curso (se copia a los hilos de run_in_threadpool)
+_peticion: ContextVar[Optional[Conteo]] = ContextVar("diagnostico_sql", default=None)
+# Bloques presupuesto() abiertos: cuentan todo el proceso (TestClient
+# ejecuta la app en otro hilo, fuera del contexto de la prueba)
+_bloques: List[Conteo] = []
+_candado_bloques = threading.Lock()
+
+
+class PresupuestoExcedido(AssertionError):
+    pass
+
+
+@contextmanager
+def presupuesto(maximo: int, descripcion: str = ""):
+    """
+    Falla si dentro del bloque se ejecutan más de `maximo` sentencias:
+
+        with presupuesto(2, "listado de asignaciones"):
+            cliente.get("/asignaciones/")
+    """
+    activar()
+    conteo = Conteo()
+    with _candado_bloques:
+        _bloques.append(conteo)
+    try:
+        yield conteo
+    finally:
+        with _candado_bloques:
+            _bloques.remove(conteo)
+    if conteo.consultas > maximo:
+        detalle = "\n".join(f"  {n}× {f}" for f, n in conteo.formas.most_common())
+        raise PresupuestoExcedido(
+            f"{descripcion or 'Bloque'}: {conteo.consultas} sentencias SQL (máximo {maximo})\n{detalle}"
+        )
+
+
+# ==========================================
+# EVENTOS DE SQLALCHEMY
+# ==========================================
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_diagnostico = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    ms = (time.perf_counter() - context._inicio_diagnostico) * 1000
+    peticion = _peticion.get()
+    if peticion is not None or _bloques:
+        forma = forma_sql(statement)
+        if peticion is not None:
+            peticion.anotar(forma)
+        with _candado_bloques:
+            for conteo in _bloques:
+                conteo.anotar(forma)
+    if ms >= LENTA_MS:
+        log.warning("Consulta lenta", extra={
+            "ms": round(ms, 1),
+            "sql": forma_sql(statement),
+            "plan": _explicar(conn, statement, parameters, context, executemany)
+        })
+
+
+def _explicar(conn, statement, parameters, context, executemany) -> Optional[str]:
+    """EXPLAIN de un SELECT en la misma conexión (cursor del driver, sin eventos)."""
+    if executemany or statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+        return None
+    # Con un cursor del servidor abierto (exportaciones) MySQL no admite
+    # otra consulta en la conexión
+    if context.execution_options.get("stream_results"):
+        return None
+    prefijo = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefijo + statement, parameters)
+            return "\n".join(" | ".join(str(c) for c in fila) for fila in cursor.fetchall())
+        finally:
+            cursor.close()
+    except Exception as e:
+        return f"(EXPLAIN falló: {e})"
+
+
+_activado = False
+_candado_activar = threading.Lock()
+
+
+def activar():
+    """Registra los eventos en los motores de la app (una sola vez)."""
+    global _activado
+    with _candado_activar:
+        if _activado:
+            return
+        motores = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+        for motor in motores:
+            event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+            event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+        _activado = True
+
+
+# ==========================================
+# MIDDLEWARE ASGI
+# ==========================================
+class MiddlewareDiagnostico:
+    """
+    Cuenta las sentencias de cada petición y las informa en la cabecera
+    X-Consultas-SQL (las ejecutadas hasta enviar las cabeceras). Al terminar
+    registra las formas repetidas (posible N+1) y los presupuestos excedidos.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        activar()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        conteo = Conteo()
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                cabeceras = list(mensaje.get("headers", []))
+                cabeceras.append((b"x-consultas-sql", str(conteo.consultas).encode()))
+                mensaje = {**mensaje, "headers": cabeceras}
+            await send(mensaje)
+
+        token = _peticion.set(conteo)
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _peticion.reset(token)
+            self._revisar(scope, conteo)
+
+    def _revisar(self, scope, conteo: Conteo):
+        metodo = scope["method"]
+        ruta = getattr(scope.get("route"), "path", None) or scope["path"]
+        for forma, veces in conteo.repetidas():
+            log.warning("Posible N+1: la misma consulta se repite", extra={
+                "metodo": metodo, "ruta": ruta, "veces": veces, "sql": forma
+            })
+        maximo = PRESUPUESTOS.get((metodo, ruta))
+        if maximo is not None and conteo.consultas > maximo:
+            log.error("Presupuesto de consultas excedido", extra={
+                "metodo": metodo, "ruta": ruta, "consultas": conteo.consultas, "maximo": maximo
+            })
@@ -0,0 +1,93 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Optional
+
+import anyio
+
+# ==========================================
+# CONFIGURACIÓN DEL POOL DE TRABAJO
+# ==========================================
+# Hilos como máximo ocupados por E/S de base de datos de las cargas
+HILOS_DB = int(os.getenv("EXCEL_HILOS_DB", "4"))
+# Hilos como máximo ocupados parseando archivos
+HILOS_PARSEO = int(os.getenv("EXCEL_HILOS_PARSEO", "2"))
+# Procesos para el parseo completo de archivos (0 = usar hilos)
+PROCESOS_PARSEO = int(os.getenv("EXCEL_PROCESOS_PARSEO", "0"))
+# Cargas que pueden ejecutarse a la vez; el resto espera turno
+MAX_CARGAS_CONCURRENTES = int(os.getenv("EXCEL_MAX_CARGAS", "2"))
+
+# Los limitadores se crean al primer uso, dentro del event loop
+_limitador_db: Optional[anyio.CapacityLimiter] = None
+_limitador_parseo: Optional[anyio.CapacityLimiter] = None
+_semaforo_cargas: Optional[asyncio.Semaphore] = None
+_pool_procesos: Optional[ProcessPoolExecutor] = None
+
+
+def _limitadores():
+    global _limitador_db, _limitador_parseo
+    if _limitador_db is None:
+        _limitador_db = anyio.CapacityLimiter(HILOS_DB)
+        _limitador_parseo = anyio.CapacityLimiter(HILOS_PARSEO)
+    return _limitador_db, _limitador_parseo
+
+
+# ==========================================
+# EJECUCIÓN FUERA DEL EVENT LOOP
+# ==========================================
+async def en_hilo_db(func: Callable, *args, **kwargs) -> Any:
+    """Ejecuta una llamada bloqueante de SQLAlchemy en un hilo del pool de BD."""
+    limitador, _ = _limitadores()
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=limitador)
+
+
+async def en_hilo_parseo(func: Callable, *args, **kwargs) -> Any:
+    """Ejecuta trabajo de pandas/openpyxl en un hilo del pool de parseo."""
+    _, limitador = _limitadores()
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=limitador)
+
+
+async def en_proceso(func: Callable, *args) -> Any:
+    """
+    Ejecuta una función de parseo en el pool de procesos si está habilitado
+    (EXCEL_PROCESOS_PARSEO > 0); si no, en el pool de hilos de parseo.
+    `func` y sus argumentos deben ser serializables (funciones de módulo).
+    """
+    if PROCESOS_PARSEO <= 0:
+        return await en_hilo_parseo(func, *args)
+
+    global _pool_procesos
+    if _pool_procesos is None:
+        # spawn: no heredar hilos ni conexiones abiertas del worker de uvicorn
+        _pool_procesos = ProcessPoolExecutor(
+            max_workers=PROCESOS_PARSEO,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool_procesos, functools.partial(func, *args))
+
+
+async def turno_de_carga():
+    """
+    Limita cuántas cargas se procesan a la vez en este worker.
+    Se usa como dependencia de FastAPI (Depends(turno_de_carga)).
+    """
+    global _semaforo_cargas
+    if _semaforo_cargas is None:
+        _semaforo_cargas = asyncio.Semaphore(MAX_CARGAS_CONCURRENTES)
+    async with _semaforo_cargas:
+        yield
+
+
+# Misma restricción para código que no pasa por el sistema de dependencias
+cupo_de_carga = asynccontextmanager(turno_de_carga)
+
+
+def cerrar_pools():
+    global _pool_procesos
+    if _pool_procesos is not None:
+        _pool_procesos.shutdown(wait=False, cancel_futures=True)
+        _pool_procesos = None
@@ -0,0 +1,79 @@
+import os
+from typing import Any, Dict, List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.cache import CacheTTL
+from app.eventos import al_cambiar
+from app.models import Vehiculo
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Segundos que se reutiliza el resultado. Las escrituras de cualquier worker
+# la invalidan al instante (el aviso de cambio viaja por app/pubsub.py); el
+# TTL solo acota el tiempo con datos viejos si se pierde un aviso.
+TTL_SEGUNDOS = float(os.getenv("ESTADISTICAS_TTL", "30"))
+
+_cache = CacheTTL(TTL_SEGUNDOS)
+al_cambiar("vehiculos", _cache.invalidar)
+
+
+# ==========================================
+# CONSULTAS DE AGREGACIÓN
+# ==========================================
+def _conteo_por(db: Session, columna) -> List[Dict[str, Any]]:
+    filas = db.execute(
+        select(columna, func.count())
+        .group_by(columna)
+        .order_by(func.count().desc(), columna)
+    ).all()
+    return [{"valor": valor, "cantidad": cantidad} for valor, cantidad in filas]
+
+
+def _resumen(minimo, promedio, maximo) -> Dict[str, Any]:
+    return {
+        "minimo": minimo,
+        "promedio": round(float(promedio), 2) if promedio is not None else None,
+        "maximo": maximo
+    }
+
+
+def calcular_estadisticas(db: Session) -> Dict[str, Any]:
+    """
+    Conteos y resúmenes de la flota resueltos con GROUP BY / agregados en la
+    base de datos: solo viajan las filas agregadas, nunca los vehículos.
+    """
+    totales = db.execute(select(
+        func.count(),
+        func.min(Vehiculo.caballos), func.avg(Vehiculo.caballos), func.max(Vehiculo.caballos),
+        func.min(Vehiculo.kilometraje), func.avg(Vehiculo.kilometraje), func.max(Vehiculo.kilometraje),
+        func.min(Vehiculo.torque), func.avg(Vehiculo.torque), func.max(Vehiculo.torque),
+    )).one()
+
+    por_anio = db.execute(
+        select(Vehiculo.anio, func.count())
+        .group_by(Vehiculo.anio)
+        .order_by(Vehiculo.anio)
+    ).all()
+
+    return {
+        "total": totales[0],
+        "por_segmento": _conteo_por(db, Vehiculo.segmento),
+        "por_tipo_combustible": _conteo_por(db, Vehiculo.tipo_combustible),
+        "por_marca": _conteo_por(db, Vehiculo.marca),
+        "por_anio": [{"anio": anio, "cantidad": cantidad} for anio, cantidad in por_anio],
+        "caballos": _resumen(*totales[1:4]),
+        "kilometraje": _resumen(*totales[4:7]),
+        "torque": _resumen(*totales[7:10])
+    }
+
+
+def obtener_estadisticas(db: Session) -> Dict[str, Any]:
+    resultado = _cache.obtener("flota")
+    if resultado is None:
+        generacion = _cache.generacion
+        resultado = calcular_estadisticas(db)
+        _cache.guardar("flota", resultado, generacion)
+    return resultado
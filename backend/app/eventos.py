@@ -0,0 +1,80 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict, List
+
+from app import pubsub
+from app import registro
+
+log = registro.obtener("eventos")
+
+# ==========================================
+# EVENTOS DE CAMBIO DE DATOS
+# ==========================================
+# Cada ruta de escritura avisa qué colección cambió ("vehiculos",
+# "mecanicos", "asignaciones") después de confirmar la transacción, y quien
+# mantenga datos derivados (cachés, agregados) se suscribe aquí.
+# El aviso viaja por app/pubsub.py: en este proceso las funciones se llaman
+# en el hilo que escribió (deben ser rápidas y seguras entre hilos) y en los
+# demás workers, desde su event loop al llegar el mensaje.
+Suscriptor = Callable[[str, str, Dict[str, Any]], None]
+
+TEMA = "cambios"
+COLECCIONES = ("vehiculos", "mecanicos", "asignaciones")
+# Operación sin ids que pide recargar toda la colección: se avisa cuando
+# pub/sub pudo perder cambios de otros workers
+REINICIO = "reinicio"
+
+_suscriptores: DefaultDict[str, List[Suscriptor]] = defaultdict(list)
+_de_este_worker: List[Suscriptor] = []
+_candado = threading.Lock()
+
+
+def al_cambiar(coleccion: str, funcion: Suscriptor) -> Suscriptor:
+    """Registra `funcion(coleccion, operacion, datos)` para los cambios de la colección."""
+    with _candado:
+        _suscriptores[coleccion].append(funcion)
+    return funcion
+
+
+def al_notificar(funcion: Suscriptor) -> Suscriptor:
+    """
+    Registra `funcion(coleccion, operacion, datos)` solo para los cambios
+    escritos en este worker (de todas las colecciones): para quien los
+    reenvía a un destino compartido y no debe verlos dos veces.
+    """
+    with _candado:
+        _de_este_worker.append(funcion)
+    return funcion
+
+
+def notificar_cambio(coleccion: str, operacion: str, **datos: Any):
+    """Avisa a los suscriptores de todos los workers; un suscriptor que falla no afecta la escritura."""
+    with _candado:
+        funciones = list(_de_este_worker)
+    for funcion in funciones:
+        try:
+            funcion(coleccion, operacion, datos)
+        except Exception as e:
+            log.exception("Error en suscriptor de cambios", extra={"coleccion": coleccion})
+    pubsub.publicar(TEMA, {"coleccion": coleccion, "operacion": operacion, "datos": datos})
+
+
+def _avisar(mensaje: Dict[str, Any]):
+    coleccion = mensaje["coleccion"]
+    with _candado:
+        funciones = list(_suscriptores.get(coleccion, ()))
+    for funcion in funciones:
+        try:
+            funcion(coleccion, mensaje["operacion"], mensaje["datos"])
+        except Exception as e:
+            log.exception("Error en suscriptor de cambios", extra={"coleccion": coleccion})
+
+
+def _perdida():
+    # Sin saber qué se perdió: versiones, cachés y feed tratan toda colección como cambiada
+    for coleccion in COLECCIONES:
+        _avisar({"coleccion": coleccion, "operacion": REINICIO, "datos": {}})
+
+
+pubsub.al_recibir(TEMA, _avisar)
+pubsub.al_perder(_perdida)
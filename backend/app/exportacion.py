@@ -0,0 +1,146 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterator, List, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from openpyxl import Workbook
+from sqlalchemy.sql import Select
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+
+from app.database import DB_ASYNC, engine, async_engine
+from app.respuestas import a_json, TIPO_NDJSON
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Filas que se leen del cursor del servidor y se envían en cada fragmento
+FILAS_POR_FRAGMENTO = int(os.getenv("EXPORTAR_FILAS_POR_FRAGMENTO", "2000"))
+
+FORMATOS = {
+    "ndjson": TIPO_NDJSON,
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# ==========================================
+# LECTURA POR FRAGMENTOS (cursor del servidor)
+# ==========================================
+# Cada exportación usa su propia conexión durante toda la respuesta: no
+# depende de la sesión de la petición, que se cierra antes de terminar el
+# envío. stream_results pide un cursor del servidor (SSCursor en MySQL) y
+# yield_per limita las filas en memoria a un fragmento.
+def _fragmentos(consulta: Select) -> Iterator[Sequence[Any]]:
+    with engine.connect() as conexion:
+        resultado = conexion.execution_options(
+            stream_results=True, yield_per=FILAS_POR_FRAGMENTO
+        ).execute(consulta)
+        for fragmento in resultado.partitions():
+            yield fragmento
+
+
+async def _fragmentos_async(consulta: Select) -> AsyncIterator[Sequence[Any]]:
+    async with async_engine.connect() as conexion:
+        resultado = await conexion.stream(consulta.execution_options(yield_per=FILAS_POR_FRAGMENTO))
+        async for fragmento in resultado.partitions():
+            yield fragmento
+
+
+# ==========================================
+# CODIFICACIÓN
+# ==========================================
+def _a_texto(valor: Any) -> Any:
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def _ndjson(claves: List[str], filas: Sequence[Any]) -> bytes:
+    return b"".join(a_json(dict(zip(claves, fila))) + b"\n" for fila in filas)
+
+
+def _csv(filas: Sequence[Any]) -> bytes:
+    salida = io.StringIO()
+    csv.writer(salida).writerows([_a_texto(v) for v in fila] for fila in filas)
+    return salida.getvalue().encode("utf-8")
+
+
+def _codificar(formato: str, claves: List[str], filas: Sequence[Any]) -> bytes:
+    return _ndjson(claves, filas) if formato == "ndjson" else _csv(filas)
+
+
+def _cuerpo(consulta: Select, formato: str, claves: List[str]):
+    """Iterador del cuerpo: asíncrono con DB_ASYNC, si no síncrono (Starlette lo recorre en hilos)."""
+    encabezado = _csv([claves]) if formato == "csv" else b""
+
+    if DB_ASYNC:
+        async def cuerpo_async():
+            if encabezado:
+                yield encabezado
+            async for fragmento in _fragmentos_async(consulta):
+                yield _codificar(formato, claves, fragmento)
+        return cuerpo_async()
+
+    def cuerpo():
+        if encabezado:
+            yield encabezado
+        for fragmento in _fragmentos(consulta):
+            yield _codificar(formato, claves, fragmento)
+    return cuerpo()
+
+
+def _escribir_xlsx(consulta: Select, claves: List[str], hoja: str) -> str:
+    """Escribe el XLSX en un archivo temporal (modo write_only: fila a fila, sin guardar el libro en memoria)."""
+    libro = Workbook(write_only=True)
+    pestana = libro.create_sheet(hoja)
+    pestana.append(claves)
+    for fragmento in _fragmentos(consulta):
+        for fila in fragmento:
+            pestana.append(list(fila))
+    descriptor, ruta = tempfile.mkstemp(prefix="export_", suffix=".xlsx")
+    os.close(descriptor)
+    try:
+        libro.save(ruta)
+    except Exception:
+        os.remove(ruta)
+        raise
+    return ruta
+
+
+# ==========================================
+# RESPUESTA
+# ==========================================
+async def exportar(consulta: Select, formato: str, nombre: str) -> Response:
+    """
+    Exporta el resultado de `consulta` como NDJSON, CSV o XLSX.
+
+    NDJSON y CSV se envían a medida que se leen (el primer byte sale con el
+    primer fragmento). XLSX es un ZIP que no se puede escribir por partes:
+    se arma en un archivo temporal y se borra después de enviarlo.
+    """
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado: {formato}. Válidos: {', '.join(FORMATOS)}")
+
+    claves = [c.name for c in consulta.selected_columns]
+    archivo = f"{nombre}.{formato}"
+
+    if formato == "xlsx":
+        # openpyxl es síncrono: se usa el motor síncrono también con DB_ASYNC
+        ruta = await run_in_threadpool(_escribir_xlsx, consulta, claves, nombre)
+        return FileResponse(
+            ruta, media_type=FORMATOS["xlsx"], filename=archivo,
+            background=BackgroundTask(os.remove, ruta)
+        )
+
+    return StreamingResponse(
+        _cuerpo(consulta, formato, claves),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{archivo}"'}
+    )
@@ -0,0 +1,241 @@
+import csv
+import hashlib
+import os
+import tempfile
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+from fastapi import UploadFile
+from openpyxl import load_workbook
+
+from app.ejecucion import en_hilo_parseo
+from app import cache_uploads
+
+# ==========================================
+# CONFIGURACIÓN DE LA INGESTA
+# ==========================================
+# Filas por lote que se entregan a la capa de escritura
+TAMANO_LOTE = int(os.getenv("EXCEL_TAMANO_LOTE", "1000"))
+# Bytes que se leen del upload en cada iteración
+TAMANO_CHUNK_BYTES = int(os.getenv("EXCEL_TAMANO_CHUNK_BYTES", str(1024 * 1024)))
+
+EXTENSIONES_CSV = {".csv", ".txt"}
+
+
+# ==========================================
+# VOLCADO DEL UPLOAD A DISCO
+# ==========================================
+async def volcar_upload(file: UploadFile, directorio: Optional[str] = None, digest=None) -> str:
+    """
+    Copia el archivo subido a un temporal en disco leyendo en chunks,
+    sin cargarlo nunca completo en memoria. Devuelve la ruta del temporal;
+    el llamador es responsable de borrarlo.
+
+    Si se pasa `digest` (p. ej. hashlib.sha256()), se actualiza con cada chunk.
+    """
+    sufijo = os.path.splitext(file.filename or "")[1].lower() or ".xlsx"
+    fd, ruta = tempfile.mkstemp(suffix=sufijo, dir=directorio)
+    try:
+        with os.fdopen(fd, "wb") as destino:
+            while True:
+                chunk = await file.read(TAMANO_CHUNK_BYTES)
+                if not chunk:
+                    break
+                destino.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+    except Exception:
+        os.remove(ruta)
+        raise
+    return ruta
+
+
+async def volcar_upload_con_hash(file: UploadFile) -> Tuple[str, str]:
+    """Como volcar_upload, devolviendo además el SHA-256 del contenido."""
+    digest = hashlib.sha256()
+    ruta = await volcar_upload(file, digest=digest)
+    return ruta, digest.hexdigest()
+
+
+def borrar_temporal(ruta: Optional[str]):
+    if ruta and os.path.exists(ruta):
+        os.remove(ruta)
+
+
+# ==========================================
+# NORMALIZACIÓN DE ENCABEZADOS
+# ==========================================
+def normalizar_columnas(columnas) -> List[str]:
+    """Mismo criterio que df.columns.str.lower().str.strip().str.replace(' ', '_')"""
+    normalizadas = []
+    for i, col in enumerate(columnas):
+        if col is None or (isinstance(col, float) and pd.isna(col)):
+            normalizadas.append(f"unnamed:_{i}")
+        else:
+            normalizadas.append(str(col).lower().strip().replace(" ", "_"))
+    return normalizadas
+
+
+def _es_csv(ruta: str) -> bool:
+    return os.path.splitext(ruta)[1].lower() in EXTENSIONES_CSV
+
+
+def _es_xls_antiguo(ruta: str) -> bool:
+    return os.path.splitext(ruta)[1].lower() == ".xls"
+
+
+def _es_cache(ruta: str) -> bool:
+    return ruta.endswith(cache_uploads.EXTENSION)
+
+
+# ==========================================
+# LECTURA POR LOTES
+# ==========================================
+def leer_lotes(ruta: str, tamano_lote: int = TAMANO_LOTE) -> Iterator[pd.DataFrame]:
+    """
+    Recorre el archivo fila a fila y entrega DataFrames de tamaño fijo.
+    El índice de cada lote es la posición global de la fila de datos
+    (0 = primera fila después del encabezado), así los mensajes de error
+    siguen numerando las filas igual que antes.
+    """
+    if _es_cache(ruta):
+        yield from _lotes_parquet(ruta, tamano_lote)
+    elif _es_csv(ruta):
+        yield from _lotes_csv(ruta, tamano_lote)
+    elif _es_xls_antiguo(ruta):
+        yield from _lotes_xls(ruta, tamano_lote)
+    else:
+        yield from _lotes_xlsx(ruta, tamano_lote)
+
+
+def _separador_csv(ruta: str) -> str:
+    with open(ruta, newline="", encoding="utf-8-sig") as f:
+        muestra = f.read(64 * 1024)
+    try:
+        return csv.Sniffer().sniff(muestra, delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+
+def _lotes_csv(ruta: str, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    separador = _separador_csv(ruta)
+    for lote in pd.read_csv(ruta, chunksize=tamano_lote, sep=separador, encoding="utf-8-sig"):
+        lote.columns = normalizar_columnas(lote.columns)
+        yield lote
+
+
+def _lotes_xlsx(ruta: str, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    # read_only + values_only: openpyxl no construye el árbol de celdas completo
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas_hoja = wb.active.iter_rows(values_only=True)
+        encabezado = next(filas_hoja, None)
+        if encabezado is None:
+            return
+        columnas = normalizar_columnas(encabezado)
+        ancho = len(columnas)
+
+        buffer, indices = [], []
+        for posicion, fila in enumerate(filas_hoja):
+            if all(v is None for v in fila):
+                continue
+            fila = tuple(fila[:ancho]) + (None,) * (ancho - len(fila))
+            buffer.append(fila)
+            indices.append(posicion)
+            if len(buffer) >= tamano_lote:
+                yield pd.DataFrame.from_records(buffer, columns=columnas, index=indices)
+                buffer, indices = [], []
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=columnas, index=indices)
+    finally:
+        wb.close()
+
+
+def _lotes_parquet(ruta: str, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    # Uploads ya parseados por la caché: lectura por row groups, sin reparsear
+    tipos = cache_uploads.tipos(ruta)
+    for batch in pq.ParquetFile(ruta).iter_batches(batch_size=tamano_lote):
+        lote = cache_uploads.restaurar_tipos(batch.to_pandas(), tipos)
+        yield lote.set_index(cache_uploads.COLUMNA_FILA).rename_axis(None)
+
+
+def _lotes_xls(ruta: str, tamano_lote: int) -> Iterator[pd.DataFrame]:
+    # El formato .xls binario no admite lectura por streaming: se parsea
+    # completo y solo se trocea para mantener la misma interfaz.
+    df = pd.read_excel(ruta)
+    df.columns = normalizar_columnas(df.columns)
+    for inicio in range(0, len(df), tamano_lote):
+        yield df.iloc[inicio:inicio + tamano_lote]
+
+
+async def leer_lotes_async(ruta: str, tamano_lote: int = TAMANO_LOTE) -> AsyncIterator[pd.DataFrame]:
+    """Igual que leer_lotes, pero cada lote se parsea en el pool de hilos de parseo."""
+    iterador = leer_lotes(ruta, tamano_lote)
+    try:
+        while True:
+            lote = await en_hilo_parseo(next, iterador, None)
+            if lote is None:
+                break
+            yield lote
+    finally:
+        iterador.close()
+
+
+# ==========================================
+# ENCABEZADOS Y CONTEO
+# ==========================================
+def leer_encabezados(ruta: str) -> List[str]:
+    if _es_cache(ruta):
+        return cache_uploads.columnas(ruta)
+    if _es_csv(ruta):
+        separador = _separador_csv(ruta)
+        with open(ruta, newline="", encoding="utf-8-sig") as f:
+            return normalizar_columnas(next(csv.reader(f, delimiter=separador), []))
+    if _es_xls_antiguo(ruta):
+        return normalizar_columnas(pd.read_excel(ruta, nrows=0).columns)
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        encabezado = next(wb.active.iter_rows(values_only=True, max_row=1), None)
+        return normalizar_columnas(encabezado or [])
+    finally:
+        wb.close()
+
+
+def leer_preview(ruta: str, filas: int = 10) -> Tuple[List[str], List[Dict[str, Any]], int]:
+    """Encabezados, primeras `filas` filas (NaN → None) y total de filas del archivo."""
+    columnas = leer_encabezados(ruta)
+    primeras = next(leer_lotes(ruta, tamano_lote=filas), pd.DataFrame(columns=columnas))
+    # NaN no es JSON válido: se envía como null
+    primeras = primeras.astype(object).where(primeras.notna(), None)
+    return columnas, primeras.to_dict('records'), contar_filas(ruta)
+
+
+def contar_filas(ruta: str) -> int:
+    """Cuenta exacta de filas de datos recorriendo el archivo por streaming."""
+    if _es_cache(ruta):
+        return cache_uploads.total_filas(ruta)
+    return sum(len(lote) for lote in leer_lotes(ruta))
+
+
+def estimar_filas(ruta: str) -> Optional[int]:
+    """
+    Estimación barata del total de filas para calcular el progreso.
+    En xlsx usa la dimensión declarada en la hoja; si no existe devuelve None.
+    """
+    if _es_cache(ruta):
+        return cache_uploads.total_filas(ruta)
+    if _es_csv(ruta):
+        with open(ruta, "rb") as f:
+            lineas = sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(TAMANO_CHUNK_BYTES), b""))
+        return max(lineas - 1, 0)
+    if _es_xls_antiguo(ruta):
+        return None
+
+    wb = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        max_fila = wb.active.max_row
+        return max(max_fila - 1, 0) if max_fila else None
+    finally:
+        wb.close()
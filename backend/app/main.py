@@ -1,9 +1,18 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine
-from app.models import Base
+from app.migraciones import aplicar_migraciones, MIGRAR_AL_INICIAR
+from app.ejecucion import cerrar_pools
+from app.database import engine, async_engine
+from app.pool import estado_pool
+from app.progreso import bus_progreso
+from app import pubsub
+from app.cambios import feed_cambios
+from app.cache_http import cache_respuestas
+from app import cache_entidades
+from app import metricas
+from app import diagnostico_sql
 import os
 
 # ========================================
@@ -27,30 +36,88 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Siguiente-Cursor", "ETag"],  # paginación y caché HTTP
 )
 
+# Latencia, peticiones en curso y SQL por ruta (se exponen en /metrics)
+app.add_middleware(metricas.MiddlewareMetricas)
+metricas.instrumentar_engine(engine)
+if async_engine is not None:
+    metricas.instrumentar_engine(async_engine.sync_engine)
+
+# Solo en desarrollo / CI: N+1, EXPLAIN de consultas lentas y presupuestos
+if diagnostico_sql.DIAGNOSTICO_SQL:
+    app.add_middleware(diagnostico_sql.MiddlewareDiagnostico)
+
 # ========================================
 # 3. CONFIGURAR TEMPLATES
 # ========================================
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
 
 # ========================================
-# 4. CREAR TABLAS EN LA BASE DE DATOS
+# 4. MIGRAR LA BASE DE DATOS (ALEMBIC)
 # ========================================
-Base.metadata.create_all(bind=engine)
+if MIGRAR_AL_INICIAR:
+    aplicar_migraciones()
 
 # ========================================
 # 5. IMPORTAR E INCLUIR ROUTERS
 # ========================================
-from app.routers import vehiculos, mecanicos, asignaciones, excel
+from app.routers import vehiculos, mecanicos, asignaciones, excel, cambios
+from app import trabajos
 
 app.include_router(vehiculos.router)
 app.include_router(mecanicos.router)
 app.include_router(asignaciones.router)  
 app.include_router(excel.router)
+app.include_router(cambios.router)
+
+@app.on_event("startup")
+async def iniciar_pubsub():
+    await pubsub.iniciar()
+    await feed_cambios.iniciar()
+
+@app.on_event("startup")
+async def reanudar_importaciones():
+    await trabajos.iniciar_vigilancia(bus_progreso.publicar)
+
+@app.on_event("shutdown")
+async def apagar_pools():
+    await trabajos.detener_vigilancia()
+    cerrar_pools()
+    await feed_cambios.cerrar()
+    await pubsub.cerrar()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+# ========================================
+# 6. ESTADO DEL POOL DE CONEXIONES
+# ========================================
+@app.get("/db/pool")
+def pool_de_conexiones():
+    """Conexiones en uso, overflow y tiempos de espera del pool de este worker."""
+    estado = {"sincrono": estado_pool(engine)}
+    if async_engine is not None:
+        estado["asincrono"] = estado_pool(async_engine.sync_engine)
+    return estado
+
+@app.get("/pubsub")
+def estado_pubsub():
+    """Backend de pub/sub entre workers, feed de cambios y canales de progreso de este worker."""
+    return {"pubsub": pubsub.estado(), "cambios": feed_cambios.estado(), "progreso": bus_progreso.estadisticas()}
+
+@app.get("/cache")
+def estado_cache():
+    """Aciertos, fallos, 304 y desalojos de las cachés de este worker."""
+    return {"respuestas": cache_respuestas.estadisticas(), "entidades": cache_entidades.estadisticas()}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def exponer_metricas():
+    """Métricas de este worker en formato de texto de Prometheus."""
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # ========================================
-# 6. RUTA DE INICIO (UNA SOLA)
+# 7. RUTA DE INICIO (UNA SOLA)
 # ========================================
 @app.get("/")
 def root():
@@ -61,6 +128,7 @@ def root():
             "mecanicos": "/mecanicos",
             "asignaciones": "/asignaciones",
             "excel": "/excel/upload",
+            "cambios": "/ws/cambios",
             "docs": "/docs"
         }
     }
\ No newline at end of file
@@ -0,0 +1,220 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# ==========================================
+# MÉTRICAS (formato de texto de Prometheus)
+# ==========================================
+# Cada worker lleva sus propias métricas: Prometheus debe leer /metrics de
+# cada uno (o sumar por instancia).
+LATENCIA_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONSULTAS_POR_PETICION = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIN_RUTA = "sin_ruta"
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(etiquetas: Etiquetas, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pares = [*etiquetas, *extra]
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self._valores: Dict[Etiquetas, float] = {}
+        self._candado = threading.Lock()
+
+    def sumar(self, valor: float = 1, **etiquetas: str):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._candado:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def lineas(self) -> List[str]:
+        with self._candado:
+            return [f"{self.nombre}{_etiquetas(k)} {_numero(v)}" for k, v in sorted(self._valores.items())]
+
+
+class Indicador(Contador):
+    """Valor que sube y baja (peticiones en curso)."""
+
+    tipo = "gauge"
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, limites: Sequence[float]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = tuple(limites)
+        # Por serie: [cuentas por cubeta (no acumuladas), suma]
+        self._series: Dict[Etiquetas, list] = {}
+        self._candado = threading.Lock()
+
+    def observar(self, valor: float, **etiquetas: str):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._candado:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][bisect.bisect_left(self.limites, valor)] += 1
+            serie[1] += valor
+
+    def lineas(self) -> List[str]:
+        lineas = []
+        with self._candado:
+            series = [(k, list(cuentas), suma) for k, (cuentas, suma) in sorted(self._series.items())]
+        for clave, cuentas, suma in series:
+            acumulado = 0
+            for limite, cuenta in zip((*self.limites, float("inf")), cuentas):
+                acumulado += cuenta
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(clave, [('le', _numero(limite))])} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(clave)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(clave)} {acumulado}")
+        return lineas
+
+
+_registradas: List = []
+
+
+def _registrar(metrica):
+    _registradas.append(metrica)
+    return metrica
+
+
+peticiones = _registrar(Contador(
+    "taller_http_peticiones_total", "Peticiones HTTP atendidas por método, ruta y código"))
+duracion = _registrar(Histograma(
+    "taller_http_duracion_segundos", "Latencia de las peticiones HTTP por método y ruta", LATENCIA_SEGUNDOS))
+en_curso = _registrar(Indicador(
+    "taller_http_en_curso", "Peticiones HTTP en curso"))
+consultas_peticion = _registrar(Histograma(
+    "taller_sql_consultas_por_peticion", "Sentencias SQL ejecutadas por petición (N+1: valores altos)",
+    CONSULTAS_POR_PETICION))
+sql_peticion = _registrar(Histograma(
+    "taller_sql_segundos_por_peticion", "Tiempo total en SQL por petición", LATENCIA_SEGUNDOS))
+sql_duracion = _registrar(Histograma(
+    "taller_sql_duracion_segundos", "Duración de cada sentencia SQL (incluye trabajos en segundo plano)",
+    LATENCIA_SEGUNDOS))
+
+
+def exponer() -> str:
+    """Todas las métricas en el formato de texto de Prometheus (0.0.4)."""
+    lineas = []
+    for metrica in _registradas:
+        lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+        lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+        lineas.extend(metrica.lineas())
+    return "\n".join(lineas) + "\n"
+
+
+# ==========================================
+# SQL POR PETICIÓN
+# ==========================================
+class MedicionSQL:
+    """Sentencias y tiempo en SQL de la petición en curso (se suma desde varios hilos)."""
+
+    __slots__ = ("consultas", "segundos", "_candado")
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self._candado = threading.Lock()
+
+    def sumar(self, segundos: float):
+        with self._candado:
+            self.consultas += 1
+            self.segundos += segundos
+
+
+# El contexto se copia a los hilos de run_in_threadpool: el objeto es el
+# mismo, así que lo que sumen las consultas en el hilo se ve al terminar
+_medicion: ContextVar[Optional[MedicionSQL]] = ContextVar("medicion_sql", default=None)
+
+
+def medicion_actual() -> Optional[MedicionSQL]:
+    return _medicion.get()
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_metricas = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    segundos = time.perf_counter() - context._inicio_metricas
+    sql_duracion.observar(segundos)
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion.sumar(segundos)
+
+
+def instrumentar_engine(engine):
+    """Mide las sentencias de un Engine síncrono (para async: async_engine.sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+
+
+# ==========================================
+# MIDDLEWARE ASGI
+# ==========================================
+class MiddlewareMetricas:
+    """
+    Latencia, código y SQL por ruta. Es ASGI puro (no BaseHTTPMiddleware)
+    para no almacenar en memoria las respuestas en streaming; la latencia
+    incluye el envío completo del cuerpo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        codigo = 500
+
+        async def enviar(mensaje):
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+            await send(mensaje)
+
+        medicion = MedicionSQL()
+        token = _medicion.set(medicion)
+        en_curso.sumar(1)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            segundos = time.perf_counter() - inicio
+            en_curso.sumar(-1)
+            _medicion.reset(token)
+            # La plantilla de la ruta (/asignaciones/{asignacion_id}), no la
+            # URL, para no crear una serie por id
+            ruta = getattr(scope.get("route"), "path", None) or SIN_RUTA
+            metodo = scope["method"]
+            peticiones.sumar(1, metodo=metodo, ruta=ruta, codigo=str(codigo))
+            duracion.observar(segundos, metodo=metodo, ruta=ruta)
+            consultas_peticion.observar(medicion.consultas, metodo=metodo, ruta=ruta)
+            sql_peticion.observar(medicion.segundos, metodo=metodo, ruta=ruta)
@@ -0,0 +1,41 @@
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.database import engine as engine_app
+
+# ==========================================
+# MIGRACIONES (ALEMBIC)
+# ==========================================
+# Reemplaza a Base.metadata.create_all: el esquema se versiona en
+# backend/migrations/versions y se aplica con "upgrade head".
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRAR_AL_INICIAR = os.getenv("DB_MIGRAR_AL_INICIAR", "true").lower() in ("1", "true", "si", "yes")
+
+
+def configuracion_alembic() -> Config:
+    cfg = Config(os.path.join(DIRECTORIO_BACKEND, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(DIRECTORIO_BACKEND, "migrations"))
+    return cfg
+
+
+def aplicar_migraciones(revision: str = "head", engine: Engine = engine_app):
+    """
+    Lleva la base a `revision`. En MySQL toma un lock con nombre para que
+    varios workers arrancando a la vez no migren en paralelo.
+    """
+    cfg = configuracion_alembic()
+    with engine.connect() as conexion:
+        es_mysql = conexion.dialect.name == "mysql"
+        if es_mysql:
+            conexion.execute(text("SELECT GET_LOCK('migraciones_vehiculos', 120)"))
+        try:
+            cfg.attributes["connection"] = conexion
+            command.upgrade(cfg, revision)
+            conexion.commit()
+        finally:
+            if es_mysql:
+                conexion.execute(text("SELECT RELEASE_LOCK('migraciones_vehiculos')"))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -6,16 +6,26 @@ from datetime import datetime
 # ==========================
 # MODELOS SQLALCHEMY
 # ==========================
+# Los índices se crean con migraciones (migrations/versions); aquí se
+# declaran igual para que el modelo y el esquema no diverjan.
 class Vehiculo(Base):
     __tablename__ = "vehiculos"
+    __table_args__ = (
+        Index("ix_vehiculos_marca", "marca"),
+        Index("ix_vehiculos_segmento", "segmento"),
+        Index("ix_vehiculos_tipo_combustible", "tipo_combustible"),
+        Index("ix_vehiculos_anio", "anio"),
+        Index("ix_vehiculos_kilometraje", "kilometraje"),
+        Index("ix_vehiculos_caballos", "caballos"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     marca = Column(String(100), nullable=False)
     modelo = Column(String(100), nullable=False)
-    kilometraje = Column(String(50), nullable=False)
+    kilometraje = Column(Integer, nullable=False)  # km
     tipo_combustible = Column(String(50), nullable=False)
-    caballos = Column(String(50), nullable=False)
-    torque = Column(String(50), nullable=False)
+    caballos = Column(Integer, nullable=False)  # hp
+    torque = Column(Integer, nullable=False)  # Nm
     segmento = Column(String(50), nullable=False)
     anio = Column(Integer, nullable=True)  # ✅ PUEDE SER NULL
 
@@ -30,6 +40,12 @@ class Mecanico(Base):
 
 class Asignacion(Base):
     __tablename__ = "asignaciones"
+    __table_args__ = (
+        Index("ix_asignaciones_vehiculo_fecha", "id_vehiculo", "fecha_asignacion"),
+        Index("ix_asignaciones_mecanico_fecha", "id_mecanico", "fecha_asignacion"),
+        Index("ix_asignaciones_estado_fecha", "estado", "fecha_asignacion", "id"),
+        Index("ix_asignaciones_fecha", "fecha_asignacion", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     id_vehiculo = Column(Integer, ForeignKey("vehiculos.id"))
@@ -39,4 +55,25 @@ class Asignacion(Base):
     fecha_asignacion = Column(DateTime, default=datetime.utcnow)
 
     vehiculo = relationship("Vehiculo")
-    mecanico = relationship("Mecanico")
\ No newline at end of file
+    mecanico = relationship("Mecanico")
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    __table_args__ = (
+        Index("ix_import_jobs_estado", "estado"),
+    )
+
+    id = Column(String(36), primary_key=True)
+    estado = Column(String(20), nullable=False, default="pendiente")
+    nombre_archivo = Column(String(255), nullable=True)
+    ruta_archivo = Column(String(500), nullable=False)
+    worker = Column(String(64), nullable=True)  # instancia que lo está procesando
+    total_estimado = Column(Integer, nullable=True)
+    procesados = Column(Integer, nullable=False, default=0)  # filas confirmadas: punto de reanudación
+    exitosos = Column(Integer, nullable=False, default=0)
+    fallidos = Column(Integer, nullable=False, default=0)
+    errores = Column(Text, nullable=True)  # JSON con los primeros errores
+    mensaje = Column(String(500), nullable=True)
+    creado = Column(DateTime, default=datetime.utcnow)
+    actualizado = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
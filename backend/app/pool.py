@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# ==========================================
+# CONFIGURACIÓN DEL POOL DE CONEXIONES
+# ==========================================
+# Cada worker de uvicorn tiene su propio pool: el máximo de conexiones que
+# abre un worker es DB_POOL_SIZE + DB_MAX_OVERFLOW (el doble con DB_ASYNC,
+# porque el motor síncrono sigue atendiendo trabajos y migraciones).
+# workers × ese máximo debe quedar por debajo del max_connections de MySQL.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Segundos tras los que una conexión se descarta al devolverse (menor que
+# el wait_timeout de MySQL, así no se reutilizan conexiones cerradas)
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Segundos que una petición espera una conexión libre antes de fallar
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Verificación antes de entregar una conexión:
+#   siempre  → SELECT 1 en cada checkout (un viaje extra por petición)
+#   nunca    → sin verificación; se confía en POOL_RECYCLE
+#   inactivo → solo si la conexión estuvo ociosa más de DB_PRE_PING_INACTIVO s
+PRE_PING = os.getenv("DB_PRE_PING", "inactivo").lower()
+PRE_PING_INACTIVO = float(os.getenv("DB_PRE_PING_INACTIVO", "60"))
+
+ESTRATEGIAS_PRE_PING = ("siempre", "nunca", "inactivo")
+if PRE_PING not in ESTRATEGIAS_PRE_PING:
+    raise ValueError(f"DB_PRE_PING debe ser uno de {', '.join(ESTRATEGIAS_PRE_PING)}, no '{PRE_PING}'")
+
+
+# ==========================================
+# MÉTRICAS DE ESPERA
+# ==========================================
+class MetricasPool:
+    """Tiempos para obtener una conexión (espera + conexión nueva si hace falta)."""
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self.checkouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.timeouts = 0
+
+    def registrar(self, segundos: float):
+        with self._candado:
+            self.checkouts += 1
+            self.espera_total += segundos
+            self.espera_max = max(self.espera_max, segundos)
+
+    def registrar_timeout(self):
+        with self._candado:
+            self.timeouts += 1
+
+    def resumen(self) -> Dict[str, Any]:
+        with self._candado:
+            return {
+                "checkouts": self.checkouts,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+                "espera_promedio_ms": round(self.espera_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+                "timeouts": self.timeouts
+            }
+
+
+class _MedicionDeEspera:
+    """Mide cuánto tarda cada checkout del pool (QueuePool._do_get)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metricas = MetricasPool()
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except exc.TimeoutError:
+            self.metricas.registrar_timeout()
+            raise
+        self.metricas.registrar(time.perf_counter() - inicio)
+        return conexion
+
+    def recreate(self):
+        # engine.dispose() crea un pool nuevo: las métricas se conservan
+        nuevo = super().recreate()
+        nuevo.metricas = self.metricas
+        return nuevo
+
+
+class PoolMedido(_MedicionDeEspera, QueuePool):
+    pass
+
+
+class PoolMedidoAsync(_MedicionDeEspera, AsyncAdaptedQueuePool):
+    pass
+
+
+# ==========================================
+# CREACIÓN DEL MOTOR
+# ==========================================
+def opciones_pool(asincrono: bool = False) -> Dict[str, Any]:
+    """Argumentos de create_engine / create_async_engine para el pool."""
+    return {
+        "poolclass": PoolMedidoAsync if asincrono else PoolMedido,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_pre_ping": PRE_PING == "siempre",
+    }
+
+
+def configurar_pre_ping(engine: Engine):
+    """Con la estrategia 'inactivo', verifica solo conexiones que estuvieron ociosas."""
+    if PRE_PING != "inactivo":
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _al_devolver(dbapi_connection, registro):
+        registro.info["ultimo_uso"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _al_entregar(dbapi_connection, registro, proxy):
+        ultimo_uso = registro.info.get("ultimo_uso")
+        if ultimo_uso is None or time.monotonic() - ultimo_uso < PRE_PING_INACTIVO:
+            return
+        try:
+            ok = engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            # El pool descarta esta conexión y entrega una nueva
+            raise exc.DisconnectionError(f"Conexión ociosa caída: {e}")
+        if ok is False:
+            raise exc.DisconnectionError("Conexión ociosa caída")
+
+
+def estado_pool(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    estado = {
+        "clase": type(pool).__name__,
+        "pool_size": pool.size() if hasattr(pool, "size") else None,
+        "max_overflow": MAX_OVERFLOW,
+        "max_conexiones": POOL_SIZE + MAX_OVERFLOW,
+        "en_uso": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "libres": pool.checkedin() if hasattr(pool, "checkedin") else None,
+        # QueuePool cuenta el overflow desde -pool_size; solo interesa el exceso
+        "overflow": max(0, pool.overflow()) if hasattr(pool, "overflow") else None,
+        "pre_ping": PRE_PING,
+        "recycle": POOL_RECYCLE,
+        "timeout": POOL_TIMEOUT
+    }
+    metricas = getattr(pool, "metricas", None)
+    if metricas is not None:
+        estado.update(metricas.resumen())
+    return estado
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+from app import pubsub
+from app import registro
+
+log = registro.obtener("progreso")
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Mensajes de progreso por segundo como máximo hacia cada cliente; los
+# intermedios se descartan y solo se envía el más reciente
+MAX_POR_SEGUNDO = float(os.getenv("PROGRESO_MAX_POR_SEGUNDO", "5"))
+# Un envío que tarda más que esto se considera una conexión muerta
+TIMEOUT_ENVIO = float(os.getenv("PROGRESO_TIMEOUT_ENVIO", "5"))
+# Segundos que se conserva el último mensaje de un canal sin suscriptores
+# (quien se conecta tarde, incluso después de terminar, lo recibe primero)
+RETENCION = float(os.getenv("PROGRESO_RETENCION", "300"))
+
+TEMA = "progreso"
+
+# Estos mensajes nunca se descartan: cierran el seguimiento del cliente
+TIPOS_FINALES = {"completado", "error", "cancelado"}
+
+
+# ==========================================
+# SUSCRIPTORES Y CANALES
+# ==========================================
+class Suscriptor:
+    """Un WebSocket con su casilla de mensajes pendientes (gana el último)."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.pendiente: Optional[Dict[str, Any]] = None
+        self.finales: List[Dict[str, Any]] = []
+        self.hay_datos = asyncio.Event()
+        self.tarea: Optional[asyncio.Task] = None
+
+    def encolar(self, mensaje: Dict[str, Any]) -> bool:
+        """Deja el mensaje para el escritor; devuelve True si reemplazó uno sin enviar."""
+        descartado = False
+        if mensaje.get("tipo") in TIPOS_FINALES:
+            self.finales.append(mensaje)
+        else:
+            descartado = self.pendiente is not None
+            self.pendiente = mensaje
+        self.hay_datos.set()
+        return descartado
+
+    def tomar(self) -> List[Dict[str, Any]]:
+        mensajes = ([self.pendiente] if self.pendiente is not None else []) + self.finales
+        self.pendiente = None
+        self.finales = []
+        self.hay_datos.clear()
+        return mensajes
+
+
+class Canal:
+    def __init__(self):
+        self.suscriptores: Set[Suscriptor] = set()
+        self.ultimo: Optional[Dict[str, Any]] = None
+        self.actualizado = time.monotonic()
+
+
+# ==========================================
+# BUS DE PROGRESO
+# ==========================================
+class BusProgreso:
+    """
+    Progreso de cargas e importaciones hacia los WebSockets suscritos.
+
+    publicar() no espera a ningún cliente: deja el mensaje en la casilla de
+    cada suscriptor y un escritor por suscriptor lo envía, como mucho
+    MAX_POR_SEGUNDO veces por segundo. Un cliente lento solo recibe menos
+    actualizaciones intermedias; no frena la carga. Las conexiones que
+    fallan o no aceptan un envío en TIMEOUT_ENVIO se quitan del canal.
+    """
+
+    def __init__(self, max_por_segundo: float = MAX_POR_SEGUNDO, tema: str = TEMA):
+        self.intervalo = 1 / max_por_segundo if max_por_segundo > 0 else 0
+        self.tema = tema
+        self.canales: Dict[str, Canal] = {}
+        self.enviados = 0
+        self.descartados = 0
+        self._ultima_purga = time.monotonic()
+        pubsub.al_recibir(tema, lambda datos: self.entregar(datos["canal"], datos["mensaje"]))
+
+    # ------ Publicación ------
+    def publicar(self, canal_id: str, mensaje: Dict[str, Any]):
+        """Publica en todos los workers: el WebSocket puede estar en otro proceso."""
+        pubsub.publicar(self.tema, {"canal": canal_id, "mensaje": mensaje})
+
+    def entregar(self, canal_id: str, mensaje: Dict[str, Any]):
+        """Entrega a los suscriptores de este worker (lo llama app/pubsub.py)."""
+        canal = self.canales.setdefault(canal_id, Canal())
+        canal.ultimo = mensaje
+        canal.actualizado = time.monotonic()
+        for suscriptor in canal.suscriptores:
+            if suscriptor.encolar(mensaje):
+                self.descartados += 1
+        self._purgar()
+
+    # ------ Suscripción ------
+    async def suscribir(self, canal_id: str, websocket: WebSocket) -> Suscriptor:
+        await websocket.accept()
+        canal = self.canales.setdefault(canal_id, Canal())
+        suscriptor = Suscriptor(websocket)
+        canal.suscriptores.add(suscriptor)
+        # Quien se conecta tarde recibe primero el estado actual
+        if canal.ultimo is not None:
+            suscriptor.encolar(canal.ultimo)
+        suscriptor.tarea = asyncio.create_task(self._escribir(canal_id, suscriptor))
+        log.debug("WebSocket de progreso conectado", extra={"canal": canal_id, "suscriptores": len(canal.suscriptores)})
+        return suscriptor
+
+    def desuscribir(self, canal_id: str, suscriptor: Suscriptor):
+        canal = self.canales.get(canal_id)
+        if canal is None or suscriptor not in canal.suscriptores:
+            return
+        canal.suscriptores.discard(suscriptor)
+        if suscriptor.tarea is not None and suscriptor.tarea is not asyncio.current_task():
+            suscriptor.tarea.cancel()
+        log.debug("WebSocket de progreso desconectado", extra={"canal": canal_id})
+
+    # ------ Envío ------
+    async def _escribir(self, canal_id: str, suscriptor: Suscriptor):
+        try:
+            while True:
+                await suscriptor.hay_datos.wait()
+                for mensaje in suscriptor.tomar():
+                    await asyncio.wait_for(
+                        suscriptor.websocket.send_text(json.dumps(mensaje, default=str)),
+                        TIMEOUT_ENVIO
+                    )
+                    self.enviados += 1
+                # Lo que llegue mientras tanto se acumula en la casilla
+                await asyncio.sleep(self.intervalo)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("Error enviando progreso; se cierra la suscripción", extra={"canal": canal_id, "error": repr(e)})
+            self.desuscribir(canal_id, suscriptor)
+            try:
+                await asyncio.wait_for(suscriptor.websocket.close(), TIMEOUT_ENVIO)
+            except Exception:
+                pass
+
+    # ------ Limpieza ------
+    def _purgar(self):
+        """Quita, como mucho una vez por minuto, canales sin suscriptores ni actividad reciente."""
+        ahora = time.monotonic()
+        if ahora - self._ultima_purga < 60:
+            return
+        self._ultima_purga = ahora
+        for canal_id, canal in list(self.canales.items()):
+            if not canal.suscriptores and ahora - canal.actualizado > RETENCION:
+                del self.canales[canal_id]
+
+    def estadisticas(self) -> Dict[str, Any]:
+        return {
+            "canales": len(self.canales),
+            "suscriptores": sum(len(c.suscriptores) for c in self.canales.values()),
+            "enviados": self.enviados,
+            "descartados": self.descartados,
+            "intervalo_s": self.intervalo
+        }
+
+
+bus_progreso = BusProgreso()
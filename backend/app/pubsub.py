@@ -0,0 +1,273 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict, List, Optional
+
+from app.respuestas import a_json
+from app import registro
+
+log = registro.obtener("pubsub")
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Vacío: todo queda en el proceso (un solo worker). Con varios workers de
+# uvicorn, apuntar a un servidor con protocolo Redis (Redis, Valkey,
+# KeyDB...): redis://localhost:6379/0. unix:///var/run/redis/redis.sock es
+# el mismo backend por socket Unix (un Redis local con `unixsocket`); no hay
+# un broker propio.
+PUBSUB_URL = os.getenv("PUBSUB_URL", "")
+# Prefijo de los canales, para compartir el servidor con otras aplicaciones
+PREFIJO = os.getenv("PUBSUB_PREFIJO", "taller:")
+# Mensajes esperando salir hacia el servidor; si se llena se descartan
+MAX_PENDIENTES = int(os.getenv("PUBSUB_MAX_PENDIENTES", "10000"))
+
+# Identifica a este worker para no volver a entregar sus propios mensajes
+INSTANCIA = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Tema interno: "se descartaron mensajes, lo derivado puede estar desactualizado"
+TEMA_PERDIDOS = "_perdidos"
+
+Manejador = Callable[[Dict[str, Any]], None]
+
+_manejadores: DefaultDict[str, List[Manejador]] = defaultdict(list)
+_al_perder: List[Callable[[], None]] = []
+_candado = threading.Lock()
+
+
+# ==========================================
+# MANEJADORES POR TEMA
+# ==========================================
+def al_recibir(tema: str, funcion: Manejador) -> Manejador:
+    """Registra `funcion(datos)` para los mensajes del tema (de este y de otros workers)."""
+    with _candado:
+        _manejadores[tema].append(funcion)
+    return funcion
+
+
+def _entregar(tema: str, datos: Dict[str, Any]):
+    with _candado:
+        funciones = list(_manejadores.get(tema, ()))
+    for funcion in funciones:
+        try:
+            funcion(datos)
+        except Exception as e:
+            log.exception("Error en manejador de pub/sub", extra={"tema": tema})
+
+
+def al_perder(funcion: Callable[[], None]) -> Callable[[], None]:
+    """
+    Registra `funcion()` para cuando este worker pudo perderse mensajes de
+    otros (reconexión, o un worker que descartó lo que debía publicar).
+    """
+    with _candado:
+        _al_perder.append(funcion)
+    return funcion
+
+
+def _avisar_perdida(motivo: str):
+    log.warning("Posibles mensajes de pub/sub perdidos; se invalida lo derivado", extra={"motivo": motivo})
+    with _candado:
+        funciones = list(_al_perder)
+    for funcion in funciones:
+        try:
+            funcion()
+        except Exception as e:
+            log.exception("Error en manejador de pérdida de pub/sub", extra={"motivo": motivo})
+
+
+# ==========================================
+# BACKENDS
+# ==========================================
+class PubSubLocal:
+    """Un solo proceso: la entrega local de publicar() ya llega a todos."""
+
+    nombre = "local"
+
+    async def iniciar(self):
+        pass
+
+    def enviar(self, tema: str, datos: Dict[str, Any]):
+        pass
+
+    async def cerrar(self):
+        pass
+
+    def estado(self) -> Dict[str, Any]:
+        return {"backend": self.nombre}
+
+
+class PubSubRedis:
+    """
+    Difunde los mensajes entre workers por PUBLISH/PSUBSCRIBE. enviar() no
+    bloquea (se puede llamar desde hilos): deja el mensaje en una cola que
+    una tarea del event loop publica. Otra tarea escucha el patrón
+    PREFIJO* y entrega a los manejadores locales lo que publican los demás.
+
+    Los mensajes no se reintentan: si uno se descarta (cola llena o fallo al
+    publicar), al volver a publicar se difunde TEMA_PERDIDOS para que los
+    demás invaliden; y si se corta la suscripción, al reconectar se avisa a
+    los manejadores de al_perder() de este worker.
+    """
+
+    nombre = "redis"
+
+    def __init__(self, url: str):
+        self.url = url
+        self.enviados = 0
+        self.recibidos = 0
+        self.descartados = 0
+        self.perdidas = 0
+        # Hay mensajes descartados que los demás workers no vieron
+        self._avisar_descarte = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._cola: Optional[asyncio.Queue] = None
+        self._tareas: List[asyncio.Task] = []
+
+    async def iniciar(self):
+        # Dependencia opcional: solo hace falta con PUBSUB_URL
+        import redis.asyncio as redis
+
+        self._cliente = redis.from_url(self.url)
+        self._suscripcion = self._cliente.pubsub(ignore_subscribe_messages=True)
+        await self._suscripcion.psubscribe(f"{PREFIJO}*")
+        self._cola = asyncio.Queue(maxsize=MAX_PENDIENTES)
+        self._loop = asyncio.get_running_loop()
+        self._tareas = [
+            asyncio.create_task(self._publicar_pendientes()),
+            asyncio.create_task(self._escuchar()),
+        ]
+        log.info("Pub/sub entre workers activo", extra={"instancia": INSTANCIA})
+
+    def enviar(self, tema: str, datos: Dict[str, Any]):
+        if self._loop is None:
+            # Sin iniciar (scripts, migraciones): no hay otros workers a quien avisar
+            return
+        carga = a_json({"origen": INSTANCIA, "datos": datos})
+        try:
+            en_el_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            en_el_loop = False
+        if en_el_loop:
+            self._encolar(tema, carga)
+        else:
+            self._loop.call_soon_threadsafe(self._encolar, tema, carga)
+
+    def _encolar(self, tema: str, carga: str):
+        try:
+            self._cola.put_nowait((tema, carga))
+        except asyncio.QueueFull:
+            self.descartados += 1
+            self._avisar_descarte = True
+
+    async def _publicar_pendientes(self):
+        while True:
+            tema, carga = await self._cola.get()
+            try:
+                await self._cliente.publish(f"{PREFIJO}{tema}", carga)
+                self.enviados += 1
+                if self._avisar_descarte:
+                    # Se baja antes de publicar: un descarte mientras tanto vuelve a avisar
+                    self._avisar_descarte = False
+                    await self._cliente.publish(
+                        f"{PREFIJO}{TEMA_PERDIDOS}", a_json({"origen": INSTANCIA, "datos": {}})
+                    )
+            except Exception as e:
+                self.descartados += 1
+                self._avisar_descarte = True
+                log.warning("No se pudo publicar en pub/sub", extra={"tema": tema, "error": str(e)})
+                await asyncio.sleep(1)
+
+    async def _escuchar(self):
+        reconectando = False
+        while True:
+            try:
+                # get_message con espera (en lugar de listen()) devuelve None si
+                # no hay mensajes: así se sabe cuándo volvió la conexión
+                mensaje = await self._suscripcion.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if reconectando:
+                    # redis-py renovó la suscripción; lo publicado mientras no
+                    # estaba se perdió
+                    reconectando = False
+                    self.perdidas += 1
+                    _avisar_perdida("reconexión")
+                if mensaje is None or mensaje["type"] != "pmessage":
+                    continue
+                carga = json.loads(mensaje["data"])
+                if carga["origen"] == INSTANCIA:
+                    continue
+                self.recibidos += 1
+                tema = mensaje["channel"].decode()[len(PREFIJO):]
+                if tema == TEMA_PERDIDOS:
+                    self.perdidas += 1
+                    _avisar_perdida(f"descartes en {carga['origen']}")
+                else:
+                    _entregar(tema, carga["datos"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # redis-py se reconecta y renueva la suscripción en la siguiente lectura
+                log.warning("Conexión de pub/sub interrumpida; reintentando", extra={"error": str(e)})
+                reconectando = True
+                await asyncio.sleep(1)
+
+    async def cerrar(self):
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        if self._loop is not None:
+            await self._suscripcion.aclose()
+            await self._cliente.aclose()
+            self._loop = None
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "backend": self.nombre,
+            "instancia": INSTANCIA,
+            "conectado": self._loop is not None,
+            "enviados": self.enviados,
+            "recibidos": self.recibidos,
+            "descartados": self.descartados,
+            "perdidas": self.perdidas,
+            "pendientes": self._cola.qsize() if self._cola is not None else 0
+        }
+
+
+def crear_backend(url: str):
+    if not url:
+        return PubSubLocal()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return PubSubRedis(url)
+    raise ValueError(f"PUBSUB_URL no soportada: {url} (use redis://, rediss:// o unix://)")
+
+
+_backend = crear_backend(PUBSUB_URL)
+
+
+# ==========================================
+# API DEL MÓDULO
+# ==========================================
+def publicar(tema: str, datos: Dict[str, Any]):
+    """
+    Entrega el mensaje a los manejadores de este proceso (en el hilo que
+    llama, igual que antes) y lo difunde al resto de workers.
+    """
+    _entregar(tema, datos)
+    _backend.enviar(tema, datos)
+
+
+async def iniciar():
+    await _backend.iniciar()
+
+
+async def cerrar():
+    await _backend.cerrar()
+
+
+def estado() -> Dict[str, Any]:
+    return _backend.estado()
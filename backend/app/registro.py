@@ -0,0 +1,109 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# DEBUG muestra también el detalle por petición (filas listadas, PATCH...)
+NIVEL = os.getenv("LOG_NIVEL", "INFO").upper()
+# "texto" para leer en consola, "json" (una línea por registro) para producción
+FORMATO = os.getenv("LOG_FORMATO", "texto").lower()
+
+RAIZ = "taller"
+
+# Atributos propios de LogRecord: el resto vino en extra={...}
+_ATRIBUTOS_ESTANDAR = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+# ==========================================
+# FORMATOS
+# ==========================================
+def _campos_extra(registro: logging.LogRecord) -> dict:
+    return {k: v for k, v in vars(registro).items() if k not in _ATRIBUTOS_ESTANDAR}
+
+
+class FormatoTexto(logging.Formatter):
+    """`fecha NIVEL logger mensaje clave=valor ...`"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, registro: logging.LogRecord) -> str:
+        texto = super().format(registro)
+        extra = _campos_extra(registro)
+        if extra:
+            texto += " " + " ".join(f"{k}={v}" for k, v in extra.items())
+        return texto
+
+
+class FormatoJSON(logging.Formatter):
+    """Un objeto JSON por línea con los campos de extra={...} al mismo nivel."""
+
+    def format(self, registro: logging.LogRecord) -> str:
+        datos = {
+            "ts": datetime.fromtimestamp(registro.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "nivel": registro.levelname,
+            "logger": registro.name,
+            "mensaje": registro.getMessage(),
+            **_campos_extra(registro)
+        }
+        if registro.exc_info and not registro.exc_text:
+            registro.exc_text = self.formatException(registro.exc_info)
+        if registro.exc_text:
+            datos["excepcion"] = registro.exc_text
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+# ==========================================
+# CONFIGURACIÓN DE LOGGING
+# ==========================================
+_candado = threading.Lock()
+_oyente = None
+
+
+class _ManejadorCola(logging.handlers.QueueHandler):
+    def prepare(self, registro: logging.LogRecord) -> logging.LogRecord:
+        # El formato se aplica en el hilo que escribe; aquí solo se fijan
+        # los argumentos (pueden cambiar después de la llamada)
+        registro = logging.makeLogRecord(vars(registro))
+        registro.msg = registro.getMessage()
+        registro.args = None
+        if registro.exc_info and not registro.exc_text:
+            registro.exc_text = logging.Formatter().formatException(registro.exc_info)
+        registro.exc_info = None
+        return registro
+
+
+def configurar():
+    """
+    Envía los registros de los loggers "taller.*" a stderr desde un hilo
+    aparte: quien registra solo encola, sin esperar la escritura.
+    """
+    global _oyente
+    with _candado:
+        if _oyente is not None:
+            return
+        salida = logging.StreamHandler(sys.stderr)
+        salida.setFormatter(FormatoJSON() if FORMATO == "json" else FormatoTexto())
+        cola: queue.SimpleQueue = queue.SimpleQueue()
+        _oyente = logging.handlers.QueueListener(cola, salida, respect_handler_level=True)
+        _oyente.start()
+        atexit.register(_oyente.stop)
+
+        raiz = logging.getLogger(RAIZ)
+        raiz.setLevel(NIVEL)
+        raiz.addHandler(_ManejadorCola(cola))
+        raiz.propagate = False
+
+
+def obtener(nombre: str) -> logging.Logger:
+    """Logger "taller.<nombre>"; usar extra={...} para los datos del registro."""
+    configurar()
+    return logging.getLogger(f"{RAIZ}.{nombre}")
@@ -0,0 +1,85 @@
+import json
+import os
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+# orjson es opcional: sin él se usa json de la biblioteca estándar
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Ruta rápida para los listados: las filas (ya con la forma del
+# response_model) se serializan directo, sin pasar por la validación de
+# FastAPI. Con JSON_RAPIDO=false solo se usa si el cliente pide NDJSON.
+JSON_RAPIDO = os.getenv("JSON_RAPIDO", "false").lower() in ("1", "true", "si", "yes")
+
+TIPO_NDJSON = "application/x-ndjson"
+# Líneas NDJSON que se envían juntas en cada fragmento de la respuesta
+LINEAS_POR_FRAGMENTO = 1000
+
+
+# ==========================================
+# CODIFICACIÓN
+# ==========================================
+def _por_defecto(valor: Any):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"{type(valor).__name__} no es serializable a JSON")
+
+
+def a_json(datos: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, default=_por_defecto, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _adaptador(modelo: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[modelo])
+
+
+def serializar_lista(filas: List[Dict[str, Any]], modelo: Type[BaseModel]) -> bytes:
+    """
+    Cuerpo JSON de un listado: con JSON_RAPIDO se codifica directo; si no,
+    se valida con `modelo` como lo haría el response_model de FastAPI.
+    """
+    if JSON_RAPIDO:
+        return a_json(filas)
+    adaptador = _adaptador(modelo)
+    return adaptador.dump_json(adaptador.validate_python(filas), exclude_unset=True)
+
+
+def _lineas_ndjson(filas: List[Dict[str, Any]]) -> Iterator[bytes]:
+    for inicio in range(0, len(filas), LINEAS_POR_FRAGMENTO):
+        yield b"".join(a_json(f) + b"\n" for f in filas[inicio:inicio + LINEAS_POR_FRAGMENTO])
+
+
+# ==========================================
+# RESPUESTAS
+# ==========================================
+def acepta_ndjson(request: Request) -> bool:
+    return TIPO_NDJSON in request.headers.get("accept", "")
+
+
+def respuesta_lista(
+    request: Request,
+    filas: List[Dict[str, Any]],
+    cabeceras: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serializa una lista de filas sin validarlas: NDJSON (una fila por
+    línea) si el cliente lo pide en Accept, si no un arreglo JSON.
+    """
+    if acepta_ndjson(request):
+        return StreamingResponse(_lineas_ndjson(filas), media_type=TIPO_NDJSON, headers=cabeceras)
+    return Response(a_json(filas), media_type="application/json", headers=cabeceras)
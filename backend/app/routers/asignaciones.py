@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select, insert, update, delete, literal, null, cast, String, union_all, func, case, and_, or_
+from sqlalchemy.exc import IntegrityError
+from app.database import get_db, Sesion
 from app.models import Asignacion, Vehiculo, Mecanico
-from typing import List, Optional
+from app.eventos import notificar_cambio
+from fastapi.responses import Response
+from app.respuestas import acepta_ndjson, respuesta_lista, serializar_lista
+from app.exportacion import exportar
+from app import cache_entidades
+from app import registro
+from typing import Any, Dict, List, Optional, Set
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 # ========================
 # ROUTER
@@ -14,6 +21,8 @@ router = APIRouter(
     tags=["Asignaciones"]
 )
 
+log = registro.obtener("asignaciones")
+
 # ========================
 # SCHEMAS
 # ========================
@@ -33,22 +42,49 @@ class AsignacionResponse(BaseModel):
     fecha_asignacion: Optional[datetime]
     estado: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ActualizacionEstado(BaseModel):
     estado: Optional[str] = None
     descripcion: Optional[str] = None
 
+# Operaciones en lote (cambio de turno): cada item se valida por separado y
+# la respuesta trae un resultado por item, en el mismo orden
+MAX_ITEMS_LOTE = 500
+
+class LoteAsignaciones(BaseModel):
+    items: List[AsignacionCreate] = Field(..., min_length=1, max_length=MAX_ITEMS_LOTE)
+
+class ActualizacionEnLote(BaseModel):
+    id: int
+    id_mecanico: Optional[int] = None
+    id_vehiculo: Optional[int] = None
+    estado: Optional[str] = None
+    descripcion: Optional[str] = None
+
+class LoteActualizaciones(BaseModel):
+    items: List[ActualizacionEnLote] = Field(..., min_length=1, max_length=MAX_ITEMS_LOTE)
+
+class LoteEliminacion(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_ITEMS_LOTE)
+
+class ResultadoItem(BaseModel):
+    indice: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+    asignacion: Optional[AsignacionResponse] = None
+
+class ResultadoLote(BaseModel):
+    exitosos: int
+    fallidos: int
+    resultados: List[ResultadoItem]
+
 # ========================
-# DEPENDENCIA DB
+# NOMBRES PARA MOSTRAR (concatenados en SQL)
 # ========================
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+NOMBRE_VEHICULO = Vehiculo.marca + " " + Vehiculo.modelo
+NOMBRE_MECANICO = Mecanico.nombre + " " + Mecanico.apellido
 
 # ========================
 # MAPEO DE ESTADOS
@@ -68,150 +104,589 @@ ESTADOS_INVERSO = {
     "completado": "Completado"
 }
 
+
+def cambios_para_api(cambios: Dict[str, Any]) -> Dict[str, Any]:
+    """Valores de un UPDATE como los devuelve la API (estado con su etiqueta)."""
+    if "estado" in cambios:
+        return {**cambios, "estado": ESTADOS_INVERSO.get(cambios["estado"], "Pendiente")}
+    return cambios
+
+# ========================
+# LISTADO (paginación keyset sobre fecha_asignacion, id)
+# ========================
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+# "reciente": las más nuevas primero (la primera página es lo último que se
+# asignó); "antiguo": en orden de asignación
+ORDENES = ("reciente", "antiguo")
+SIN_INFORMACION = cache_entidades.SIN_INFORMACION
+
+# Solo las columnas que devuelve la API; nombres y estado se arman en SQL
+COLUMNAS_LISTADO = (
+    Asignacion.id,
+    func.coalesce(Asignacion.id_mecanico, 0).label("id_mecanico"),
+    func.coalesce(Asignacion.id_vehiculo, 0).label("id_vehiculo"),
+    func.coalesce(NOMBRE_VEHICULO, SIN_INFORMACION).label("vehiculo"),
+    func.coalesce(NOMBRE_MECANICO, SIN_INFORMACION).label("mecanico"),
+    func.coalesce(Asignacion.descripcion, "").label("descripcion"),
+    Asignacion.fecha_asignacion,
+    case(ESTADOS_INVERSO, value=Asignacion.estado, else_="Pendiente").label("estado"),
+)
+# Sin los nombres: el listado paginado los completa desde cache_entidades
+COLUMNAS_SIN_NOMBRES = tuple(c for c in COLUMNAS_LISTADO if c.key not in ("vehiculo", "mecanico"))
+
+
+def consulta_listado(
+    estado: Optional[str] = None,
+    id_mecanico: Optional[int] = None,
+    id_vehiculo: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    con_nombres: bool = True,
+    reciente: bool = True
+):
+    """
+    SELECT del listado con sus filtros, ordenado por fecha_asignacion, id
+    (descendente con reciente=True).
+    """
+    if con_nombres:
+        consulta = (
+            select(*COLUMNAS_LISTADO)
+            .outerjoin(Vehiculo, Vehiculo.id == Asignacion.id_vehiculo)
+            .outerjoin(Mecanico, Mecanico.id == Asignacion.id_mecanico)
+        )
+    else:
+        consulta = select(*COLUMNAS_SIN_NOMBRES)
+    if reciente:
+        consulta = consulta.order_by(Asignacion.fecha_asignacion.desc(), Asignacion.id.desc())
+    else:
+        consulta = consulta.order_by(Asignacion.fecha_asignacion, Asignacion.id)
+    if estado:
+        if estado not in ESTADOS_MAP:
+            raise HTTPException(status_code=400, detail=f"Estado desconocido: {estado}")
+        consulta = consulta.where(Asignacion.estado == ESTADOS_MAP[estado])
+    if id_mecanico is not None:
+        consulta = consulta.where(Asignacion.id_mecanico == id_mecanico)
+    if id_vehiculo is not None:
+        consulta = consulta.where(Asignacion.id_vehiculo == id_vehiculo)
+    if desde is not None:
+        consulta = consulta.where(Asignacion.fecha_asignacion >= desde)
+    if hasta is not None:
+        consulta = consulta.where(Asignacion.fecha_asignacion <= hasta)
+    return consulta
+
+
+def leer_cursor(cursor: str):
+    """'<fecha ISO>_<id>' → (fecha o None, id). La fecha va vacía si es NULL."""
+    fecha, separador, id_texto = cursor.rpartition("_")
+    try:
+        if not separador:
+            raise ValueError
+        return (datetime.fromisoformat(fecha) if fecha else None), int(id_texto)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {cursor}")
+
+
+def armar_cursor(fila) -> str:
+    fecha = fila["fecha_asignacion"]
+    return f"{fecha.isoformat() if fecha else ''}_{fila['id']}"
+
+
+async def con_nombres(db: Sesion, filas) -> List[Dict[str, Any]]:
+    """Agrega vehiculo/mecanico a las filas desde la caché de entidades (lo que falte, en una consulta)."""
+    vehiculos, mecanicos = await cache_entidades.nombres_juntos(
+        db,
+        (cache_entidades.vehiculos, {f["id_vehiculo"] for f in filas}),
+        (cache_entidades.mecanicos, {f["id_mecanico"] for f in filas})
+    )
+    return [
+        {
+            **f,
+            "vehiculo": vehiculos.get(f["id_vehiculo"], SIN_INFORMACION),
+            "mecanico": mecanicos.get(f["id_mecanico"], SIN_INFORMACION)
+        }
+        for f in filas
+    ]
+
+
+def despues_del_cursor(fecha: Optional[datetime], id_asignacion: int, reciente: bool = True):
+    """
+    Condición keyset para ORDER BY fecha_asignacion, id. MySQL y SQLite
+    ordenan los NULL primero en orden ascendente (y últimos en descendente):
+    en ascendente, tras un cursor sin fecha siguen el resto de fechas NULL y
+    luego todas las fechas; en descendente, tras una fecha siguen las
+    anteriores y al final las NULL.
+    """
+    if reciente:
+        if fecha is None:
+            return and_(Asignacion.fecha_asignacion.is_(None), Asignacion.id < id_asignacion)
+        return or_(
+            Asignacion.fecha_asignacion < fecha,
+            and_(Asignacion.fecha_asignacion == fecha, Asignacion.id < id_asignacion),
+            Asignacion.fecha_asignacion.is_(None)
+        )
+    if fecha is None:
+        return or_(
+            and_(Asignacion.fecha_asignacion.is_(None), Asignacion.id > id_asignacion),
+            Asignacion.fecha_asignacion.is_not(None)
+        )
+    return or_(
+        Asignacion.fecha_asignacion > fecha,
+        and_(Asignacion.fecha_asignacion == fecha, Asignacion.id > id_asignacion)
+    )
+
+
 # ========================
 # ENDPOINTS
 # ========================
 
+@router.get("", response_model=List[AsignacionResponse])
 @router.get("/", response_model=List[AsignacionResponse])
-def listar_asignaciones(db: Session = Depends(get_db)):
-    """Listar todas las asignaciones"""
-    try:
-        asignaciones = db.query(Asignacion).options(
-            joinedload(Asignacion.vehiculo),
-            joinedload(Asignacion.mecanico)
-        ).all()
-
-        resultado = []
-        for a in asignaciones:
-            estado_frontend = ESTADOS_INVERSO.get(a.estado or "pendiente", "Pendiente")
-            
-            resultado.append({
-                "id": a.id,
-                "id_mecanico": a.id_mecanico or 0,
-                "id_vehiculo": a.id_vehiculo or 0,
-                "vehiculo": f"{a.vehiculo.marca} {a.vehiculo.modelo}" if a.vehiculo else "Sin información",
-                "mecanico": f"{a.mecanico.nombre} {a.mecanico.apellido}" if a.mecanico else "Sin información",
-                "descripcion": a.descripcion or "",
-                "fecha_asignacion": a.fecha_asignacion,
-                "estado": estado_frontend
-            })
-
-        print(f"✅ Listadas {len(resultado)} asignaciones")
-        return resultado
+async def listar_asignaciones(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="Valor de X-Siguiente-Cursor de la página anterior"),
+    limite: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    estado: Optional[str] = Query(None, description="Pendiente, En Proceso o Completado"),
+    id_mecanico: Optional[int] = None,
+    id_vehiculo: Optional[int] = None,
+    desde: Optional[datetime] = Query(None, description="Fecha de asignación mínima (incluida)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha de asignación máxima (incluida)"),
+    orden: str = Query("reciente", description="reciente (las más nuevas primero) o antiguo"),
+    db: Sesion = Depends(get_db)
+):
+    """
+    Lista asignaciones por fecha de asignación, las más recientes primero
+    salvo con orden=antiguo (keyset sobre fecha, id). Si hay más resultados,
+    el cursor de la siguiente página viene en la cabecera X-Siguiente-Cursor
+    (se usa con el mismo orden). Con Accept: application/x-ndjson responde
+    una fila por línea.
+    """
+    if orden not in ORDENES:
+        raise HTTPException(status_code=400, detail=f"Orden desconocido: {orden} (use {' o '.join(ORDENES)})")
+    reciente = orden == "reciente"
+    consulta = consulta_listado(
+        estado, id_mecanico, id_vehiculo, desde, hasta, con_nombres=False, reciente=reciente
+    ).limit(limite + 1)
+    if cursor:
+        consulta = consulta.where(despues_del_cursor(*leer_cursor(cursor), reciente=reciente))
 
+    try:
+        filas = (await db.execute(consulta)).mappings().all()
+        cabeceras = {}
+        if len(filas) > limite:
+            filas = filas[:limite]
+            cabeceras["X-Siguiente-Cursor"] = armar_cursor(filas[-1])
+        # Los mismos pocos mecánicos y vehículos se repiten en toda la
+        # página: sus nombres salen de la caché en vez de un JOIN por fila
+        filas = await con_nombres(db, filas)
     except Exception as e:
-        print(f"❌ Error listando: {e}")
+        log.exception("Error listando asignaciones")
         raise HTTPException(status_code=500, detail=str(e))
 
+    log.debug("Asignaciones listadas", extra={"cantidad": len(filas)})
+    # Las filas ya tienen la forma de AsignacionResponse: NDJSON sin validar;
+    # en JSON se validan como con response_model salvo con JSON_RAPIDO
+    if acepta_ndjson(request):
+        return respuesta_lista(request, filas, cabeceras)
+    return Response(serializar_lista(filas, AsignacionResponse), media_type="application/json", headers=cabeceras)
+
+
+@router.get("/export")
+async def exportar_asignaciones(
+    formato: str = Query("ndjson", alias="format", description="ndjson, csv o xlsx"),
+    estado: Optional[str] = Query(None, description="Pendiente, En Proceso o Completado"),
+    id_mecanico: Optional[int] = None,
+    id_vehiculo: Optional[int] = None,
+    desde: Optional[datetime] = Query(None, description="Fecha de asignación mínima (incluida)"),
+    hasta: Optional[datetime] = Query(None, description="Fecha de asignación máxima (incluida)")
+):
+    """
+    Exporta todas las asignaciones (mismas columnas y filtros que el
+    listado) en orden de asignación, leyendo con un cursor del servidor,
+    sin paginar.
+    """
+    consulta = consulta_listado(estado, id_mecanico, id_vehiculo, desde, hasta, reciente=False)
+    log.info("Exportando asignaciones", extra={"formato": formato})
+    return await exportar(consulta, formato, "asignaciones")
+
 
 @router.post("/", response_model=AsignacionResponse)
-def crear_asignacion(asignacion: AsignacionCreate, db: Session = Depends(get_db)):
-    """Crear una nueva asignación"""
+async def crear_asignacion(asignacion: AsignacionCreate, db: Sesion = Depends(get_db)):
+    """Crear una nueva asignación (existencia desde la caché de entidades + un INSERT)"""
     try:
-        mecanico = db.query(Mecanico).filter(Mecanico.id == asignacion.id_mecanico).first()
-        vehiculo = db.query(Vehiculo).filter(Vehiculo.id == asignacion.id_vehiculo).first()
+        # Mecánico y vehículo suelen estar en caché: sin consultas previas al INSERT
+        mecanicos, vehiculos = await cache_entidades.nombres_juntos(
+            db,
+            (cache_entidades.mecanicos, [asignacion.id_mecanico]),
+            (cache_entidades.vehiculos, [asignacion.id_vehiculo])
+        )
+        mecanico = mecanicos.get(asignacion.id_mecanico)
+        vehiculo = vehiculos.get(asignacion.id_vehiculo)
 
-        if not mecanico:
+        if mecanico is None:
             raise HTTPException(status_code=404, detail=f"Mecánico {asignacion.id_mecanico} no encontrado")
-        if not vehiculo:
+        if vehiculo is None:
             raise HTTPException(status_code=404, detail=f"Vehículo {asignacion.id_vehiculo} no encontrado")
 
-        estado_db = ESTADOS_MAP.get(asignacion.estado, "pendiente")
-        
-        nueva = Asignacion(
-            id_mecanico=asignacion.id_mecanico,
-            id_vehiculo=asignacion.id_vehiculo,
-            descripcion=asignacion.descripcion or "",
-            estado=estado_db
-        )
-        
-        db.add(nueva)
-        db.commit()
-        db.refresh(nueva)
+        valores = {
+            "id_mecanico": asignacion.id_mecanico,
+            "id_vehiculo": asignacion.id_vehiculo,
+            "descripcion": asignacion.descripcion or "",
+            "estado": ESTADOS_MAP.get(asignacion.estado, "pendiente"),
+            # Se fija aquí (igual que el default del modelo) para no releer la fila
+            "fecha_asignacion": datetime.utcnow()
+        }
+        try:
+            resultado = await db.execute(insert(Asignacion).values(**valores))
+            nuevo_id = resultado.inserted_primary_key[0]
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            await _confirmar_referencias(db, asignacion)
+            raise
 
-        print(f"✅ Asignación {nueva.id} creada")
-        
-        return AsignacionResponse(
-            id=nueva.id,
-            id_mecanico=nueva.id_mecanico,
-            id_vehiculo=nueva.id_vehiculo,
-            vehiculo=f"{vehiculo.marca} {vehiculo.modelo}",
-            mecanico=f"{mecanico.nombre} {mecanico.apellido}",
-            descripcion=nueva.descripcion or "",
-            fecha_asignacion=nueva.fecha_asignacion,
-            estado=ESTADOS_INVERSO.get(nueva.estado, "Pendiente")
+        log.info("Asignación creada", extra={"asignacion_id": nuevo_id})
+
+        respuesta = AsignacionResponse(
+            id=nuevo_id,
+            id_mecanico=valores["id_mecanico"],
+            id_vehiculo=valores["id_vehiculo"],
+            vehiculo=vehiculo,
+            mecanico=mecanico,
+            descripcion=valores["descripcion"],
+            fecha_asignacion=valores["fecha_asignacion"],
+            estado=ESTADOS_INVERSO.get(valores["estado"], "Pendiente")
         )
+        notificar_cambio("asignaciones", "crear", ids=[nuevo_id], filas=[respuesta.model_dump()])
+        return respuesta
 
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
-        print(f"❌ Error creando: {e}")
+        await db.rollback()
+        log.exception("Error creando asignación")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _confirmar_referencias(db: Sesion, asignacion: AsignacionCreate):
+    """
+    El INSERT violó una FK aunque la caché de entidades daba ambos ids por
+    existentes (borrados en otro worker dentro del TTL): se olvidan de la
+    caché y se confirman contra la base para responder 404 como sin caché.
+    """
+    cache_entidades.mecanicos.invalidar([asignacion.id_mecanico])
+    cache_entidades.vehiculos.invalidar([asignacion.id_vehiculo])
+    encontrados = await _existentes(db, {asignacion.id_mecanico}, {asignacion.id_vehiculo})
+    await db.rollback()
+    if asignacion.id_mecanico not in encontrados["mecanico"]:
+        raise HTTPException(status_code=404, detail=f"Mecánico {asignacion.id_mecanico} no encontrado")
+    if asignacion.id_vehiculo not in encontrados["vehiculo"]:
+        raise HTTPException(status_code=404, detail=f"Vehículo {asignacion.id_vehiculo} no encontrado")
+
+
+# ========================
+# OPERACIONES EN LOTE
+# ========================
+# Declaradas antes de /{asignacion_id} para que "batch" no se tome como id
+async def _existentes(
+    db: Sesion,
+    mecanicos: Set[int] = frozenset(),
+    vehiculos: Set[int] = frozenset(),
+    asignaciones: Set[int] = frozenset()
+) -> Dict[str, Dict[int, Optional[str]]]:
+    """
+    Valida todos los ids referenciados con una sola consulta (UNION ALL).
+    Devuelve, por tipo, {id: nombre para mostrar} de los que existen.
+    """
+    partes = []
+    if mecanicos:
+        partes.append(select(literal("mecanico").label("tipo"), Mecanico.id, NOMBRE_MECANICO)
+                      .where(Mecanico.id.in_(mecanicos)))
+    if vehiculos:
+        partes.append(select(literal("vehiculo").label("tipo"), Vehiculo.id, NOMBRE_VEHICULO)
+                      .where(Vehiculo.id.in_(vehiculos)))
+    if asignaciones:
+        partes.append(select(literal("asignacion").label("tipo"), Asignacion.id, cast(null(), String))
+                      .where(Asignacion.id.in_(asignaciones)))
+
+    encontrados = {"mecanico": {}, "vehiculo": {}, "asignacion": {}}
+    if partes:
+        for tipo, id_, nombre in (await db.execute(union_all(*partes))).all():
+            encontrados[tipo][id_] = nombre
+    return encontrados
+
+
+# Ids de un INSERT multi-fila según el lastrowid del driver. MySQL/MariaDB
+# informan el primero (LAST_INSERT_ID()) y reservan un bloque consecutivo
+# para un INSERT ... VALUES con cantidad de filas conocida, en cualquier
+# innodb_autoinc_lock_mode; SQLite informa el último.
+IDS_DE_INSERT_MULTIFILA = {
+    "mysql": lambda lastrowid, n: list(range(lastrowid, lastrowid + n)),
+    "mariadb": lambda lastrowid, n: list(range(lastrowid, lastrowid + n)),
+    "sqlite": lambda lastrowid, n: list(range(lastrowid - n + 1, lastrowid + 1)),
+}
+
+
+def _resumen_lote(resultados: List[Dict[str, Any]]) -> Dict[str, Any]:
+    exitosos = sum(1 for r in resultados if r["ok"])
+    return {"exitosos": exitosos, "fallidos": len(resultados) - exitosos, "resultados": resultados}
+
+
+@router.post("/batch", response_model=ResultadoLote)
+async def crear_asignaciones_lote(lote: LoteAsignaciones, db: Sesion = Depends(get_db)):
+    """
+    Crea varias asignaciones en una transacción. Los ids de mecánicos y
+    vehículos se validan con una consulta; los items inválidos se informan
+    y el resto se inserta.
+    """
+    try:
+        existentes = await _existentes(
+            db,
+            mecanicos={i.id_mecanico for i in lote.items},
+            vehiculos={i.id_vehiculo for i in lote.items}
+        )
+
+        resultados: List[Dict[str, Any]] = []
+        validos = []
+        ahora = datetime.utcnow()
+        for indice, item in enumerate(lote.items):
+            if item.id_mecanico not in existentes["mecanico"]:
+                resultados.append({"indice": indice, "ok": False, "error": f"Mecánico {item.id_mecanico} no encontrado"})
+            elif item.id_vehiculo not in existentes["vehiculo"]:
+                resultados.append({"indice": indice, "ok": False, "error": f"Vehículo {item.id_vehiculo} no encontrado"})
+            else:
+                resultados.append({"indice": indice, "ok": True})
+                validos.append((indice, {
+                    "id_mecanico": item.id_mecanico,
+                    "id_vehiculo": item.id_vehiculo,
+                    "descripcion": item.descripcion or "",
+                    "estado": ESTADOS_MAP.get(item.estado, "pendiente"),
+                    "fecha_asignacion": ahora
+                }))
+
+        filas = [valores for _, valores in validos]
+        dialecto = db.bind.dialect
+        if not filas:
+            ids = []
+        elif dialecto.insert_executemany_returning_sort_by_parameter_order:
+            # Un INSERT multi-fila que devuelve los ids en el orden de las filas
+            ids = (await db.execute(
+                insert(Asignacion).returning(Asignacion.id, sort_by_parameter_order=True), filas
+            )).scalars().all()
+        elif dialecto.name in IDS_DE_INSERT_MULTIFILA:
+            # Sin RETURNING en executemany (MySQL): un solo INSERT ... VALUES
+            # (...), (...) y los ids a partir del autoincremental que informa
+            ids = IDS_DE_INSERT_MULTIFILA[dialecto.name](
+                (await db.execute(insert(Asignacion).values(filas))).lastrowid, len(filas)
+            )
+        else:
+            ids = [
+                (await db.execute(insert(Asignacion).values(**valores))).inserted_primary_key[0]
+                for valores in filas
+            ]
+        await db.commit()
+
+        for (indice, valores), nuevo_id in zip(validos, ids):
+            resultados[indice]["id"] = nuevo_id
+            resultados[indice]["asignacion"] = {
+                **valores,
+                "id": nuevo_id,
+                "vehiculo": existentes["vehiculo"][valores["id_vehiculo"]],
+                "mecanico": existentes["mecanico"][valores["id_mecanico"]],
+                "estado": ESTADOS_INVERSO.get(valores["estado"], "Pendiente")
+            }
+        if ids:
+            notificar_cambio(
+                "asignaciones", "crear", ids=list(ids),
+                filas=[resultados[indice]["asignacion"] for indice, _ in validos]
+            )
+
+        log.info("Lote de asignaciones creado", extra={"creadas": len(ids), "rechazadas": len(resultados) - len(ids)})
+        return _resumen_lote(resultados)
+
+    except Exception as e:
+        await db.rollback()
+        log.exception("Error creando lote de asignaciones")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.patch("/batch", response_model=ResultadoLote)
+async def actualizar_asignaciones_lote(lote: LoteActualizaciones, db: Sesion = Depends(get_db)):
+    """
+    Reasigna mecánico/vehículo y cambia estado o descripción de varias
+    asignaciones en una transacción. Los items con los mismos cambios se
+    aplican con un solo UPDATE ... WHERE id IN (...).
+    """
+    try:
+        existentes = await _existentes(
+            db,
+            mecanicos={i.id_mecanico for i in lote.items if i.id_mecanico is not None},
+            vehiculos={i.id_vehiculo for i in lote.items if i.id_vehiculo is not None},
+            asignaciones={i.id for i in lote.items}
+        )
+
+        resultados: List[Dict[str, Any]] = []
+        grupos: Dict[tuple, List[int]] = {}
+        vistos = set()
+        for indice, item in enumerate(lote.items):
+            error = None
+            if item.id in vistos:
+                error = f"Asignación {item.id} repetida en el lote"
+            elif item.id not in existentes["asignacion"]:
+                error = f"Asignación {item.id} no encontrada"
+            elif item.id_mecanico is not None and item.id_mecanico not in existentes["mecanico"]:
+                error = f"Mecánico {item.id_mecanico} no encontrado"
+            elif item.id_vehiculo is not None and item.id_vehiculo not in existentes["vehiculo"]:
+                error = f"Vehículo {item.id_vehiculo} no encontrado"
+            vistos.add(item.id)
+            if error:
+                resultados.append({"indice": indice, "ok": False, "id": item.id, "error": error})
+                continue
+
+            cambios = {}
+            if item.id_mecanico is not None:
+                cambios["id_mecanico"] = item.id_mecanico
+            if item.id_vehiculo is not None:
+                cambios["id_vehiculo"] = item.id_vehiculo
+            if item.estado:
+                cambios["estado"] = ESTADOS_MAP.get(item.estado, "pendiente")
+            if item.descripcion is not None:
+                cambios["descripcion"] = item.descripcion
+            if cambios:
+                grupos.setdefault(tuple(sorted(cambios.items())), []).append(item.id)
+            resultados.append({"indice": indice, "ok": True, "id": item.id})
+
+        for cambios, ids in grupos.items():
+            await db.execute(update(Asignacion).where(Asignacion.id.in_(ids)).values(**dict(cambios)))
+        await db.commit()
+
+        actualizados = [i for ids in grupos.values() for i in ids]
+        for cambios, ids in grupos.items():
+            notificar_cambio("asignaciones", "actualizar", ids=ids, cambios=cambios_para_api(dict(cambios)))
+
+        log.info("Lote de asignaciones actualizado", extra={"actualizadas": len(actualizados), "updates": len(grupos)})
+        return _resumen_lote(resultados)
+
+    except Exception as e:
+        await db.rollback()
+        log.exception("Error actualizando lote de asignaciones")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch/eliminar", response_model=ResultadoLote)
+async def eliminar_asignaciones_lote(lote: LoteEliminacion, db: Sesion = Depends(get_db)):
+    """Elimina varias asignaciones con un solo DELETE ... WHERE id IN (...)"""
+    try:
+        ids = list(dict.fromkeys(lote.ids))
+        if db.bind.dialect.delete_returning:
+            eliminados = set((await db.execute(
+                delete(Asignacion).where(Asignacion.id.in_(ids)).returning(Asignacion.id)
+            )).scalars().all())
+        else:
+            eliminados = set((await _existentes(db, asignaciones=set(ids)))["asignacion"])
+            if eliminados:
+                await db.execute(delete(Asignacion).where(Asignacion.id.in_(eliminados)))
+        await db.commit()
+
+        resultados = [
+            {"indice": indice, "ok": True, "id": id_} if id_ in eliminados
+            else {"indice": indice, "ok": False, "id": id_, "error": f"Asignación {id_} no encontrada"}
+            for indice, id_ in enumerate(lote.ids)
+        ]
+        if eliminados:
+            notificar_cambio("asignaciones", "eliminar", ids=sorted(eliminados))
+
+        log.info("Lote de asignaciones eliminado", extra={"eliminadas": len(eliminados)})
+        return _resumen_lote(resultados)
+
+    except Exception as e:
+        await db.rollback()
+        log.exception("Error eliminando lote de asignaciones")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _estado_actual(db: Sesion, asignacion_id: int):
+    return (await db.execute(
+        select(Asignacion.id, Asignacion.estado, Asignacion.descripcion)
+        .where(Asignacion.id == asignacion_id)
+    )).mappings().first()
+
+
 @router.patch("/{asignacion_id}")
-def actualizar_asignacion(
+async def actualizar_asignacion(
     asignacion_id: int,
     datos: ActualizacionEstado,
-    db: Session = Depends(get_db)
+    db: Sesion = Depends(get_db)
 ):
-    """Actualizar estado o descripción de una asignación"""
+    """Actualizar estado o descripción de una asignación con un solo UPDATE"""
     try:
-        print(f"🔄 PATCH asignación {asignacion_id}: {datos}")
-        
-        asignacion = db.query(Asignacion).filter(Asignacion.id == asignacion_id).first()
-        
-        if not asignacion:
-            print(f"❌ Asignación {asignacion_id} no existe")
-            raise HTTPException(status_code=404, detail=f"Asignación {asignacion_id} no encontrada")
-        
+        cambios = {}
         if datos.estado:
-            estado_db = ESTADOS_MAP.get(datos.estado, "pendiente")
-            asignacion.estado = estado_db
-            print(f"   ✅ Estado → {estado_db}")
-        
+            cambios["estado"] = ESTADOS_MAP.get(datos.estado, "pendiente")
         if datos.descripcion is not None:
-            asignacion.descripcion = datos.descripcion
-            print(f"   ✅ Descripción actualizada")
-        
-        db.commit()
-        db.refresh(asignacion)
-        
-        print(f"✅ Asignación {asignacion_id} actualizada")
-        
+            cambios["descripcion"] = datos.descripcion
+        log.debug("PATCH asignación", extra={"asignacion_id": asignacion_id, "campos": sorted(cambios)})
+
+        if not cambios:
+            fila = await _estado_actual(db, asignacion_id)
+        elif db.bind.dialect.update_returning:
+            # UPDATE ... RETURNING: actualiza y devuelve la fila en un solo viaje
+            fila = (await db.execute(
+                update(Asignacion).where(Asignacion.id == asignacion_id).values(**cambios)
+                .returning(Asignacion.id, Asignacion.estado, Asignacion.descripcion)
+            )).mappings().first()
+        else:
+            # Sin RETURNING (MySQL): rowcount dice si existía. Si se cambiaron
+            # ambos campos la respuesta ya se conoce; si no, se lee el otro
+            # dentro de la misma transacción
+            resultado = await db.execute(
+                update(Asignacion).where(Asignacion.id == asignacion_id).values(**cambios)
+            )
+            if resultado.rowcount == 0:
+                fila = None
+            elif len(cambios) == 2:
+                fila = {"id": asignacion_id, **cambios}
+            else:
+                fila = await _estado_actual(db, asignacion_id)
+
+        if not fila:
+            raise HTTPException(status_code=404, detail=f"Asignación {asignacion_id} no encontrada")
+
+        await db.commit()
+        if cambios:
+            notificar_cambio("asignaciones", "actualizar", ids=[asignacion_id], cambios=cambios_para_api(cambios))
+
+        log.info("Asignación actualizada", extra={"asignacion_id": asignacion_id})
+
         return {
             "mensaje": "Asignación actualizada",
-            "id": asignacion.id,
-            "estado": ESTADOS_INVERSO.get(asignacion.estado, "Pendiente"),
-            "descripcion": asignacion.descripcion
+            "id": fila["id"],
+            "estado": ESTADOS_INVERSO.get(fila["estado"], "Pendiente"),
+            "descripcion": fila["descripcion"]
         }
     
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
-        print(f"❌ Error actualizando: {e}")
+        await db.rollback()
+        log.exception("Error actualizando asignación", extra={"asignacion_id": asignacion_id})
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.delete("/{asignacion_id}")
-def eliminar_asignacion(asignacion_id: int, db: Session = Depends(get_db)):
-    """Eliminar una asignación"""
+async def eliminar_asignacion(asignacion_id: int, db: Sesion = Depends(get_db)):
+    """Eliminar una asignación con un solo DELETE"""
     try:
-        print(f"🗑️ DELETE asignación {asignacion_id}")
-        
-        asignacion = db.query(Asignacion).filter(Asignacion.id == asignacion_id).first()
+        resultado = await db.execute(delete(Asignacion).where(Asignacion.id == asignacion_id))
         
-        if not asignacion:
-            print(f"❌ Asignación {asignacion_id} no existe")
+        if resultado.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"Asignación {asignacion_id} no encontrada")
         
-        db.delete(asignacion)
-        db.commit()
-        
-        print(f"✅ Asignación {asignacion_id} eliminada")
-        
+        await db.commit()
+        notificar_cambio("asignaciones", "eliminar", ids=[asignacion_id])
+
+        log.info("Asignación eliminada", extra={"asignacion_id": asignacion_id})
+
         return {
             "mensaje": "Asignación eliminada",
             "id": asignacion_id
@@ -220,6 +695,6 @@ def eliminar_asignacion(asignacion_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
-        print(f"❌ Error eliminando: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        await db.rollback()
+        log.exception("Error eliminando asignación", extra={"asignacion_id": asignacion_id})
+        raise HTTPException(status_code=500, detail=str(e))
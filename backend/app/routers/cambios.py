@@ -0,0 +1,36 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
+from typing import Optional
+from app.cambios import feed_cambios, COLECCIONES
+
+router = APIRouter(tags=["Cambios"])
+
+# ========================
+# FEED DE CAMBIOS EN TIEMPO REAL
+# ========================
+# Mensajes (JSON, uno por frame):
+#   {"tipo": "hola", "epoca": "...", "seq": N}        al conectar
+#   {"tipo": "cambio", "seq": N, "coleccion": "asignaciones",
+#    "operacion": "crear" | "actualizar" | "eliminar", "ids": [...],
+#    "filas": [...]?, "cambios": {...}?, "cantidad": N?}
+#   {"tipo": "reinicio", "epoca": "...", "seq": N}    recargar las listas
+# Un cambio sin "ids" (cargas masivas, vaciar la tabla) también pide
+# recargar esa colección.
+# Para reanudar tras una desconexión: ?epoca=<epoca>&desde=<último seq recibido>
+# Con PUBSUB_URL la secuencia es común a todos los workers: se puede reanudar
+# en cualquiera; sin ella es de cada worker.
+@router.websocket("/ws/cambios")
+async def feed_de_cambios(
+    websocket: WebSocket,
+    colecciones: Optional[str] = Query(None, description="Separadas por coma; por defecto todas"),
+    epoca: Optional[str] = None,
+    desde: Optional[int] = None
+):
+    elegidas = {c.strip() for c in colecciones.split(",")} if colecciones else set(COLECCIONES)
+    desconocidas = elegidas - set(COLECCIONES)
+    if desconocidas:
+        await websocket.close(code=1008, reason=f"Colecciones desconocidas: {', '.join(sorted(desconocidas))}")
+        return
+    try:
+        await feed_cambios.atender(websocket, elegidas, epoca, desde)
+    except WebSocketDisconnect:
+        pass
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, UploadFile, File, WebSocket, WebSocketDisconnect, Depends, Form
+from fastapi import APIRouter, UploadFile, File, WebSocket, WebSocketDisconnect, Depends, Form, HTTPException
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
 import pandas as pd
-import io
-import json
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from contextlib import asynccontextmanager
 from datetime import datetime
-from app.database import SessionLocal
+from app.database import get_db, Sesion, SessionLocal
 from app.models import Vehiculo  # Ajusta según tu modelo
+from app.carga_masiva import preparar_lote, guardar_lote, acumular_errores, formatear_errores
+from app.eventos import notificar_cambio
+from app.validacion import COLUMNAS_REQUERIDAS
+from app.schemas import ImportJobResponse
+from app import trabajos
+from app.ingesta import (
+    volcar_upload_con_hash, borrar_temporal, leer_lotes_async, leer_encabezados,
+    leer_preview, estimar_filas
+)
+from app import cache_uploads
+from app.ejecucion import en_hilo_db, en_hilo_parseo, en_proceso, turno_de_carga
+from app.progreso import bus_progreso
 import asyncio
 
 router = APIRouter(
@@ -16,77 +27,98 @@ router = APIRouter(
 )
 
 # ==========================================
-# DEPENDENCIA DE BASE DE DATOS
+# WEBSOCKET ENDPOINT
 # ==========================================
-def get_db():
-    db = SessionLocal()
+# El progreso se publica en app/progreso.py sin esperar a los clientes;
+# varios WebSockets pueden seguir la misma carga o trabajo
+@router.websocket("/ws/{session_id}")
+async def websocket_endpoint(websocket: WebSocket, session_id: str):
+    suscriptor = await bus_progreso.suscribir(session_id, websocket)
     try:
-        yield db
+        while True:
+            await websocket.receive_text()  # Mantener conexión activa
+    except WebSocketDisconnect:
+        pass
     finally:
-        db.close()
+        bus_progreso.desuscribir(session_id, suscriptor)
 
 # ==========================================
-# GESTIÓN DE WEBSOCKETS
+# CACHÉ DE UPLOADS (validar → preview → cargar)
 # ==========================================
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, session_id: str):
-        await websocket.accept()
-        self.active_connections[session_id] = websocket
-        print(f"WebSocket conectado: {session_id}")
-
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
-            print(f"WebSocket desconectado: {session_id}")
+@asynccontextmanager
+async def resolver_upload(
+    file: Optional[UploadFile],
+    upload_id: Optional[str],
+    parsear: bool = True
+) -> AsyncIterator[Tuple[Optional[str], str]]:
+    """
+    Entrega (upload_id, ruta) para usar dentro del bloque. Con `upload_id`
+    reutiliza la entrada de la caché; con `file` calcula su hash y solo lo
+    guarda si ese contenido no estaba en caché.
 
-    async def send_message(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
-            try:
-                await self.active_connections[session_id].send_text(json.dumps(message))
-            except Exception as e:
-                print(f"Error enviando mensaje: {e}")
+    Con parsear=True (preview, cargas) la ruta es el Parquet, parseándolo si
+    hace falta; con parsear=False (validar, trabajos) basta el archivo
+    original. Si el archivo no entra en la caché (EXCEL_CACHE_MAX_MB) se usa
+    el temporal, el upload_id es None y el temporal se borra al salir.
+    """
+    if upload_id:
+        ruta = cache_uploads.buscar(upload_id)
+        if ruta is None:
+            raise HTTPException(status_code=404, detail=f"upload_id {upload_id} no encontrado o expirado, vuelva a subir el archivo")
+        if parsear and not cache_uploads.es_parquet(ruta):
+            ruta = await en_proceso(cache_uploads.registrar, ruta, upload_id) or ruta
+        yield upload_id, ruta
+        return
 
-manager = ConnectionManager()
+    if file is None:
+        raise HTTPException(status_code=400, detail="Debe enviar 'file' o 'upload_id'")
 
-# ==========================================
-# WEBSOCKET ENDPOINT
-# ==========================================
-@router.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    await manager.connect(websocket, session_id)
+    temporal, digest = await volcar_upload_con_hash(file)
     try:
-        while True:
-            data = await websocket.receive_text()  # Mantener conexión activa
-    except WebSocketDisconnect:
-        manager.disconnect(session_id)
+        cache_uploads.guardar_nombre(digest, file.filename)
+        ruta = cache_uploads.buscar(digest)
+        if ruta is not None and parsear and not cache_uploads.es_parquet(ruta):
+            ruta = await en_proceso(cache_uploads.registrar, ruta, digest) or ruta
+        elif ruta is None and parsear:
+            ruta = await en_proceso(cache_uploads.registrar, temporal, digest)
+        elif ruta is None:
+            ruta = await en_hilo_parseo(cache_uploads.guardar_original, temporal, digest)
+        if ruta is None:
+            # Demasiado grande para la caché: se trabaja sobre el temporal
+            yield None, temporal
+        else:
+            yield digest, ruta
+    finally:
+        borrar_temporal(temporal)
 
-# ==========================================
-# CONFIGURACIÓN DE COLUMNAS ESPERADAS
-# ==========================================
-COLUMNAS_REQUERIDAS = {
-    'marca': {'requerida': True, 'tipo': str},
-    'modelo': {'requerida': True, 'tipo': str},
-    'anio': {'requerida': True, 'tipo': int},
-    'kilometraje': {'requerida': True, 'tipo': int},
-    'tipo_combustible': {'requerida': True, 'tipo': str},
-    'caballos': {'requerida': True, 'tipo': int},
-    'torque': {'requerida': True, 'tipo': int},
-    'segmento': {'requerida': True, 'tipo': str}
-}
+@asynccontextmanager
+async def sesion_de_carga():
+    """
+    Sesión síncrona para los INSERT por lotes de las cargas. Se usa solo a
+    través de en_hilo_db, como en los trabajos: EXCEL_HILOS_DB limita cuántos
+    hilos ocupan las cargas en ambos modos de base de datos.
+    """
+    sesion = SessionLocal()
+    try:
+        yield sesion
+    finally:
+        await en_hilo_db(sesion.close)
 
 # ==========================================
 # ENDPOINT 1: VALIDAR COLUMNAS
 # ==========================================
 @router.post("/validar")
-async def validar_excel(file: UploadFile = File(...)):
+async def validar_excel(
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None)
+):
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-        columnas_archivo = set(df.columns)
+        # Solo encabezados y la dimensión de la hoja (como /cargar): el archivo
+        # se parsea una sola vez, recién en preview o al cargar
+        async with resolver_upload(file, upload_id, parsear=False) as (upload_id, ruta):
+            columnas = await en_hilo_parseo(leer_encabezados, ruta)
+            total_filas = await en_hilo_parseo(estimar_filas, ruta)
+        columnas_archivo = set(columnas)
         validaciones = []
         todas_validas = True
 
@@ -120,9 +152,12 @@ async def validar_excel(file: UploadFile = File(...)):
         return {
             'valido': todas_validas,
             'validaciones': validaciones,
-            'total_columnas': len(df.columns),
-            'total_filas': len(df)
+            'total_columnas': len(columnas),
+            'total_filas': total_filas,
+            'upload_id': upload_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=400, content={'error': f'Error al leer archivo: {str(e)}'})
 
@@ -130,18 +165,21 @@ async def validar_excel(file: UploadFile = File(...)):
 # ENDPOINT 2: PREVIEW DE DATOS
 # ==========================================
 @router.post("/preview")
-async def preview_excel(file: UploadFile = File(...)):
+async def preview_excel(
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None)
+):
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-        preview_df = df.head(10)
-        preview_data = preview_df.to_dict('records')
+        async with resolver_upload(file, upload_id) as (upload_id, ruta):
+            columnas, preview_data, total = await en_hilo_parseo(leer_preview, ruta, 10)
         return {
-            'columnas': list(df.columns),
+            'columnas': columnas,
             'filas': preview_data,
-            'total_registros': len(df)
+            'total_registros': total,
+            'upload_id': upload_id
         }
+    except HTTPException:
+        raise
     except Exception as e:
         return JSONResponse(status_code=400, content={'error': f'Error al generar preview: {str(e)}'})
 
@@ -150,83 +188,70 @@ async def preview_excel(file: UploadFile = File(...)):
 # ==========================================
 @router.post("/cargar")
 async def cargar_excel(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
     session_id: str = Form(...),
-    db: Session = Depends(get_db)
+    _turno: None = Depends(turno_de_carga)
 ):
     exitosos = 0
     fallidos = 0
+    procesados = 0
     errores = []
+    total_errores = 0
+    lotes = []
     
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
-        total_registros = len(df)
-        
-        await manager.send_message(session_id, {
-            'tipo': 'progreso',
-            'progreso': 0,
-            'mensaje': f'Iniciando carga de {total_registros} registros...'
-        })
-        
-        for idx, row in df.iterrows():
-            try:
-                if pd.isna(row.get('marca')) or pd.isna(row.get('modelo')):
-                    raise ValueError("Marca o modelo faltante")
-                
-                vehiculo = Vehiculo(
-                    marca=str(row['marca']).strip(),
-                    modelo=str(row['modelo']).strip(),
-                    anio=int(row['anio']) if pd.notna(row.get('anio')) else None,
-                    kilometraje=int(row['kilometraje']) if pd.notna(row.get('kilometraje')) else None,
-                    tipo_combustible=str(row['tipo_combustible']).strip() if pd.notna(row.get('tipo_combustible')) else None,
-                    caballos=int(row['caballos']) if pd.notna(row.get('caballos')) else None,
-                    torque=int(row['torque']) if pd.notna(row.get('torque')) else None,
-                    segmento=str(row['segmento']).strip() if pd.notna(row.get('segmento')) else None
-                )
-                
-                db.add(vehiculo)
-                exitosos += 1
-                
-                if (idx + 1) % 10 == 0:
-                    progreso = int(((idx + 1) / total_registros) * 100)
-                    await manager.send_message(session_id, {
-                        'tipo': 'progreso',
-                        'progreso': progreso,
-                        'mensaje': f'Procesando... {idx + 1}/{total_registros}',
-                        'exitosos': exitosos,
-                        'fallidos': fallidos
-                    })
-                    db.commit()
-                
-            except Exception as e:
-                fallidos += 1
-                error_msg = f"Fila {idx + 1}: {str(e)}"
-                errores.append(error_msg)
-                print(error_msg)
-                db.rollback()
-        
-        db.commit()
+        async with resolver_upload(file, upload_id) as (upload_id, ruta), sesion_de_carga() as sesion:
+            total_estimado = await en_hilo_parseo(estimar_filas, ruta)
+
+            bus_progreso.publicar(session_id, {
+                'tipo': 'progreso',
+                'progreso': 0,
+                'mensaje': f'Iniciando carga de {total_estimado if total_estimado is not None else "?"} registros...'
+            })
+
+            async for lote in leer_lotes_async(ruta):
+                preparado = await en_hilo_parseo(preparar_lote, lote)
+                conteos, errores_lote = await en_hilo_db(guardar_lote, sesion, lote, None, preparado)
+                acumular_errores(errores, errores_lote)
+                total_errores += len(errores_lote)
+                guardados = sum(conteos)
+                lotes.extend(conteos)
+                exitosos += guardados
+                fallidos += len(lote) - guardados
+                procesados += len(lote)
+
+                progreso = min(99, int(procesados / total_estimado * 100)) if total_estimado else 0
+                bus_progreso.publicar(session_id, {
+                    'tipo': 'progreso',
+                    'progreso': progreso,
+                    'mensaje': f'Procesando... {procesados}/{total_estimado or "?"}',
+                    'exitosos': exitosos,
+                    'fallidos': fallidos
+                })
         
-        await manager.send_message(session_id, {
+        bus_progreso.publicar(session_id, {
             'tipo': 'completado',
             'progreso': 100,
             'mensaje': 'Carga completada',
-            'total': total_registros,
+            'total': procesados,
             'exitosos': exitosos,
             'fallidos': fallidos
         })
         
         return {
-            'total': total_registros,
+            'total': procesados,
             'exitosos': exitosos,
             'fallidos': fallidos,
-            'errores': errores[:50]
+            'lotes': lotes,
+            'errores': formatear_errores(errores, 50),
+            'errores_detalle': errores,
+            'total_errores': total_errores
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
-        await manager.send_message(session_id, {'tipo': 'error', 'mensaje': str(e)})
+        bus_progreso.publicar(session_id, {'tipo': 'error', 'mensaje': str(e)})
         return JSONResponse(status_code=500, content={'error': f'Error en carga: {str(e)}'})
 
 # ==========================================
@@ -234,56 +259,103 @@ async def cargar_excel(
 # ==========================================
 @router.post("/cargar_directo")
 async def cargar_excel_directo(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
     sessionId: str = Form(None),  # ← Hacerlo opcional
-    db: Session = Depends(get_db)
+    _turno: None = Depends(turno_de_carga)
 ):
     exitosos = 0
+    fallidos = 0
     errores = []
+    total_errores = 0
+    lotes = []
 
     try:
-        contents = await file.read()
-        df = pd.read_excel(io.BytesIO(contents))
-        df.columns = df.columns.str.lower().str.strip().str.replace(' ', '_')
+        async with resolver_upload(file, upload_id) as (upload_id, ruta), sesion_de_carga() as sesion:
+            columnas = set(await en_hilo_parseo(leer_encabezados, ruta))
 
-        columnas_requeridas = {"marca", "modelo", "anio", "kilometraje", "tipo_combustible", "caballos", "torque", "segmento"}
-        if not columnas_requeridas.issubset(df.columns):
-            faltantes = columnas_requeridas - set(df.columns)
-            return JSONResponse(status_code=400, content={"error": f"Columnas faltantes: {', '.join(faltantes)}"})
+            columnas_requeridas = set(COLUMNAS_REQUERIDAS.keys())
+            if not columnas_requeridas.issubset(columnas):
+                faltantes = columnas_requeridas - columnas
+                return JSONResponse(status_code=400, content={"error": f"Columnas faltantes: {', '.join(faltantes)}"})
 
-        for _, row in df.iterrows():
-            try:
-                vehiculo = Vehiculo(
-                    marca=str(row["marca"]).strip(),
-                    modelo=str(row["modelo"]).strip(),
-                    anio=int(row["anio"]) if pd.notna(row["anio"]) else None,
-                    kilometraje=int(row["kilometraje"]) if pd.notna(row["kilometraje"]) else None,
-                    tipo_combustible=str(row["tipo_combustible"]).strip() if pd.notna(row["tipo_combustible"]) else None,
-                    caballos=int(row["caballos"]) if pd.notna(row["caballos"]) else None,
-                    torque=int(row["torque"]) if pd.notna(row["torque"]) else None,
-                    segmento=str(row["segmento"]).strip() if pd.notna(row["segmento"]) else None
-                )
-                db.add(vehiculo)
-                exitosos += 1
-            except Exception as e:
-                errores.append(str(e))
-                
-        db.commit()
+            async for lote in leer_lotes_async(ruta):
+                preparado = await en_hilo_parseo(preparar_lote, lote)
+                conteos, errores_lote = await en_hilo_db(guardar_lote, sesion, lote, None, preparado)
+                acumular_errores(errores, errores_lote)
+                total_errores += len(errores_lote)
+                lotes.extend(conteos)
+                exitosos += sum(conteos)
+                fallidos += len(lote) - sum(conteos)
 
-        return {"mensaje": f"✅ {exitosos} registros guardados correctamente.", "exitosos": exitosos, "fallidos": len(errores), "errores": errores[:10]}
+        return {
+            "mensaje": f"✅ {exitosos} registros guardados correctamente.",
+            "exitosos": exitosos,
+            "fallidos": fallidos,
+            "lotes": lotes,
+            "errores": formatear_errores(errores, 10),
+            "errores_detalle": errores,
+            "total_errores": total_errores
+        }
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
         return JSONResponse(status_code=500, content={"error": f"Error al procesar el Excel: {str(e)}"})
+
+# ==========================================
+# ENDPOINT 3C: CARGA EN SEGUNDO PLANO (TRABAJOS)
+# ==========================================
+@router.post("/jobs", response_model=ImportJobResponse, status_code=202)
+async def crear_trabajo_importacion(
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = Form(None),
+    db: Sesion = Depends(get_db)
+):
+    """
+    Guarda el archivo y responde de inmediato con el id del trabajo.
+    El progreso se consulta en GET /excel/jobs/{id} o por WebSocket en
+    /excel/ws/{id}.
+    """
+    if upload_id:
+        async with resolver_upload(None, upload_id, parsear=False) as (_, ruta):
+            job = await trabajos.crear_trabajo(
+                db, ruta_origen=ruta, nombre_archivo=cache_uploads.nombre_archivo(upload_id)
+            )
+    elif file is not None:
+        job = await trabajos.crear_trabajo(db, file=file)
+    else:
+        raise HTTPException(status_code=400, detail="Debe enviar 'file' o 'upload_id'")
+    trabajos.lanzar_trabajo(job.id, bus_progreso.publicar)
+    return trabajos.serializar_trabajo(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobResponse)
+async def estado_trabajo_importacion(job_id: str, db: Sesion = Depends(get_db)):
+    job = await db.run_sync(trabajos.obtener_trabajo, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado")
+    return trabajos.serializar_trabajo(job)
+
+
+@router.post("/jobs/{job_id}/cancelar", response_model=ImportJobResponse)
+async def cancelar_trabajo_importacion(job_id: str, db: Sesion = Depends(get_db)):
+    if not await db.run_sync(trabajos.cancelar_trabajo, job_id):
+        job = await db.run_sync(trabajos.obtener_trabajo, job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail=f"Trabajo {job_id} no encontrado")
+        raise HTTPException(status_code=409, detail=f"El trabajo ya está {job.estado}")
+    return trabajos.serializar_trabajo(await db.run_sync(trabajos.obtener_trabajo, job_id))
+
 # ==========================================
 # ENDPOINT 4: LISTAR DATOS CARGADOS
 # ==========================================
 @router.get("/listar")
-async def listar_vehiculos(db: Session = Depends(get_db)):
+async def listar_vehiculos(db: Sesion = Depends(get_db)):
     """
     Devuelve todos los vehículos cargados desde la base de datos.
     """
     try:
-        vehiculos = db.query(Vehiculo).all()
+        vehiculos = (await db.scalars(select(Vehiculo))).all()
         data = [
             {
                 "id": v.id,
@@ -306,14 +378,15 @@ async def listar_vehiculos(db: Session = Depends(get_db)):
 # ENDPOINT 5: LIMPIAR TABLA VEHICULOS
 # ==========================================
 @router.delete("/limpiar")
-async def limpiar_tabla(db: Session = Depends(get_db)):
+async def limpiar_tabla(db: Sesion = Depends(get_db)):
     """
     Elimina todos los registros de la tabla vehículos (solo para pruebas).
     """
     try:
-        db.query(Vehiculo).delete()
-        db.commit()
+        await db.execute(delete(Vehiculo))
+        await db.commit()
+        notificar_cambio("vehiculos", "eliminar")
         return {"mensaje": "Tabla de vehículos vaciada correctamente"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -1,28 +1,38 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy import select
+from app.database import get_db, Sesion
 from app.models import Mecanico
 from app.schemas import MecanicoCreate, MecanicoResponse
+from app.eventos import notificar_cambio
+from app.respuestas import acepta_ndjson, respuesta_lista, serializar_lista
+from app.cache_http import respuesta_en_cache
 from typing import List
 
 router = APIRouter(prefix="/mecanicos", tags=["Mecánicos"])
 
-# Dependencia para DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/", response_model=List[MecanicoResponse])
-def obtener_mecanicos(db: Session = Depends(get_db)):
-    return db.query(Mecanico).all()
+async def obtener_mecanicos(request: Request, db: Sesion = Depends(get_db)):
+    async def leer():
+        # Solo las columnas de MecanicoResponse, sin cargar objetos ORM
+        return [dict(f) for f in (await db.execute(
+            select(Mecanico.id, Mecanico.nombre, Mecanico.apellido).order_by(Mecanico.id)
+        )).mappings()]
+
+    if acepta_ndjson(request):
+        return respuesta_lista(request, await leer())
+
+    async def generar():
+        return serializar_lista(await leer(), MecanicoResponse), {}
+
+    # Sin escrituras de por medio: sin consulta ni serialización (o 304)
+    return await respuesta_en_cache(request, "mecanicos", generar)
 
 @router.post("/", response_model=MecanicoResponse)
-def crear_mecanico(m: MecanicoCreate, db: Session = Depends(get_db)):
-    nuevo = Mecanico(**m.dict())
+async def crear_mecanico(m: MecanicoCreate, db: Sesion = Depends(get_db)):
+    nuevo = Mecanico(**m.model_dump())
     db.add(nuevo)
-    db.commit()
-    db.refresh(nuevo)
-    return nuevo
+    await db.commit()
+    await db.refresh(nuevo)
+    respuesta = MecanicoResponse.model_validate(nuevo)
+    notificar_cambio("mecanicos", "crear", ids=[nuevo.id], filas=[respuesta.model_dump()])
+    return respuesta
@@ -1,45 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from app.database import get_db, Sesion
 from app.models import Vehiculo
-from app.schemas import VehiculoCreate, VehiculoResponse
-from typing import List
+from app.schemas import VehiculoCreate, VehiculoResponse, VehiculoParcial, EstadisticasResponse
+from app.estadisticas import obtener_estadisticas
+from app.eventos import notificar_cambio
+from app.respuestas import acepta_ndjson, respuesta_lista, serializar_lista
+from app.cache_http import respuesta_en_cache
+from app.exportacion import exportar
+from app import registro
+from typing import List, Optional
 
 router = APIRouter(prefix="/vehiculos", tags=["Vehículos"])
 
-# Dependencia para DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+log = registro.obtener("vehiculos")
+
+# ========================
+# PAGINACIÓN Y PROYECCIÓN
+# ========================
+LIMITE_POR_DEFECTO = 100
+LIMITE_MAXIMO = 1000
+CAMPOS_VEHICULO = {c.name: c for c in Vehiculo.__table__.columns}
+
+
+def columnas_solicitadas(fields: Optional[str]):
+    """Columnas a seleccionar según `fields`; el id siempre va (es el cursor)."""
+    if not fields:
+        return list(CAMPOS_VEHICULO.values())
+    nombres = [f.strip() for f in fields.split(",") if f.strip()]
+    desconocidos = [n for n in nombres if n not in CAMPOS_VEHICULO]
+    if desconocidos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos desconocidos: {', '.join(desconocidos)}. Válidos: {', '.join(CAMPOS_VEHICULO)}"
+        )
+    return [CAMPOS_VEHICULO["id"]] + [CAMPOS_VEHICULO[n] for n in dict.fromkeys(nombres) if n != "id"]
+
 
 # ✅ AMBAS RUTAS: con y sin barra final
-@router.get("", response_model=List[VehiculoResponse])
-@router.get("/", response_model=List[VehiculoResponse])
-def obtener_vehiculos(db: Session = Depends(get_db)):
-    """Obtiene todos los vehículos"""
+@router.get("", response_model=List[VehiculoParcial], response_model_exclude_unset=True)
+@router.get("/", response_model=List[VehiculoParcial], response_model_exclude_unset=True)
+async def obtener_vehiculos(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="id del último vehículo de la página anterior"),
+    limite: int = Query(LIMITE_POR_DEFECTO, ge=1, le=LIMITE_MAXIMO),
+    marca: Optional[str] = None,
+    segmento: Optional[str] = None,
+    tipo_combustible: Optional[str] = None,
+    anio_min: Optional[int] = None,
+    anio_max: Optional[int] = None,
+    kilometraje_min: Optional[int] = None,
+    kilometraje_max: Optional[int] = None,
+    caballos_min: Optional[int] = None,
+    caballos_max: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Campos separados por coma, p. ej. id,marca,modelo"),
+    db: Sesion = Depends(get_db)
+):
+    """
+    Lista vehículos paginando por id (keyset). Si hay más resultados, el
+    cursor de la siguiente página viene en la cabecera X-Siguiente-Cursor.
+    Responde con ETag y 304 si el cliente ya tiene los datos.
+    Con Accept: application/x-ndjson responde una fila por línea.
+    """
+    consulta = select(*columnas_solicitadas(fields)).order_by(Vehiculo.id).limit(limite + 1)
+
+    if cursor is not None:
+        consulta = consulta.where(Vehiculo.id > cursor)
+    if marca:
+        consulta = consulta.where(Vehiculo.marca == marca)
+    if segmento:
+        consulta = consulta.where(Vehiculo.segmento == segmento)
+    if tipo_combustible:
+        consulta = consulta.where(Vehiculo.tipo_combustible == tipo_combustible)
+    if anio_min is not None:
+        consulta = consulta.where(Vehiculo.anio >= anio_min)
+    if anio_max is not None:
+        consulta = consulta.where(Vehiculo.anio <= anio_max)
+    if kilometraje_min is not None:
+        consulta = consulta.where(Vehiculo.kilometraje >= kilometraje_min)
+    if kilometraje_max is not None:
+        consulta = consulta.where(Vehiculo.kilometraje <= kilometraje_max)
+    if caballos_min is not None:
+        consulta = consulta.where(Vehiculo.caballos >= caballos_min)
+    if caballos_max is not None:
+        consulta = consulta.where(Vehiculo.caballos <= caballos_max)
+
+    async def leer_pagina():
+        try:
+            filas = (await db.execute(consulta)).mappings().all()
+        except Exception as e:
+            log.exception("Error al obtener vehículos")
+            raise HTTPException(status_code=500, detail=f"Error al obtener vehículos: {str(e)}")
+
+        cabeceras = {}
+        if len(filas) > limite:
+            filas = filas[:limite]
+            cabeceras["X-Siguiente-Cursor"] = str(filas[-1]["id"])
+        log.debug("Vehículos listados", extra={"cantidad": len(filas)})
+        # Las columnas seleccionadas son exactamente los campos de la respuesta
+        return [dict(f) for f in filas], cabeceras
+
+    if acepta_ndjson(request):
+        return respuesta_lista(request, *await leer_pagina())
+
+    async def generar():
+        filas, cabeceras = await leer_pagina()
+        return serializar_lista(filas, VehiculoParcial), cabeceras
+
+    # Mientras no haya escrituras, la misma consulta se responde sin ir a
+    # la base (y con 304 si el cliente ya tiene ese ETag)
+    return await respuesta_en_cache(request, "vehiculos", generar)
+
+@router.get("/export")
+async def exportar_vehiculos(
+    formato: str = Query("ndjson", alias="format", description="ndjson, csv o xlsx")
+):
+    """
+    Exporta todos los vehículos ordenados por id, leyendo con un cursor del
+    servidor: la memoria no crece con el tamaño de la flota.
+    """
+    consulta = select(*CAMPOS_VEHICULO.values()).order_by(Vehiculo.id)
+    log.info("Exportando vehículos", extra={"formato": formato})
+    return await exportar(consulta, formato, "vehiculos")
+
+@router.get("/estadisticas", response_model=EstadisticasResponse)
+async def estadisticas_vehiculos(db: Sesion = Depends(get_db)):
+    """
+    Conteos por segmento, combustible, marca y año, y mínimo/promedio/máximo
+    de caballos, kilometraje y torque, calculados en la base de datos.
+    """
     try:
-        vehiculos = db.query(Vehiculo).all()
-        print(f"✅ Listados {len(vehiculos)} vehículos")
-        return vehiculos
+        return await db.run_sync(obtener_estadisticas)
     except Exception as e:
-        print(f"❌ Error al obtener vehículos: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error al obtener vehículos: {str(e)}")
+        log.exception("Error al calcular estadísticas")
+        raise HTTPException(status_code=500, detail=f"Error al calcular estadísticas: {str(e)}")
 
 @router.post("", response_model=VehiculoResponse)
 @router.post("/", response_model=VehiculoResponse)
-def crear_vehiculo(v: VehiculoCreate, db: Session = Depends(get_db)):
+async def crear_vehiculo(v: VehiculoCreate, db: Sesion = Depends(get_db)):
     """Crea un nuevo vehículo"""
     try:
-        nuevo = Vehiculo(**v.dict())
+        nuevo = Vehiculo(**v.model_dump())
         db.add(nuevo)
-        db.commit()
-        db.refresh(nuevo)
-        print(f"✅ Vehículo creado: {nuevo.marca} {nuevo.modelo}")
-        return nuevo
+        await db.commit()
+        await db.refresh(nuevo)
+        respuesta = VehiculoResponse.model_validate(nuevo)
+        notificar_cambio("vehiculos", "crear", ids=[nuevo.id], filas=[respuesta.model_dump()])
+        log.info("Vehículo creado", extra={"vehiculo_id": nuevo.id})
+        return respuesta
     except Exception as e:
-        db.rollback()
-        print(f"❌ Error al crear vehículo: {str(e)}")
+        await db.rollback()
+        log.exception("Error al crear vehículo")
         raise HTTPException(status_code=500, detail=f"Error al crear vehículo: {str(e)}")
\ No newline at end of file
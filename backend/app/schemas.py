@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+from app.unidades import a_entero
+
 # ========================
 # VEHICULOS
 # ========================
@@ -9,36 +11,81 @@ class VehiculoCreate(BaseModel):
     marca: str
     modelo: str
     anio: Optional[int] = None  # ✅ OPCIONAL - puede ser None
-    kilometraje: str
+    kilometraje: int  # km
     tipo_combustible: str
-    caballos: str
-    torque: str
+    caballos: int  # hp
+    torque: int  # Nm
     segmento: str
 
+    # Acepta "0 km", "1050 Nm", "120.000", etc. y guarda solo el número
+    @field_validator("kilometraje", "caballos", "torque", mode="before")
+    @classmethod
+    def normalizar_unidades(cls, valor):
+        return a_entero(valor)
+
 class VehiculoResponse(BaseModel):
     id: int
     marca: str
     modelo: str
     anio: Optional[int] = None  # ✅ OPCIONAL - puede ser None
-    kilometraje: str
+    kilometraje: int
     tipo_combustible: str
-    caballos: str
-    torque: str
+    caballos: int
+    torque: int
     segmento: str
 
-    class Config:
-        from_attributes = True  # ✅ CAMBIO: Pydantic V2 usa 'from_attributes' en vez de 'orm_mode'
+    model_config = ConfigDict(from_attributes=True)
+
+class VehiculoParcial(BaseModel):
+    """Vehículo con solo los campos pedidos en ?fields= (el resto se omite)"""
+    id: int
+    marca: Optional[str] = None
+    modelo: Optional[str] = None
+    anio: Optional[int] = None
+    kilometraje: Optional[int] = None
+    tipo_combustible: Optional[str] = None
+    caballos: Optional[int] = None
+    torque: Optional[int] = None
+    segmento: Optional[str] = None
 
 class VehiculoUpdate(BaseModel):
     marca: Optional[str] = None
     modelo: Optional[str] = None
     anio: Optional[int] = None
-    kilometraje: Optional[str] = None
+    kilometraje: Optional[int] = None
     tipo_combustible: Optional[str] = None
-    caballos: Optional[str] = None
-    torque: Optional[str] = None
+    caballos: Optional[int] = None
+    torque: Optional[int] = None
     segmento: Optional[str] = None
 
+    @field_validator("kilometraje", "caballos", "torque", mode="before")
+    @classmethod
+    def normalizar_unidades(cls, valor):
+        return a_entero(valor)
+
+class ConteoPorValor(BaseModel):
+    valor: Optional[str] = None
+    cantidad: int
+
+class ConteoPorAnio(BaseModel):
+    anio: Optional[int] = None
+    cantidad: int
+
+class ResumenNumerico(BaseModel):
+    minimo: Optional[int] = None
+    promedio: Optional[float] = None
+    maximo: Optional[int] = None
+
+class EstadisticasResponse(BaseModel):
+    total: int
+    por_segmento: List[ConteoPorValor]
+    por_tipo_combustible: List[ConteoPorValor]
+    por_marca: List[ConteoPorValor]
+    por_anio: List[ConteoPorAnio]
+    caballos: ResumenNumerico
+    kilometraje: ResumenNumerico
+    torque: ResumenNumerico
+
 # ========================
 # MECANICOS
 # ========================
@@ -51,8 +98,7 @@ class MecanicoResponse(BaseModel):
     nombre: str
     apellido: str
 
-    class Config:
-        from_attributes = True  # ✅ CAMBIO: Pydantic V2
+    model_config = ConfigDict(from_attributes=True)
 
 # ========================
 # ASIGNACIONES
@@ -73,5 +119,21 @@ class AsignacionResponse(BaseModel):
     fecha_asignacion: Optional[datetime]
     estado: str
 
-    class Config:
-        from_attributes = True  # ✅ CAMBIO: Pydantic V2
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# ========================
+# TRABAJOS DE IMPORTACIÓN
+# ========================
+class ImportJobResponse(BaseModel):
+    id: str
+    estado: str
+    nombre_archivo: Optional[str] = None
+    total_estimado: Optional[int] = None
+    procesados: int
+    exitosos: int
+    fallidos: int
+    progreso: int
+    mensaje: Optional[str] = None
+    errores: List[Dict[str, Any]] = []
+    creado: Optional[datetime] = None
+    actualizado: Optional[datetime] = None
@@ -0,0 +1,381 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from fastapi import UploadFile
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, Sesion
+from app.models import ImportJob
+from app.carga_masiva import guardar_lote, MAX_ERRORES_DETALLE
+from app.ejecucion import en_hilo_db, en_hilo_parseo, cupo_de_carga
+from app.ingesta import volcar_upload, borrar_temporal, leer_lotes_async, estimar_filas
+from app import registro
+
+log = registro.obtener("trabajos")
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+# Carpeta donde se guardan los archivos mientras su trabajo no termina.
+# Debe sobrevivir a reinicios para poder reanudar (volumen en Docker).
+DIRECTORIO_TRABAJOS = os.getenv(
+    "EXCEL_DIR_TRABAJOS",
+    os.path.join(tempfile.gettempdir(), "import_jobs")
+)
+# Un trabajo "procesando" sin actualizarse en este tiempo se considera
+# abandonado por un worker caído y otro puede reclamarlo (incluido el mismo
+# worker reiniciado, que vuelve con otro pid)
+SEGUNDOS_ABANDONO = int(os.getenv("EXCEL_SEGUNDOS_ABANDONO", "120"))
+# Cada cuánto cada worker renueva el "actualizado" de sus trabajos en curso
+# y busca trabajos abandonados. Debe ser bastante menor que SEGUNDOS_ABANDONO.
+SEGUNDOS_REVISION = int(os.getenv("EXCEL_SEGUNDOS_REVISION", "30"))
+
+INSTANCIA = f"{socket.gethostname()}-{os.getpid()}"
+
+ESTADOS_FINALES = {"completado", "cancelado", "error"}
+
+# Publica un mensaje de progreso sin bloquear (BusProgreso.publicar)
+Notificador = Callable[[str, Dict[str, Any]], None]
+
+# Tareas asyncio de los trabajos que corren en este worker
+_tareas: Dict[str, asyncio.Task] = {}
+# Bucle de latido y reclamo (iniciar_vigilancia)
+_vigilancia: Optional[asyncio.Task] = None
+
+
+class TrabajoReclamado(Exception):
+    """Otro worker tomó el trabajo; este debe dejar de procesarlo."""
+
+
+# ==========================================
+# SERIALIZACIÓN
+# ==========================================
+def serializar_trabajo(job: ImportJob) -> Dict[str, Any]:
+    if job.estado == "completado":
+        progreso = 100
+    elif job.total_estimado:
+        progreso = min(99, int(job.procesados / job.total_estimado * 100))
+    else:
+        progreso = 0
+
+    return {
+        "id": job.id,
+        "estado": job.estado,
+        "nombre_archivo": job.nombre_archivo,
+        "total_estimado": job.total_estimado,
+        "procesados": job.procesados,
+        "exitosos": job.exitosos,
+        "fallidos": job.fallidos,
+        "progreso": progreso,
+        "mensaje": job.mensaje,
+        "errores": json.loads(job.errores) if job.errores else [],
+        "creado": job.creado,
+        "actualizado": job.actualizado
+    }
+
+
+# ==========================================
+# CREACIÓN Y CONSULTA
+# ==========================================
+async def crear_trabajo(
+    db: Sesion,
+    file: Optional[UploadFile] = None,
+    ruta_origen: Optional[str] = None,
+    nombre_archivo: Optional[str] = None
+) -> ImportJob:
+    """
+    Crea el trabajo a partir de un upload o de una entrada de la caché de
+    uploads (el original guardado por /validar o el Parquet); en ese caso
+    `nombre_archivo` es el nombre con que se subió. La entrada se copia,
+    porque la caché puede desalojarla antes de que el trabajo termine.
+    """
+    os.makedirs(DIRECTORIO_TRABAJOS, exist_ok=True)
+    if file is not None:
+        ruta = await volcar_upload(file, directorio=DIRECTORIO_TRABAJOS)
+        nombre = file.filename
+    else:
+        nombre = nombre_archivo or os.path.basename(ruta_origen)
+        ruta = os.path.join(DIRECTORIO_TRABAJOS, f"{uuid.uuid4()}{os.path.splitext(ruta_origen)[1]}")
+        await en_hilo_parseo(shutil.copyfile, ruta_origen, ruta)
+
+    job = ImportJob(
+        id=str(uuid.uuid4()),
+        estado="pendiente",
+        nombre_archivo=nombre,
+        ruta_archivo=ruta,
+        worker=INSTANCIA,
+        errores="[]"
+    )
+
+    try:
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+    except Exception:
+        borrar_temporal(ruta)
+        raise
+    return job
+
+
+def obtener_trabajo(db: Session, job_id: str) -> Optional[ImportJob]:
+    return db.query(ImportJob).filter(ImportJob.id == job_id).first()
+
+
+def cancelar_trabajo(db: Session, job_id: str) -> bool:
+    """
+    Marca el trabajo como cancelado. El worker que lo procesa lo detecta
+    antes del siguiente lote; lo ya confirmado queda en la base de datos.
+    """
+    resultado = db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.estado.in_(["pendiente", "procesando"]))
+        .values(estado="cancelado", mensaje="Cancelado por el usuario", actualizado=datetime.utcnow())
+    )
+    db.commit()
+    return resultado.rowcount == 1
+
+
+# ==========================================
+# PROCESAMIENTO EN SEGUNDO PLANO
+# ==========================================
+def lanzar_trabajo(job_id: str, notificar: Optional[Notificador] = None):
+    if job_id in _tareas and not _tareas[job_id].done():
+        return
+    tarea = asyncio.create_task(procesar_trabajo(job_id, notificar))
+    _tareas[job_id] = tarea
+    tarea.add_done_callback(lambda _: _tareas.pop(job_id, None))
+
+
+def _registrar_avance(job: ImportJob, filas_lote: int, errores_previos: List[Dict[str, Any]]):
+    """Construye el callback que guarda el checkpoint en la misma transacción del lote."""
+    def registrar(db: Session, guardados: int, errores: pd.DataFrame):
+        faltan = MAX_ERRORES_DETALLE - len(errores_previos)
+        nuevos = errores.head(faltan).to_dict('records') if faltan > 0 else []
+        resultado = db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job.id, ImportJob.worker == INSTANCIA)
+            .values(
+                procesados=ImportJob.procesados + filas_lote,
+                exitosos=ImportJob.exitosos + guardados,
+                fallidos=ImportJob.fallidos + (filas_lote - guardados),
+                errores=json.dumps(errores_previos + nuevos, default=str),
+                actualizado=datetime.utcnow()
+            )
+        )
+        if resultado.rowcount != 1:
+            # Se lanza antes del commit: el lote se descarta junto con el checkpoint
+            raise TrabajoReclamado(job.id)
+        errores_previos.extend(nuevos)
+    return registrar
+
+
+def _iniciar(db: Session, job_id: str) -> bool:
+    resultado = db.execute(
+        update(ImportJob)
+        .where(
+            ImportJob.id == job_id,
+            ImportJob.worker == INSTANCIA,
+            ImportJob.estado.in_(["pendiente", "procesando"])
+        )
+        .values(estado="procesando", actualizado=datetime.utcnow())
+    )
+    db.commit()
+    return resultado.rowcount == 1
+
+
+async def procesar_trabajo(job_id: str, notificar: Optional[Notificador] = None):
+    """
+    Procesa un trabajo lote a lote. Si el trabajo ya tenía filas confirmadas
+    (reanudación tras un reinicio), esas filas se leen pero no se vuelven a
+    insertar. El punto de reanudación es `procesados`, una cantidad de filas:
+    no depende de EXCEL_TAMANO_LOTE, que puede cambiar entre reinicios.
+    """
+    def avisar(mensaje: Dict[str, Any]):
+        if notificar:
+            notificar(job_id, mensaje)
+
+    db = SessionLocal()
+    try:
+        job = await en_hilo_db(obtener_trabajo, db, job_id)
+        if job is None:
+            return
+        if job.estado in ESTADOS_FINALES:
+            borrar_temporal(job.ruta_archivo)
+            return
+
+        async with cupo_de_carga():
+            if not await en_hilo_db(_iniciar, db, job_id):
+                return
+            await en_hilo_db(db.refresh, job)
+            if job.total_estimado is None:
+                job.total_estimado = await en_hilo_parseo(estimar_filas, job.ruta_archivo)
+                await en_hilo_db(db.commit)
+
+            errores_previos = json.loads(job.errores) if job.errores else []
+            por_saltar = job.procesados
+
+            async for lote in leer_lotes_async(job.ruta_archivo):
+                if por_saltar >= len(lote):
+                    por_saltar -= len(lote)
+                    continue
+                if por_saltar:
+                    lote = lote.iloc[por_saltar:]
+                    por_saltar = 0
+
+                await en_hilo_db(db.refresh, job)
+                if job.estado == "cancelado":
+                    avisar({'tipo': 'cancelado', 'mensaje': job.mensaje})
+                    break
+
+                await en_hilo_db(
+                    guardar_lote, db, lote,
+                    _registrar_avance(job, len(lote), errores_previos)
+                )
+                await en_hilo_db(db.refresh, job)
+                datos = serializar_trabajo(job)
+                avisar({
+                    'tipo': 'progreso',
+                    'progreso': datos['progreso'],
+                    'mensaje': f'Procesando... {job.procesados}/{job.total_estimado or "?"}',
+                    'exitosos': job.exitosos,
+                    'fallidos': job.fallidos
+                })
+            else:
+                job.estado = "completado"
+                job.mensaje = "Carga completada"
+                await en_hilo_db(db.commit)
+                avisar({
+                    'tipo': 'completado',
+                    'progreso': 100,
+                    'mensaje': job.mensaje,
+                    'total': job.procesados,
+                    'exitosos': job.exitosos,
+                    'fallidos': job.fallidos
+                })
+
+        borrar_temporal(job.ruta_archivo)
+    except asyncio.CancelledError:
+        # Apagado del worker: el trabajo queda "procesando" y se reanuda luego
+        raise
+    except TrabajoReclamado:
+        log.warning("Trabajo reclamado por otro worker; se deja de procesar aquí", extra={"job_id": job_id})
+    except Exception as e:
+        log.exception("Error en trabajo de importación", extra={"job_id": job_id})
+        await en_hilo_db(db.rollback)
+        await en_hilo_db(_marcar_error, db, job_id, str(e))
+        avisar({'tipo': 'error', 'mensaje': str(e)})
+    finally:
+        await en_hilo_db(db.close)
+
+
+def _marcar_error(db: Session, job_id: str, mensaje: str):
+    db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id)
+        .values(estado="error", mensaje=mensaje[:500], actualizado=datetime.utcnow())
+    )
+    db.commit()
+
+
+# ==========================================
+# REANUDACIÓN Y LATIDO
+# ==========================================
+def _reclamar_pendientes() -> List[str]:
+    """
+    Reclama para este worker los trabajos sin terminar cuyo dueño dejó de
+    actualizarlos. El UPDATE condicional evita que dos workers tomen el mismo.
+    """
+    limite = datetime.utcnow() - timedelta(seconds=SEGUNDOS_ABANDONO)
+    db = SessionLocal()
+    try:
+        candidatos = db.query(ImportJob.id).filter(
+            ImportJob.estado.in_(["pendiente", "procesando"])
+        ).all()
+        reclamados = []
+        for (job_id,) in candidatos:
+            resultado = db.execute(
+                update(ImportJob)
+                .where(
+                    ImportJob.id == job_id,
+                    ImportJob.estado.in_(["pendiente", "procesando"]),
+                    (ImportJob.worker == INSTANCIA) | (ImportJob.actualizado < limite)
+                )
+                .values(worker=INSTANCIA, actualizado=datetime.utcnow())
+            )
+            db.commit()
+            if resultado.rowcount == 1:
+                reclamados.append(job_id)
+        return reclamados
+    finally:
+        db.close()
+
+
+def _latido(job_ids: List[str]):
+    """Renueva "actualizado" de los trabajos de este worker: siguen vivos aunque un lote tarde."""
+    if not job_ids:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id.in_(job_ids),
+                ImportJob.worker == INSTANCIA,
+                ImportJob.estado.in_(["pendiente", "procesando"])
+            )
+            .values(actualizado=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def reanudar_trabajos(notificar: Optional[Notificador] = None) -> List[str]:
+    reclamados = await en_hilo_db(_reclamar_pendientes)
+    for job_id in reclamados:
+        if job_id in _tareas:
+            continue
+        log.info("Reanudando trabajo de importación", extra={"job_id": job_id})
+        lanzar_trabajo(job_id, notificar)
+    return reclamados
+
+
+async def _vigilar(notificar: Optional[Notificador]):
+    while True:
+        await asyncio.sleep(SEGUNDOS_REVISION)
+        try:
+            await en_hilo_db(_latido, list(_tareas))
+            await reanudar_trabajos(notificar)
+        except Exception:
+            # Base caída un momento: se reintenta en la siguiente vuelta
+            log.exception("Falló la revisión de trabajos de importación")
+
+
+async def iniciar_vigilancia(notificar: Optional[Notificador] = None):
+    """
+    Reanuda los trabajos pendientes y deja un bucle que, cada
+    SEGUNDOS_REVISION, marca como vivos los trabajos de este worker y reclama
+    los abandonados. Así un trabajo interrumpido se retoma aunque ningún
+    worker vuelva a arrancar (p. ej. el reiniciado volvió antes de
+    SEGUNDOS_ABANDONO y no lo vio como abandonado).
+    """
+    global _vigilancia
+    await reanudar_trabajos(notificar)
+    _vigilancia = asyncio.create_task(_vigilar(notificar))
+
+
+async def detener_vigilancia():
+    global _vigilancia
+    if _vigilancia is not None:
+        _vigilancia.cancel()
+        await asyncio.gather(_vigilancia, return_exceptions=True)
+        _vigilancia = None
@@ -0,0 +1,51 @@
+import math
+import re
+from typing import Any, Optional
+
+# ==========================================
+# NORMALIZACIÓN DE UNIDADES
+# ==========================================
+# kilometraje, caballos y torque se guardan como enteros sin unidad.
+# Se aceptan entradas como "0 km", "1050 Nm", "670 hp" o "120.000 km".
+PATRON_UNIDADES = r"(?i)\s*(?:km|kms|kilometros|kilómetros|nm|n·m|n\.m|hp|cv|caballos)\.?\s*$"
+# 1.050 / 120,000 / 1.200.000: separadores de miles (los valores son enteros)
+PATRON_MILES = r"^-?\d{1,3}(?:[.,]\d{3})+$"
+
+_unidades = re.compile(PATRON_UNIDADES)
+_miles = re.compile(PATRON_MILES)
+
+
+def normalizar_texto_numerico(texto: str) -> str:
+    """Quita la unidad y los separadores de miles; deja la coma decimal como punto."""
+    texto = _unidades.sub("", texto.strip()).strip()
+    if _miles.match(texto):
+        return texto.replace(".", "").replace(",", "")
+    return texto.replace(",", ".")
+
+
+def a_entero(valor: Any) -> Optional[int]:
+    """
+    Convierte un valor con o sin unidad a entero (trunca decimales como int()).
+    None o texto vacío devuelven None; un texto no numérico lanza ValueError.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        raise ValueError(f"Valor no numérico: {valor}")
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, float):
+        if not math.isfinite(valor):
+            raise ValueError(f"Valor no numérico: {valor}")
+        return int(valor)
+
+    texto = normalizar_texto_numerico(str(valor))
+    if texto == "":
+        return None
+    try:
+        numero = float(texto)
+    except ValueError:
+        raise ValueError(f"Valor no numérico: {valor}")
+    if not math.isfinite(numero):
+        raise ValueError(f"Valor no numérico: {valor}")
+    return int(numero)
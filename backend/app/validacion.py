@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.unidades import PATRON_UNIDADES, PATRON_MILES
+
+# ==========================================
+# CONFIGURACIÓN DE COLUMNAS ESPERADAS
+# ==========================================
+# 'requerida': la columna debe existir en el archivo
+# 'nulos': la celda puede venir vacía
+COLUMNAS_REQUERIDAS = {
+    'marca': {'requerida': True, 'tipo': str},
+    'modelo': {'requerida': True, 'tipo': str},
+    'anio': {'requerida': True, 'tipo': int, 'nulos': True},
+    'kilometraje': {'requerida': True, 'tipo': int},
+    'tipo_combustible': {'requerida': True, 'tipo': str},
+    'caballos': {'requerida': True, 'tipo': int},
+    'torque': {'requerida': True, 'tipo': int},
+    'segmento': {'requerida': True, 'tipo': str}
+}
+
+COLUMNAS_ERRORES = ['fila', 'columna', 'motivo']
+
+
+# ==========================================
+# COERCIÓN POR COLUMNA
+# ==========================================
+def _como_texto(serie: pd.Series) -> pd.Series:
+    return serie.astype("string").str.strip()
+
+
+def _sin_unidades(texto: pd.Series) -> pd.Series:
+    """Versión vectorizada de unidades.normalizar_texto_numerico ("1.050 Nm" → "1050")."""
+    limpio = texto.str.replace(PATRON_UNIDADES, "", regex=True).str.strip()
+    miles = limpio.str.match(PATRON_MILES).fillna(False).astype(bool)
+    limpio = limpio.mask(miles, limpio.str.replace(r"[.,]", "", regex=True))
+    return limpio.str.replace(",", ".", regex=False)
+
+
+def _como_entero(texto: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Devuelve (enteros, máscara de valores no numéricos). Trunca decimales como int()."""
+    numeros = pd.to_numeric(_sin_unidades(texto), errors="coerce").astype(float)
+    numeros = numeros.where(np.isfinite(numeros))
+    invalidos = texto.notna() & (texto != "") & numeros.isna()
+    return pd.Series(np.trunc(numeros), index=texto.index).astype("Int64"), invalidos
+
+
+def _errores(indices: pd.Index, columna: str, motivos) -> pd.DataFrame:
+    return pd.DataFrame({
+        'fila': indices + 1,
+        'columna': columna,
+        'motivo': motivos
+    }, columns=COLUMNAS_ERRORES)
+
+
+# ==========================================
+# VALIDACIÓN DE UN LOTE
+# ==========================================
+def validar_lote(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Valida y convierte un lote columna por columna, sin recorrer filas.
+
+    Devuelve:
+      - validos: solo las filas válidas y solo las columnas de
+        COLUMNAS_REQUERIDAS, ya tipadas (Int64 / string)
+      - errores: tabla con columnas fila, columna y motivo. 'fila' usa la
+        misma numeración que el resto de la carga (índice del lote + 1)
+    """
+    convertidas = {}
+    tablas_error = []
+    fila_invalida = pd.Series(False, index=df.index)
+
+    for col, config in COLUMNAS_REQUERIDAS.items():
+        if col not in df.columns:
+            tablas_error.append(_errores(df.index, col, f"Columna '{col}' faltante"))
+            fila_invalida[:] = True
+            continue
+
+        texto = _como_texto(df[col])
+        vacios = texto.isna() | (texto == "")
+
+        if config['tipo'] is int:
+            valores, no_numericos = _como_entero(texto)
+            if no_numericos.any():
+                tablas_error.append(_errores(
+                    df.index[no_numericos.to_numpy()], col,
+                    ("Valor no numérico: " + texto[no_numericos]).to_numpy()
+                ))
+                fila_invalida |= no_numericos
+        else:
+            valores = texto.mask(vacios)
+
+        if not config.get('nulos', False) and vacios.any():
+            tablas_error.append(_errores(df.index[vacios.to_numpy()], col, f"Valor faltante en '{col}'"))
+            fila_invalida |= vacios
+
+        convertidas[col] = valores
+
+    validos = pd.DataFrame(convertidas, index=df.index)[~fila_invalida] if convertidas else df.iloc[0:0]
+    errores = (
+        pd.concat(tablas_error, ignore_index=True).sort_values(['fila', 'columna'], kind='stable')
+        if tablas_error else pd.DataFrame(columns=COLUMNAS_ERRORES)
+    )
+    return validos, errores
+
+
+def a_registros(validos: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convierte el lote validado a dicts con tipos de Python (NA → None) para el INSERT."""
+    return validos.astype(object).where(validos.notna(), None).to_dict('records')
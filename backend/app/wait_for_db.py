@@ -1,8 +1,12 @@
 import time
 import sys
-from sqlalchemy import create_engine
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
-from app.database import SQLALCHEMY_DATABASE_URL, Base, engine
+from app.database import engine
+from app.migraciones import aplicar_migraciones
+from app import registro
+
+log = registro.obtener("wait_for_db")
 
 def wait_for_db():
     max_retries = 30
@@ -10,17 +14,22 @@ def wait_for_db():
 
     for i in range(max_retries):
         try:
-            # Intentar crear las tablas
-            Base.metadata.create_all(bind=engine)
-            print("Base de datos inicializada correctamente")
+            with engine.connect() as conexion:
+                conexion.execute(text("SELECT 1"))
+            # Crear / actualizar el esquema con las migraciones
+            aplicar_migraciones()
+            log.info("Base de datos inicializada correctamente")
             return True
         except OperationalError as e:
-            print(f"Intento {i + 1}/{max_retries}: No se puede conectar a la base de datos. Reintentando en {retry_interval} segundos...")
+            log.warning(
+                "No se puede conectar a la base de datos; reintentando",
+                extra={"intento": i + 1, "max_intentos": max_retries, "espera_segundos": retry_interval}
+            )
             time.sleep(retry_interval)
     
-    print("No se pudo conectar a la base de datos después de varios intentos")
+    log.error("No se pudo conectar a la base de datos después de varios intentos")
     return False
 
 if __name__ == "__main__":
     if not wait_for_db():
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -0,0 +1,149 @@
+"""
+Generador de datos sintéticos para los benchmarks.
+
+Los datos son deterministas para una misma semilla, así dos corridas
+comparan exactamente la misma base (y suben exactamente los mismos archivos).
+"""
+import csv
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection
+
+from app.models import Vehiculo, Mecanico, Asignacion
+
+MARCAS = {
+    "Tesla": ["Model S", "Model 3", "Model Y"],
+    "Nissan": ["Leaf", "Versa", "Sentra"],
+    "Chevrolet": ["Bolt", "Onix", "Tracker"],
+    "BMW": ["i3", "X1", "Serie 3"],
+    "Audi": ["e-tron", "A3", "Q5"],
+    "Ford": ["Mustang Mach-E", "Ranger", "Escape"],
+    "Hyundai": ["Kona Electric", "Tucson", "Accent"],
+    "Kia": ["Soul EV", "Rio", "Sportage"],
+    "Toyota": ["Corolla", "Hilux", "RAV4"],
+    "Renault": ["Logan", "Duster", "Kwid"],
+}
+COMBUSTIBLES = ["Gasolina", "Diésel", "Eléctrico", "Híbrido", "Gas"]
+SEGMENTOS = ["Subcompacto", "Compacto", "Sedán", "SUV", "Pickup", "Premium"]
+ESTADOS = ["pendiente", "en_proceso", "completado"]
+NOMBRES = ["Juan", "Ana", "Luis", "María", "Carlos", "Sofía", "Andrés", "Paula", "Diego", "Camila"]
+APELLIDOS = ["Pérez", "Gómez", "Martínez", "Rodríguez", "López", "Hernández", "García", "Jiménez", "Santos", "Torres"]
+
+TAMANO_BLOQUE = 10000
+
+# Escalas predefinidas: (vehículos, mecánicos, asignaciones). Tres
+# asignaciones por vehículo y un mecánico cada ~500 vehículos.
+ESCALAS: Dict[str, Tuple[int, int, int]] = {
+    "1k": (1_000, 20, 3_000),
+    "100k": (100_000, 200, 300_000),
+    "1m": (1_000_000, 2_000, 3_000_000),
+}
+
+# Encabezados como los escribe un usuario; la ingesta los normaliza
+ENCABEZADOS_ARCHIVO = ["Marca", "Modelo", "Anio", "Kilometraje", "Tipo Combustible", "Caballos", "Torque", "Segmento"]
+
+
+def generar_vehiculos(n: int, semilla: int = 42) -> Iterator[Dict[str, Any]]:
+    azar = random.Random(semilla)
+    marcas = list(MARCAS)
+    for _ in range(n):
+        marca = azar.choice(marcas)
+        yield {
+            "marca": marca,
+            "modelo": azar.choice(MARCAS[marca]),
+            "anio": azar.randint(1995, 2025),
+            "kilometraje": azar.randint(0, 300000),
+            "tipo_combustible": azar.choice(COMBUSTIBLES),
+            "caballos": azar.randint(70, 700),
+            "torque": azar.randint(90, 1100),
+            "segmento": azar.choice(SEGMENTOS),
+        }
+
+
+def generar_mecanicos(n: int, semilla: int = 42) -> Iterator[Dict[str, Any]]:
+    azar = random.Random(semilla + 1)
+    for _ in range(n):
+        yield {"nombre": azar.choice(NOMBRES), "apellido": azar.choice(APELLIDOS)}
+
+
+def generar_asignaciones(n: int, total_vehiculos: int, total_mecanicos: int, semilla: int = 42) -> Iterator[Dict[str, Any]]:
+    azar = random.Random(semilla + 2)
+    inicio = datetime(2023, 1, 1)
+    for _ in range(n):
+        yield {
+            "id_vehiculo": azar.randint(1, total_vehiculos),
+            "id_mecanico": azar.randint(1, total_mecanicos),
+            "descripcion": "Revisión general",
+            "estado": azar.choice(ESTADOS),
+            "fecha_asignacion": inicio + timedelta(minutes=azar.randint(0, 60 * 24 * 900)),
+        }
+
+
+def insertar_en_bloques(conexion: Connection, tabla, filas: Iterator[Dict[str, Any]], tamano: int = TAMANO_BLOQUE) -> int:
+    """INSERT con executemany en bloques; no materializa todas las filas."""
+    total = 0
+    bloque: List[Dict[str, Any]] = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= tamano:
+            conexion.execute(insert(tabla), bloque)
+            total += len(bloque)
+            bloque = []
+    if bloque:
+        conexion.execute(insert(tabla), bloque)
+        total += len(bloque)
+    return total
+
+
+def poblar(conexion: Connection, vehiculos: int, mecanicos: int, asignaciones: int, semilla: int = 42) -> Dict[str, int]:
+    """Inserta el dataset completo; las asignaciones apuntan a ids 1..N."""
+    return {
+        "vehiculos": insertar_en_bloques(conexion, Vehiculo.__table__, generar_vehiculos(vehiculos, semilla)),
+        "mecanicos": insertar_en_bloques(conexion, Mecanico.__table__, generar_mecanicos(mecanicos, semilla)),
+        "asignaciones": insertar_en_bloques(
+            conexion, Asignacion.__table__,
+            generar_asignaciones(asignaciones, vehiculos, mecanicos, semilla)
+        ),
+    }
+
+
+# ==========================================
+# ARCHIVOS DE CARGA MASIVA
+# ==========================================
+def filas_archivo(n: int, semilla: int = 42, con_unidades: bool = False) -> Iterator[List[Any]]:
+    """
+    Filas para /excel/* en el orden de ENCABEZADOS_ARCHIVO. Con
+    `con_unidades` los números vienen como "120.000 km" o "350 Nm", que la
+    ingesta debe limpiar (el caso lento).
+    """
+    for v in generar_vehiculos(n, semilla):
+        if con_unidades:
+            yield [v["marca"], v["modelo"], v["anio"], f"{v['kilometraje']:,} km".replace(",", "."),
+                   v["tipo_combustible"], f"{v['caballos']} hp", f"{v['torque']} Nm", v["segmento"]]
+        else:
+            yield [v["marca"], v["modelo"], v["anio"], v["kilometraje"],
+                   v["tipo_combustible"], v["caballos"], v["torque"], v["segmento"]]
+
+
+def escribir_csv(ruta: str, n: int, semilla: int = 42, separador: str = ";", con_unidades: bool = False) -> str:
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo:
+        escritor = csv.writer(archivo, delimiter=separador)
+        escritor.writerow(ENCABEZADOS_ARCHIVO)
+        escritor.writerows(filas_archivo(n, semilla, con_unidades))
+    return ruta
+
+
+def escribir_xlsx(ruta: str, n: int, semilla: int = 42, con_unidades: bool = False) -> str:
+    from openpyxl import Workbook
+
+    # write_only: las filas se escriben a disco sin quedar en memoria
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("Vehiculos")
+    hoja.append(ENCABEZADOS_ARCHIVO)
+    for fila in filas_archivo(n, semilla, con_unidades):
+        hoja.append(fila)
+    libro.save(ruta)
+    return ruta
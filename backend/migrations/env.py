@@ -0,0 +1,58 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import Base
+
+config = context.config
+
+# Al ejecutarse desde la línea de comandos se configura el logging del .ini;
+# desde la app (app.migraciones) se respeta el logging de la app. Los loggers
+# "taller.*" (los usan las revisiones) no se desactivan
+if config.config_file_name is not None and not config.attributes.get("connection"):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Genera el SQL sin conectarse (alembic upgrade head --sql)."""
+    context.configure(
+        url=SQLALCHEMY_DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # app.migraciones pasa su propia conexión; la CLI crea una
+    conexion = config.attributes.get("connection")
+    if conexion is not None:
+        _ejecutar(conexion)
+        return
+
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    with engine.connect() as conexion:
+        _ejecutar(conexion)
+    engine.dispose()
+
+
+def _ejecutar(conexion) -> None:
+    context.configure(
+        connection=conexion,
+        target_metadata=target_metadata,
+        render_as_batch=conexion.dialect.name == "sqlite",  # ALTER TABLE en SQLite
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,85 @@
+"""Esquema inicial: vehiculos, mecanicos, asignaciones e import_jobs
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Las bases creadas antes con Base.metadata.create_all ya tienen estas tablas:
+solo se crean las que falten, así esta revisión sirve para ambos casos.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existentes = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "vehiculos" not in existentes:
+        op.create_table(
+            "vehiculos",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("marca", sa.String(100), nullable=False),
+            sa.Column("modelo", sa.String(100), nullable=False),
+            sa.Column("kilometraje", sa.String(50), nullable=False),
+            sa.Column("tipo_combustible", sa.String(50), nullable=False),
+            sa.Column("caballos", sa.String(50), nullable=False),
+            sa.Column("torque", sa.String(50), nullable=False),
+            sa.Column("segmento", sa.String(50), nullable=False),
+            sa.Column("anio", sa.Integer(), nullable=True),
+        )
+
+    if "mecanicos" not in existentes:
+        op.create_table(
+            "mecanicos",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("nombre", sa.String(50), nullable=False),
+            sa.Column("apellido", sa.String(50), nullable=False),
+        )
+
+    if "asignaciones" not in existentes:
+        op.create_table(
+            "asignaciones",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("id_vehiculo", sa.Integer(), sa.ForeignKey("vehiculos.id")),
+            sa.Column("id_mecanico", sa.Integer(), sa.ForeignKey("mecanicos.id")),
+            sa.Column("descripcion", sa.String(255)),
+            sa.Column("estado", sa.String(50)),
+            sa.Column("fecha_asignacion", sa.DateTime()),
+        )
+
+    if "import_jobs" not in existentes:
+        op.create_table(
+            "import_jobs",
+            sa.Column("id", sa.String(36), primary_key=True),
+            sa.Column("estado", sa.String(20), nullable=False),
+            sa.Column("nombre_archivo", sa.String(255), nullable=True),
+            sa.Column("ruta_archivo", sa.String(500), nullable=False),
+            sa.Column("worker", sa.String(64), nullable=True),
+            sa.Column("total_estimado", sa.Integer(), nullable=True),
+            sa.Column("procesados", sa.Integer(), nullable=False),
+            sa.Column("exitosos", sa.Integer(), nullable=False),
+            sa.Column("fallidos", sa.Integer(), nullable=False),
+            sa.Column("ultimo_lote", sa.Integer(), nullable=False),
+            sa.Column("errores", sa.Text(), nullable=True),
+            sa.Column("mensaje", sa.String(500), nullable=True),
+            sa.Column("creado", sa.DateTime()),
+            sa.Column("actualizado", sa.DateTime()),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("import_jobs")
+    op.drop_table("asignaciones")
+    op.drop_table("mecanicos")
+    op.drop_table("vehiculos")
@@ -0,0 +1,47 @@
+"""Índices para filtros, FKs y listados de asignaciones
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+- vehiculos: filtros de GET /vehiculos (marca, segmento, tipo_combustible,
+  rango de anio)
+- asignaciones: FKs (también para los JOIN), estado y fecha_asignacion.
+  Los compuestos terminan en fecha_asignacion para servir los listados
+  filtrados y ordenados por fecha sin ordenar en memoria
+- import_jobs: búsqueda de trabajos pendientes al arrancar
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = [
+    ("ix_vehiculos_marca", "vehiculos", ["marca"]),
+    ("ix_vehiculos_segmento", "vehiculos", ["segmento"]),
+    ("ix_vehiculos_tipo_combustible", "vehiculos", ["tipo_combustible"]),
+    ("ix_vehiculos_anio", "vehiculos", ["anio"]),
+    ("ix_asignaciones_vehiculo_fecha", "asignaciones", ["id_vehiculo", "fecha_asignacion"]),
+    ("ix_asignaciones_mecanico_fecha", "asignaciones", ["id_mecanico", "fecha_asignacion"]),
+    ("ix_asignaciones_estado_fecha", "asignaciones", ["estado", "fecha_asignacion", "id"]),
+    ("ix_asignaciones_fecha", "asignaciones", ["fecha_asignacion", "id"]),
+    ("ix_import_jobs_estado", "import_jobs", ["estado"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
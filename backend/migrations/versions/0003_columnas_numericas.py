@@ -0,0 +1,114 @@
+"""kilometraje, caballos y torque como enteros
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Hasta ahora eran String(50) con valores como "0 km" o "1050 Nm" (seed.py)
+mezclados con números sin unidad (importador de Excel). Primero se reescriben
+los textos a solo dígitos, por lotes de id, y después se cambia el tipo de la
+columna. Un valor que no se puede interpretar queda en 0 y se informa.
+
+Se agregan índices sobre kilometraje y caballos para los filtros por rango.
+"""
+import logging
+import math
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Logger de alembic (configurado en alembic.ini), no el de la app
+log = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNAS = ["kilometraje", "caballos", "torque"]
+INDICES = [
+    ("ix_vehiculos_kilometraje", ["kilometraje"]),
+    ("ix_vehiculos_caballos", ["caballos"]),
+]
+TAMANO_LOTE = 5000
+
+# Copia de app/unidades.py: la migración no debe depender del código de la app
+_UNIDADES = re.compile(r"(?i)\s*(?:km|kms|kilometros|kilómetros|nm|n·m|n\.m|hp|cv|caballos)\.?\s*$")
+_MILES = re.compile(r"^-?\d{1,3}(?:[.,]\d{3})+$")
+
+
+def _a_entero(valor) -> Optional[int]:
+    texto = _UNIDADES.sub("", str(valor).strip()).strip()
+    if _MILES.match(texto):
+        texto = texto.replace(".", "").replace(",", "")
+    else:
+        texto = texto.replace(",", ".")
+    try:
+        numero = float(texto)
+    except ValueError:
+        return None
+    return int(numero) if math.isfinite(numero) else None
+
+
+def _normalizar_textos(conexion) -> int:
+    """Reescribe los valores a dígitos. Devuelve cuántos no se pudieron leer."""
+    vehiculos = sa.table("vehiculos", sa.column("id", sa.Integer), *[sa.column(c, sa.String) for c in COLUMNAS])
+    actualizar = (
+        sa.update(vehiculos)
+        .where(vehiculos.c.id == sa.bindparam("_id"))
+        .values({c: sa.bindparam(f"_{c}") for c in COLUMNAS})
+    )
+
+    ilegibles = 0
+    ultimo_id = 0
+    while True:
+        filas = conexion.execute(
+            sa.select(vehiculos)
+            .where(vehiculos.c.id > ultimo_id)
+            .order_by(vehiculos.c.id)
+            .limit(TAMANO_LOTE)
+        ).all()
+        if not filas:
+            return ilegibles
+
+        cambios = []
+        for fila in filas:
+            nuevos = {}
+            for c in COLUMNAS:
+                numero = _a_entero(getattr(fila, c))
+                if numero is None:
+                    ilegibles += 1
+                    numero = 0
+                nuevos[f"_{c}"] = str(numero)
+            if any(nuevos[f"_{c}"] != getattr(fila, c) for c in COLUMNAS):
+                cambios.append({"_id": fila.id, **nuevos})
+        if cambios:
+            conexion.execute(actualizar, cambios)
+        ultimo_id = filas[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    ilegibles = _normalizar_textos(op.get_bind())
+    if ilegibles:
+        log.warning("%d valores de kilometraje/caballos/torque no numéricos; quedaron en 0", ilegibles)
+
+    with op.batch_alter_table("vehiculos") as tabla:
+        for c in COLUMNAS:
+            tabla.alter_column(c, existing_type=sa.String(50), type_=sa.Integer(), existing_nullable=False)
+
+    for nombre, columnas in INDICES:
+        op.create_index(nombre, "vehiculos", columnas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name="vehiculos")
+
+    with op.batch_alter_table("vehiculos") as tabla:
+        for c in COLUMNAS:
+            tabla.alter_column(c, existing_type=sa.Integer(), type_=sa.String(50), existing_nullable=False)
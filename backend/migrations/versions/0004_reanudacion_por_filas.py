@@ -0,0 +1,34 @@
+"""import_jobs: reanudación por filas en lugar de por número de lote
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+ultimo_lote guardaba el índice del último lote confirmado, pero el tamaño
+del lote sale de EXCEL_TAMANO_LOTE: si cambia entre reinicios, el índice
+apunta a otras filas. El punto de reanudación pasa a ser `procesados`
+(filas confirmadas, que ya se actualizaba en la misma transacción).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("import_jobs") as tabla:
+        tabla.drop_column("ultimo_lote")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("import_jobs") as tabla:
+        tabla.add_column(sa.Column("ultimo_lote", sa.Integer(), nullable=False, server_default="-1"))
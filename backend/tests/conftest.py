@@ -0,0 +1,39 @@
+import importlib
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _olvidar_app():
+    """Quita app.* de sys.modules: la configuración se lee al importar."""
+    for nombre in [n for n in sys.modules if n == "app" or n.startswith("app.")]:
+        del sys.modules[nombre]
+
+
+@pytest.fixture(params=["sincrono", "asincrono"])
+def app_prueba(request, tmp_path, monkeypatch):
+    """
+    La app sobre un SQLite nuevo (migrado al importar), una vez por modo de
+    base de datos: DB_ASYNC=false (SesionEnHilos) y DB_ASYNC=true (AsyncSession).
+    """
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'prueba.sqlite'}")
+    monkeypatch.setenv("DB_ASYNC", "true" if request.param == "asincrono" else "false")
+    monkeypatch.setenv("DB_MIGRAR_AL_INICIAR", "true")
+    monkeypatch.setenv("EXCEL_DIR_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setenv("EXCEL_DIR_TRABAJOS", str(tmp_path / "trabajos"))
+    monkeypatch.setenv("LOG_NIVEL", "WARNING")
+    for variable in ("DATABASE_URL_ASYNC", "PUBSUB_URL", "CACHE_ENTIDADES_URL", "DIAGNOSTICO_SQL"):
+        monkeypatch.delenv(variable, raising=False)
+
+    _olvidar_app()
+    main = importlib.import_module("app.main")
+    yield main.app
+    importlib.import_module("app.database").engine.dispose()
+    _olvidar_app()
+
+
+@pytest.fixture
+def cliente(app_prueba):
+    with TestClient(app_prueba) as cliente:
+        yield cliente
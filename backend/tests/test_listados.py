@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def _paginas(cliente, ruta, **params):
+    filas, cursor = [], None
+    while True:
+        respuesta = cliente.get(ruta, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert respuesta.status_code == 200
+        filas += respuesta.json()
+        cursor = respuesta.headers.get("X-Siguiente-Cursor")
+        if not cursor:
+            return filas
+
+
+@pytest.fixture
+def asignaciones(cliente):
+    """Siete asignaciones: fechas repetidas, desordenadas respecto del id y dos sin fecha."""
+    from app.database import SessionLocal
+    from app.models import Asignacion
+
+    vehiculo = cliente.post("/vehiculos/", json={
+        "marca": "Ford", "modelo": "Ka", "kilometraje": 1, "tipo_combustible": "Gasolina",
+        "caballos": 1, "torque": 1, "segmento": "Hatchback"
+    }).json()
+    mecanico = cliente.post("/mecanicos/", json={"nombre": "Ana", "apellido": "Pérez"}).json()
+    base = datetime(2026, 1, 1)
+    fechas = [base + timedelta(days=2), base, None, base + timedelta(days=2), base + timedelta(days=1), None, base]
+    with SessionLocal() as db:
+        filas = [Asignacion(id_mecanico=mecanico["id"], id_vehiculo=vehiculo["id"], estado="pendiente",
+                            descripcion="", fecha_asignacion=fecha) for fecha in fechas]
+        db.add_all(filas)
+        db.flush()
+        # La columna tiene default: las filas sin fecha (datos viejos) se fuerzan con UPDATE
+        sin_fecha = [fila.id for fila, fecha in zip(filas, fechas) if fecha is None]
+        db.query(Asignacion).filter(Asignacion.id.in_(sin_fecha)).update(
+            {Asignacion.fecha_asignacion: None}, synchronize_session=False)
+        db.commit()
+    return fechas
+
+
+def _clave(fila):
+    # NULL primero en orden ascendente, como MySQL y SQLite
+    return (fila["fecha_asignacion"] is not None, fila["fecha_asignacion"] or "", fila["id"])
+
+
+def test_asignaciones_recientes_primero(cliente, asignaciones):
+    filas = _paginas(cliente, "/asignaciones/", limite=2)
+    assert len(filas) == len(asignaciones)
+    assert filas == sorted(filas, key=_clave, reverse=True)
+    assert cliente.get("/asignaciones/", params={"limite": 1}).json()[0]["fecha_asignacion"].startswith("2026-01-03")
+
+
+def test_asignaciones_en_orden_de_asignacion(cliente, asignaciones):
+    filas = _paginas(cliente, "/asignaciones/", limite=2, orden="antiguo")
+    assert len(filas) == len(asignaciones)
+    assert filas == sorted(filas, key=_clave)
+
+
+def test_vehiculos_por_cursor(cliente):
+    for i in range(5):
+        cliente.post("/vehiculos/", json={
+            "marca": "Kia", "modelo": f"M{i}", "kilometraje": i, "tipo_combustible": "Gasolina",
+            "caballos": 1, "torque": 1, "segmento": "Sedán"
+        })
+    filas = _paginas(cliente, "/vehiculos/", limite=2, fields="modelo")
+    assert [f["modelo"] for f in filas] == [f"M{i}" for i in range(5)]
+
+
+@pytest.mark.parametrize("ruta", ["/vehiculos/", "/mecanicos/"])
+def test_listado_sin_cambios_responde_304(cliente, ruta):
+    cliente.post("/mecanicos/", json={"nombre": "Ana", "apellido": "Pérez"})
+    primera = cliente.get(ruta)
+    etag = primera.headers["ETag"]
+    assert "Last-Modified" not in primera.headers
+
+    segunda = cliente.get(ruta, headers={"If-None-Match": etag})
+    assert segunda.status_code == 304
+    assert segunda.content == b""
+    assert segunda.headers["ETag"] == etag
+    assert cliente.get(ruta, headers={"If-None-Match": '"otro"'}).status_code == 200
+
+
+def test_etag_cambia_tras_una_escritura(cliente):
+    cliente.post("/mecanicos/", json={"nombre": "Ana", "apellido": "Pérez"})
+    etag = cliente.get("/mecanicos/").headers["ETag"]
+    cliente.post("/mecanicos/", json={"nombre": "Luis", "apellido": "Soto"})
+
+    respuesta = cliente.get("/mecanicos/", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["ETag"] != etag
+    assert len(respuesta.json()) == 2
@@ -0,0 +1,85 @@
+from contextlib import nullcontext
+
+import pytest
+
+
+@pytest.fixture(params=["returning", "multifila"])
+def sin_returning(request, app_prueba):
+    """Con executemany RETURNING (SQLite) y sin él, como en MySQL: INSERT multi-fila + lastrowid."""
+    from app.database import engine, async_engine
+
+    motores = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    if request.param == "multifila":
+        for motor in motores:
+            motor.dialect.insert_executemany_returning_sort_by_parameter_order = False
+            motor.dialect.delete_returning = False
+    return request.param
+
+
+@pytest.fixture
+def entidades(cliente):
+    vehiculo = cliente.post("/vehiculos/", json={
+        "marca": "Renault", "modelo": "Kangoo", "kilometraje": 5, "tipo_combustible": "Diésel",
+        "caballos": 90, "torque": 200, "segmento": "Furgón"
+    }).json()["id"]
+    mecanico = cliente.post("/mecanicos/", json={"nombre": "Eva", "apellido": "Ruiz"}).json()["id"]
+    # Una asignación previa: los ids nuevos no empiezan en 1
+    cliente.post("/asignaciones/", json={"id_mecanico": mecanico, "id_vehiculo": vehiculo})
+    return vehiculo, mecanico
+
+
+def test_crear_lote_con_items_invalidos(cliente, sin_returning, entidades):
+    from app.diagnostico_sql import presupuesto
+
+    vehiculo, mecanico = entidades
+    items = [
+        {"id_mecanico": mecanico, "id_vehiculo": vehiculo, "descripcion": "uno"},
+        {"id_mecanico": 999, "id_vehiculo": vehiculo},
+        {"id_mecanico": mecanico, "id_vehiculo": vehiculo, "descripcion": "dos", "estado": "En Proceso"},
+        {"id_mecanico": mecanico, "id_vehiculo": 999},
+        {"id_mecanico": mecanico, "id_vehiculo": vehiculo, "descripcion": "tres"},
+    ]
+    # Sin RETURNING: validación de ids y un solo INSERT multi-fila. Con
+    # RETURNING SQLite inserta fila a fila (no tiene columna centinela)
+    with presupuesto(2, "lote multi-fila") if sin_returning == "multifila" else nullcontext():
+        respuesta = cliente.post("/asignaciones/batch", json={"items": items})
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["exitosos"], cuerpo["fallidos"]) == (3, 2)
+    resultados = cuerpo["resultados"]
+    assert [r["ok"] for r in resultados] == [True, False, True, False, True]
+    assert resultados[1]["error"] == "Mecánico 999 no encontrado"
+    assert resultados[3]["error"] == "Vehículo 999 no encontrado"
+
+    # Cada id devuelto corresponde a su item
+    guardadas = {a["id"]: a for a in cliente.get("/asignaciones/", params={"orden": "antiguo"}).json()}
+    for indice, descripcion in ((0, "uno"), (2, "dos"), (4, "tres")):
+        asignacion = guardadas[resultados[indice]["id"]]
+        assert asignacion["descripcion"] == descripcion
+        assert asignacion == {**resultados[indice]["asignacion"], "fecha_asignacion": asignacion["fecha_asignacion"]}
+    assert guardadas[resultados[2]["id"]]["estado"] == "En Proceso"
+    assert guardadas[resultados[0]["id"]]["mecanico"] == "Eva Ruiz"
+
+
+def test_crear_lote_sin_items_validos(cliente, sin_returning, entidades):
+    respuesta = cliente.post("/asignaciones/batch", json={"items": [{"id_mecanico": 999, "id_vehiculo": 999}]})
+    assert respuesta.status_code == 200
+    assert (respuesta.json()["exitosos"], respuesta.json()["fallidos"]) == (0, 1)
+
+
+def test_eliminar_lote_con_ids_inexistentes(cliente, sin_returning, entidades):
+    vehiculo, mecanico = entidades
+    creadas = cliente.post("/asignaciones/batch", json={"items": [
+        {"id_mecanico": mecanico, "id_vehiculo": vehiculo} for _ in range(3)
+    ]}).json()["resultados"]
+    ids = [r["id"] for r in creadas]
+
+    respuesta = cliente.post("/asignaciones/batch/eliminar", json={"ids": [ids[0], 999, ids[2]]})
+    assert respuesta.status_code == 200
+    cuerpo = respuesta.json()
+    assert (cuerpo["exitosos"], cuerpo["fallidos"]) == (2, 1)
+    assert cuerpo["resultados"][1] == {
+        "indice": 1, "ok": False, "id": 999, "error": "Asignación 999 no encontrada", "asignacion": None
+    }
+    restantes = {a["id"] for a in cliente.get("/asignaciones/").json()}
+    assert ids[1] in restantes and not {ids[0], ids[2]} & restantes
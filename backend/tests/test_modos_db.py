@@ -0,0 +1,145 @@
+import io
+
+from openpyxl import Workbook
+
+VEHICULO = {
+    "marca": "Toyota", "modelo": "Hilux", "anio": 2021, "kilometraje": "120.000 km",
+    "tipo_combustible": "Diésel", "caballos": 201, "torque": "500 Nm", "segmento": "Pickup"
+}
+
+
+def test_crud_vehiculos_mecanicos_y_asignaciones(cliente):
+    vehiculo = cliente.post("/vehiculos/", json=VEHICULO)
+    assert vehiculo.status_code == 200
+    assert vehiculo.json()["kilometraje"] == 120000
+    mecanico = cliente.post("/mecanicos/", json={"nombre": "Ana", "apellido": "Pérez"})
+    assert mecanico.status_code == 200
+
+    creada = cliente.post("/asignaciones/", json={
+        "id_mecanico": mecanico.json()["id"], "id_vehiculo": vehiculo.json()["id"], "descripcion": "Frenos"
+    })
+    assert creada.status_code == 200
+    asignacion = creada.json()
+    assert asignacion["vehiculo"].startswith("Toyota")
+
+    listado = cliente.get("/asignaciones/").json()
+    assert [a["id"] for a in listado] == [asignacion["id"]]
+
+    actualizada = cliente.patch(f"/asignaciones/{asignacion['id']}", json={"estado": "Completado"})
+    assert actualizada.status_code == 200
+    assert cliente.get("/asignaciones/", params={"estado": "Completado"}).json()[0]["id"] == asignacion["id"]
+
+    assert cliente.delete(f"/asignaciones/{asignacion['id']}").status_code == 200
+    assert cliente.get("/asignaciones/").json() == []
+    assert cliente.delete(f"/asignaciones/{asignacion['id']}").status_code == 404
+
+
+def test_asignacion_con_ids_inexistentes(cliente):
+    respuesta = cliente.post("/asignaciones/", json={"id_mecanico": 99, "id_vehiculo": 99})
+    assert respuesta.status_code == 404
+
+
+def test_asignacion_con_mecanico_borrado_en_otro_worker(cliente):
+    # La caché de entidades todavía tiene al mecánico: la FK rechaza el INSERT
+    from sqlalchemy import event, text
+    from app.database import SessionLocal, engine, async_engine
+
+    for motor in [engine] + ([async_engine.sync_engine] if async_engine is not None else []):
+        event.listen(motor, "connect", lambda conexion, _: conexion.execute("PRAGMA foreign_keys=ON"))
+        motor.pool.dispose()
+
+    vehiculo = cliente.post("/vehiculos/", json=VEHICULO).json()["id"]
+    mecanico = cliente.post("/mecanicos/", json={"nombre": "Ana", "apellido": "Gil"}).json()["id"]
+    cuerpo = {"id_mecanico": mecanico, "id_vehiculo": vehiculo}
+    assert cliente.post("/asignaciones/", json=cuerpo).status_code == 200
+
+    # Borrado sin pasar por la API: no llega el evento que invalida la caché
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM asignaciones"))
+        db.execute(text("DELETE FROM mecanicos WHERE id = :id"), {"id": mecanico})
+        db.commit()
+
+    for _ in range(2):
+        respuesta = cliente.post("/asignaciones/", json=cuerpo)
+        assert respuesta.status_code == 404
+        assert respuesta.json()["detail"] == f"Mecánico {mecanico} no encontrado"
+
+
+def test_carga_excel(cliente):
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(["Marca", "Modelo", "Anio", "Kilometraje", "Tipo Combustible", "Caballos", "Torque", "Segmento"])
+    for i in range(1500):
+        hoja.append(["Ford", f"M{i}", 2020, f"{1000 + i} km", "Gasolina", 150, 300, "SUV"])
+    hoja.append(["Kia", "Rio", "abc", 1, "Gasolina", 1, 1, "Sedán"])
+    contenido = io.BytesIO()
+    libro.save(contenido)
+    archivo = {"file": ("flota.xlsx", contenido.getvalue())}
+
+    validacion = cliente.post("/excel/validar", files=archivo).json()
+    assert validacion["valido"] and validacion["total_filas"] == 1501
+
+    carga = cliente.post("/excel/cargar", data={"upload_id": validacion["upload_id"], "session_id": "prueba"}).json()
+    assert (carga["exitosos"], carga["fallidos"]) == (1500, 1)
+    assert carga["errores"] == ["Fila 1501: Valor no numérico: abc"]
+
+    vehiculos = cliente.get("/vehiculos/", params={"limite": 1000, "fields": "kilometraje"})
+    assert len(vehiculos.json()) == 1000
+    assert vehiculos.headers["X-Siguiente-Cursor"]
+    assert vehiculos.json()[0]["kilometraje"] == 1000
+
+
+def test_carga_excel_con_columna_vacia_en_un_lote(cliente):
+    # Dos lotes (EXCEL_TAMANO_LOTE=1000): anio es entero en el primero y vacío en todo el segundo
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(["Marca", "Modelo", "Anio", "Kilometraje", "Tipo Combustible", "Caballos", "Torque", "Segmento"])
+    for i in range(1500):
+        hoja.append(["Ford", f"M{i}", 2020 if i < 1000 else None, 1000, "Gasolina", 150, 300, "SUV"])
+    contenido = io.BytesIO()
+    libro.save(contenido)
+    archivo = {"file": ("flota.xlsx", contenido.getvalue())}
+
+    preview = cliente.post("/excel/preview", files=archivo)
+    assert preview.status_code == 200
+    assert preview.json()["filas"][0]["anio"] == 2020
+
+    carga = cliente.post("/excel/cargar", data={"upload_id": preview.json()["upload_id"], "session_id": "prueba"})
+    assert carga.status_code == 200
+    assert (carga.json()["exitosos"], carga.json()["fallidos"]) == (1500, 0)
+
+    anios = [v["anio"] for v in cliente.get("/vehiculos/", params={"limite": 1000, "fields": "anio"}).json()]
+    anios += [v["anio"] for v in cliente.get("/vehiculos/", params={"limite": 1000, "fields": "anio", "cursor": 1000}).json()]
+    assert anios == [2020] * 1000 + [None] * 500
+
+
+def test_restaurar_tipos_de_parquet_anterior(app_prueba):
+    # Parquet escrito antes de anotar los vacíos: "int64" con celdas vacías
+    import pandas as pd
+    from app import cache_uploads
+
+    lote = pd.DataFrame({"anio": pd.Series([pd.NA, pd.NA], dtype="string")})
+    assert cache_uploads.restaurar_tipos(lote, {"anio": "int64"})["anio"].isna().all()
+
+
+def test_lote_de_trabajo_reclamado_no_se_guarda(cliente):
+    # Otro worker tomó el trabajo: el lote se descarta y la excepción llega al trabajo
+    import pandas as pd
+    import pytest
+    from app.carga_masiva import guardar_lote
+    from app.database import SessionLocal
+    from app.trabajos import TrabajoReclamado
+
+    lote = pd.DataFrame([{**VEHICULO, "kilometraje": 1000, "torque": 300}])
+
+    llamadas = []
+
+    def reclamado(db, guardados, errores):
+        llamadas.append(guardados)
+        raise TrabajoReclamado("job")
+
+    with SessionLocal() as db, pytest.raises(TrabajoReclamado):
+        guardar_lote(db, lote, reclamado)
+    # Sin volver a registrar el lote como filas fallidas
+    assert llamadas == [1]
+    assert cliente.get("/vehiculos/").json() == []
@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture
+def datos(cliente):
+    """Dos mecánicos, tres vehículos y 30 asignaciones insertadas sin pasar por la API (cachés vacías)."""
+    from app.database import SessionLocal
+    from app.models import Asignacion
+
+    vehiculos = [
+        cliente.post("/vehiculos/", json={
+            "marca": "Toyota", "modelo": f"Hilux {i}", "kilometraje": 10, "tipo_combustible": "Diésel",
+            "caballos": 150, "torque": 400, "segmento": "Pickup"
+        }).json()["id"]
+        for i in range(3)
+    ]
+    mecanicos = [
+        cliente.post("/mecanicos/", json={"nombre": nombre, "apellido": "Gómez"}).json()["id"]
+        for nombre in ("Ana", "Luis")
+    ]
+    with SessionLocal() as db:
+        db.add_all([
+            Asignacion(id_vehiculo=vehiculos[i % 3], id_mecanico=mecanicos[i % 2], estado="pendiente", descripcion="")
+            for i in range(30)
+        ])
+        db.commit()
+    return vehiculos, mecanicos
+
+
+def _presupuesto(metodo, plantilla):
+    from app.diagnostico_sql import PRESUPUESTOS
+
+    return PRESUPUESTOS[(metodo, plantilla)]
+
+
+def test_listado_de_asignaciones_sin_n_mas_1(cliente, datos):
+    from app.diagnostico_sql import presupuesto
+
+    maximo = _presupuesto("GET", "/asignaciones/")
+    assert maximo <= 2
+    with presupuesto(maximo, "listado en frío") as conteo:
+        respuesta = cliente.get("/asignaciones/", params={"limite": 30})
+    assert respuesta.status_code == 200
+    assert len(respuesta.json()) == 30
+    assert conteo.repetidas() == []
+    assert {f["mecanico"] for f in respuesta.json()} == {"Ana Gómez", "Luis Gómez"}
+    assert {f["vehiculo"] for f in respuesta.json()} == {f"Toyota Hilux {i}" for i in range(3)}
+
+    # Con los nombres en caché basta la página
+    with presupuesto(1, "listado con caché"):
+        assert cliente.get("/asignaciones/", params={"limite": 30}).status_code == 200
+
+
+def test_escrituras_de_asignaciones(cliente, datos):
+    from app.diagnostico_sql import presupuesto
+
+    vehiculos, mecanicos = datos
+    with presupuesto(_presupuesto("POST", "/asignaciones/"), "alta en frío"):
+        creada = cliente.post("/asignaciones/", json={"id_mecanico": mecanicos[0], "id_vehiculo": vehiculos[0]})
+    assert creada.status_code == 200
+    assert creada.json()["vehiculo"] == "Toyota Hilux 0"
+
+    with presupuesto(_presupuesto("PATCH", "/asignaciones/{asignacion_id}"), "cambio de estado"):
+        assert cliente.patch(f"/asignaciones/{creada.json()['id']}", json={"estado": "Completado"}).status_code == 200
+    with presupuesto(_presupuesto("DELETE", "/asignaciones/{asignacion_id}"), "baja"):
+        assert cliente.delete(f"/asignaciones/{creada.json()['id']}").status_code == 200
+
+
+def test_presupuesto_excedido_informa_las_sentencias(cliente, datos):
+    from app.diagnostico_sql import PresupuestoExcedido, presupuesto
+
+    with pytest.raises(PresupuestoExcedido, match="máximo 0"):
+        with presupuesto(0, "listado"):
+            cliente.get("/vehiculos/")
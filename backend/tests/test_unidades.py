@@ -0,0 +1,42 @@
+import pytest
+
+from app.unidades import a_entero, normalizar_texto_numerico
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("0 km", 0),
+    ("120.000 km", 120000),
+    ("120,000 kms", 120000),
+    ("1.200.000 Kilómetros", 1200000),
+    ("1050 Nm", 1050),
+    ("1.050 N·m", 1050),
+    ("400 n.m", 400),
+    ("670 hp", 670),
+    ("150 CV.", 150),
+    ("90 caballos", 90),
+    ("  75  ", 75),
+    ("-5", -5),
+    ("150,7 hp", 150),
+    ("99.9", 99),
+    (201, 201),
+    (150.9, 150),
+])
+def test_a_entero_valores_validos(valor, esperado):
+    assert a_entero(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", [None, "", "   ", "km"])
+def test_a_entero_vacios(valor):
+    assert a_entero(valor) is None
+
+
+@pytest.mark.parametrize("valor", ["mucho", "500 lb", "1.2.3", "12 km/h", "inf", "nan", float("inf"), float("nan"), True])
+def test_a_entero_valores_no_numericos(valor):
+    with pytest.raises(ValueError, match="Valor no numérico"):
+        a_entero(valor)
+
+
+def test_normalizar_distingue_miles_de_decimales():
+    assert normalizar_texto_numerico("1.050") == "1050"
+    assert normalizar_texto_numerico("1,05") == "1.05"
+    assert normalizar_texto_numerico("10.5 km") == "10.5"
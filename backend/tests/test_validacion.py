@@ -0,0 +1,82 @@
+import pandas as pd
+
+from app.validacion import validar_lote, a_registros
+
+FILA = {
+    "marca": "Toyota", "modelo": "Hilux", "anio": 2021, "kilometraje": "120.000 km",
+    "tipo_combustible": "Diésel", "caballos": "201 hp", "torque": "500 Nm", "segmento": "Pickup"
+}
+
+
+def _lote(*filas, inicio=0):
+    # Índice = posición en el archivo, como lo entrega ingesta.leer_lotes
+    return pd.DataFrame(list(filas), index=range(inicio, inicio + len(filas)))
+
+
+def _motivos(errores):
+    return list(zip(errores["fila"], errores["columna"], errores["motivo"]))
+
+
+def test_lote_valido_queda_tipado():
+    validos, errores = validar_lote(_lote(FILA, {**FILA, "marca": "  Ford ", "anio": None}))
+    assert errores.empty
+    assert a_registros(validos) == [
+        {"marca": "Toyota", "modelo": "Hilux", "anio": 2021, "kilometraje": 120000,
+         "tipo_combustible": "Diésel", "caballos": 201, "torque": 500, "segmento": "Pickup"},
+        {"marca": "Ford", "modelo": "Hilux", "anio": None, "kilometraje": 120000,
+         "tipo_combustible": "Diésel", "caballos": 201, "torque": 500, "segmento": "Pickup"},
+    ]
+
+
+def test_enteros_con_decimales_y_separadores():
+    filas = [
+        {**FILA, "kilometraje": "1.050", "caballos": 150.9, "torque": "300,5 Nm"},
+        {**FILA, "kilometraje": "1.200.000 km", "caballos": "0", "torque": -1},
+    ]
+    validos, errores = validar_lote(_lote(*filas))
+    assert errores.empty
+    registros = a_registros(validos)
+    assert [(r["kilometraje"], r["caballos"], r["torque"]) for r in registros] == [(1050, 150, 300), (1200000, 0, -1)]
+
+
+def test_valores_no_numericos_se_rechazan():
+    filas = [
+        FILA,
+        {**FILA, "caballos": "mucho"},
+        {**FILA, "kilometraje": "inf", "torque": "500 lb"},
+    ]
+    validos, errores = validar_lote(_lote(*filas))
+    assert list(validos.index) == [0]
+    assert _motivos(errores) == [
+        (2, "caballos", "Valor no numérico: mucho"),
+        (3, "kilometraje", "Valor no numérico: inf"),
+        (3, "torque", "Valor no numérico: 500 lb"),
+    ]
+
+
+def test_vacios_en_columnas_sin_nulos():
+    validos, errores = validar_lote(_lote({**FILA, "marca": "", "kilometraje": None}, {**FILA, "anio": ""}))
+    assert list(validos.index) == [1]
+    assert _motivos(errores) == [
+        (1, "kilometraje", "Valor faltante en 'kilometraje'"),
+        (1, "marca", "Valor faltante en 'marca'"),
+    ]
+
+
+def test_fila_numerada_como_en_el_archivo():
+    # Un lote que no es el primero: la fila sale del índice, no de la posición en el lote
+    _, errores = validar_lote(_lote(FILA, {**FILA, "torque": "x"}, inicio=1000))
+    assert _motivos(errores) == [(1002, "torque", "Valor no numérico: x")]
+
+
+def test_columna_faltante_invalida_todas_las_filas():
+    sin_segmento = {k: v for k, v in FILA.items() if k != "segmento"}
+    validos, errores = validar_lote(_lote(sin_segmento, sin_segmento))
+    assert validos.empty
+    assert _motivos(errores) == [(1, "segmento", "Columna 'segmento' faltante"), (2, "segmento", "Columna 'segmento' faltante")]
+
+
+def test_columnas_extra_se_descartan():
+    validos, errores = validar_lote(_lote({**FILA, "color": "rojo"}))
+    assert errores.empty
+    assert "color" not in validos.columns
@@ -1,7 +1,10 @@
-import { Component, OnInit } from '@angular/core';
+import { Component, OnDestroy, OnInit } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { HttpClient, HttpClientModule } from '@angular/common/http';
 import { FormsModule } from '@angular/forms';
+import { Subscription } from 'rxjs';
+import { CambiosService, MensajeCambio } from '../../servicios/cambios';
+import { AsignacionesService } from '../../servicios/asignaciones';
 
 @Component({
   selector: 'app-asignaciones',
@@ -10,22 +13,51 @@ import { FormsModule } from '@angular/forms';
   standalone: true,
   imports: [CommonModule, HttpClientModule, FormsModule]
 })
-export class Asignaciones implements OnInit {
+export class Asignaciones implements OnInit, OnDestroy {
   asignaciones: any[] = [];
   cargando = false;
   error: string = '';
+  private suscripcionCambios?: Subscription;
   
-  constructor(private http: HttpClient) {}
+  constructor(
+    private http: HttpClient,
+    private cambios: CambiosService,
+    private asignacionesService: AsignacionesService
+  ) {}
 
   ngOnInit() {
     this.cargarAsignaciones();
+    // Los cambios de otros usuarios llegan por el feed, sin volver a pedir la lista
+    this.suscripcionCambios = this.cambios.de('asignaciones')
+      .subscribe(mensaje => this.aplicarCambio(mensaje));
+  }
+
+  ngOnDestroy() {
+    this.suscripcionCambios?.unsubscribe();
+  }
+
+  aplicarCambio(mensaje: MensajeCambio) {
+    if (mensaje.tipo === 'reinicio' || !mensaje.ids) {
+      this.cargarAsignaciones();
+      return;
+    }
+    const ids = new Set(mensaje.ids);
+    if (mensaje.operacion === 'crear') {
+      const nuevas = (mensaje.filas || []).filter(f => !this.asignaciones.some(a => a.id === f.id));
+      // La lista va de la más reciente a la más antigua
+      this.asignaciones = [...nuevas.reverse(), ...this.asignaciones];
+    } else if (mensaje.operacion === 'actualizar') {
+      this.asignaciones = this.asignaciones.map(a => ids.has(a.id) ? { ...a, ...mensaje.cambios } : a);
+    } else if (mensaje.operacion === 'eliminar') {
+      this.asignaciones = this.asignaciones.filter(a => !ids.has(a.id));
+    }
   }
 
   cargarAsignaciones() {
     this.cargando = true;
     this.error = '';
     
-    this.http.get<any[]>('http://localhost:8000/asignaciones/')
+    this.asignacionesService.obtenerAsignaciones()
       .subscribe({
         next: (data) => {
           console.log('✅ Asignaciones cargadas:', data);
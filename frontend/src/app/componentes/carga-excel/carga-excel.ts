@@ -48,6 +48,7 @@ export class CargaExcel implements OnInit, OnDestroy {
   mostrarResultado = false;
   private ws: WebSocket | null = null;
   private sessionId = '';
+  private uploadId: string | undefined;
 
   constructor(private excelService: ExcelService) {}
 
@@ -67,6 +68,7 @@ export class CargaExcel implements OnInit, OnDestroy {
       return;
     }
     this.archivoSeleccionado = file;
+    this.uploadId = undefined;
     this.nombreArchivo = file.name;
     this.validarArchivo();
   }
@@ -80,6 +82,7 @@ export class CargaExcel implements OnInit, OnDestroy {
       next: (res) => {
         this.validacionColumnas = res.validaciones;
         this.columnasValidas = res.valido;
+        this.uploadId = res.upload_id;
         this.mensaje = res.valido ? '✓ Columnas válidas' : '✗ Hay errores';
         this.cargando = false;
         if (res.valido) this.cargarPreview();
@@ -94,7 +97,7 @@ export class CargaExcel implements OnInit, OnDestroy {
   cargarPreview() {
     if (!this.archivoSeleccionado) return;
     this.mensaje = 'Cargando vista previa...';
-    this.excelService.obtenerPreview(this.archivoSeleccionado).subscribe({
+    this.excelService.obtenerPreview(this.archivoSeleccionado, this.uploadId).subscribe({
       next: (res) => {
         this.previewData = res;
         this.mostrarPreview = true;
@@ -116,7 +119,7 @@ export class CargaExcel implements OnInit, OnDestroy {
     this.mensaje = 'Iniciando carga...';
     this.conectarWebSocket();
 
-    this.excelService.uploadFile(this.archivoSeleccionado, this.sessionId).subscribe({
+    this.excelService.uploadFile(this.archivoSeleccionado, this.sessionId, this.uploadId).subscribe({
       next: (res) => {
         this.resultadoCarga = res;
         this.mostrarResultado = true;
@@ -153,6 +156,7 @@ export class CargaExcel implements OnInit, OnDestroy {
 
   resetearFormulario() {
     this.archivoSeleccionado = null;
+    this.uploadId = undefined;
     this.nombreArchivo = '';
     this.validacionColumnas = [];
     this.previewData = null;
@@ -1,7 +1,9 @@
-import { Component, OnInit } from '@angular/core';
+import { Component, OnDestroy, OnInit } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { HttpClient, HttpClientModule } from '@angular/common/http';
 import { FormsModule } from '@angular/forms';
+import { Subscription } from 'rxjs';
+import { CambiosService, MensajeCambio } from '../../servicios/cambios';
 
 @Component({
   selector: 'app-mecanicos',
@@ -10,14 +12,40 @@ import { FormsModule } from '@angular/forms';
   standalone: true,
   imports: [CommonModule, HttpClientModule, FormsModule]
 })
-export class Mecanicos implements OnInit {
+export class Mecanicos implements OnInit, OnDestroy {
   mecanicos: any[] = [];
   nuevoMecanico = { nombre: '', apellido: '' };
+  private suscripcionCambios?: Subscription;
 
-  constructor(private http: HttpClient) {}
+  constructor(private http: HttpClient, private cambios: CambiosService) {}
 
   ngOnInit() {
     this.cargarMecanicos();
+    // Altas de otros usuarios (y del propio) por el feed, sin volver a pedir la lista
+    this.suscripcionCambios = this.cambios.de('mecanicos')
+      .subscribe(mensaje => this.aplicarCambio(mensaje));
+  }
+
+  ngOnDestroy() {
+    this.suscripcionCambios?.unsubscribe();
+  }
+
+  // Las altas traen las filas; las cargas masivas y el vaciado no traen
+  // ids y piden recargar, igual que un 'reinicio'
+  aplicarCambio(mensaje: MensajeCambio) {
+    if (mensaje.tipo === 'reinicio' || !mensaje.ids) {
+      this.cargarMecanicos();
+      return;
+    }
+    const ids = new Set(mensaje.ids);
+    if (mensaje.operacion === 'crear') {
+      const nuevos = (mensaje.filas || []).filter(f => !this.mecanicos.some(x => x.id === f.id));
+      this.mecanicos = [...this.mecanicos, ...nuevos];
+    } else if (mensaje.operacion === 'actualizar') {
+      this.mecanicos = this.mecanicos.map(x => ids.has(x.id) ? { ...x, ...mensaje.cambios } : x);
+    } else if (mensaje.operacion === 'eliminar') {
+      this.mecanicos = this.mecanicos.filter(x => !ids.has(x.id));
+    }
   }
 
   cargarMecanicos() {
@@ -27,8 +55,9 @@ export class Mecanicos implements OnInit {
 
   agregarMecanico() {
     this.http.post('http://localhost:8000/mecanicos/', this.nuevoMecanico) 
-      .subscribe(() => {
-        this.cargarMecanicos();
+      .subscribe((creado: any) => {
+        // Puede haber llegado antes por el feed de cambios
+        if (!this.mecanicos.some(x => x.id === creado.id)) this.mecanicos = [...this.mecanicos, creado];
         this.nuevoMecanico = { nombre: '', apellido: '' };
       });
   }
@@ -1,7 +1,10 @@
-import { Component, OnInit } from '@angular/core';
+import { Component, OnDestroy, OnInit } from '@angular/core';
 import { CommonModule } from '@angular/common';
 import { HttpClient, HttpClientModule } from '@angular/common/http';
 import { FormsModule } from '@angular/forms';
+import { Subscription } from 'rxjs';
+import { VehiculosService } from '../../servicios/vehiculos';
+import { CambiosService, MensajeCambio } from '../../servicios/cambios';
 
 @Component({
   selector: 'app-vehiculos',
@@ -10,25 +13,57 @@ import { FormsModule } from '@angular/forms';
   standalone: true,
   imports: [CommonModule, HttpClientModule, FormsModule]
 })
-export class Vehiculos implements OnInit {
+export class Vehiculos implements OnInit, OnDestroy {
   vehiculos: any[] = [];
   nuevoVehiculo = { marca: '', modelo: '', anio: '' };
+  private suscripcionCambios?: Subscription;
 
-  constructor(private http: HttpClient) {}
+  constructor(
+    private http: HttpClient,
+    private vehiculosService: VehiculosService,
+    private cambios: CambiosService
+  ) {}
 
   ngOnInit() {
     this.cargarVehiculos();
+    // Altas de otros usuarios (y del propio) por el feed, sin volver a pedir la lista
+    this.suscripcionCambios = this.cambios.de('vehiculos')
+      .subscribe(mensaje => this.aplicarCambio(mensaje));
+  }
+
+  ngOnDestroy() {
+    this.suscripcionCambios?.unsubscribe();
+  }
+
+  // Las altas traen las filas; las cargas masivas y el vaciado no traen
+  // ids y piden recargar, igual que un 'reinicio'
+  aplicarCambio(mensaje: MensajeCambio) {
+    if (mensaje.tipo === 'reinicio' || !mensaje.ids) {
+      this.cargarVehiculos();
+      return;
+    }
+    const ids = new Set(mensaje.ids);
+    if (mensaje.operacion === 'crear') {
+      const nuevos = (mensaje.filas || []).filter(f => !this.vehiculos.some(x => x.id === f.id));
+      this.vehiculos = [...this.vehiculos, ...nuevos];
+    } else if (mensaje.operacion === 'actualizar') {
+      this.vehiculos = this.vehiculos.map(x => ids.has(x.id) ? { ...x, ...mensaje.cambios } : x);
+    } else if (mensaje.operacion === 'eliminar') {
+      this.vehiculos = this.vehiculos.filter(x => !ids.has(x.id));
+    }
   }
 
   cargarVehiculos() {
-    this.http.get<any[]>('http://localhost:8000/vehiculos')
+    // El listado viene paginado: el servicio sigue X-Siguiente-Cursor
+    this.vehiculosService.obtenerVehiculos()
       .subscribe(data => this.vehiculos = data);
   }
 
   agregarVehiculo() {
     this.http.post('http://localhost:8000/vehiculos', this.nuevoVehiculo)
-      .subscribe(() => {
-        this.cargarVehiculos();
+      .subscribe((creado: any) => {
+        // Puede haber llegado antes por el feed de cambios
+        if (!this.vehiculos.some(x => x.id === creado.id)) this.vehiculos = [...this.vehiculos, creado];
         this.nuevoVehiculo = { marca: '', modelo: '', anio: '' };
       });
   }
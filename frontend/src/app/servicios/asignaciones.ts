@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
+import { todasLasPaginas } from './paginacion';
 
 @Injectable({
   providedIn: 'root'
@@ -10,8 +11,10 @@ export class AsignacionesService {
 
   constructor(private http: HttpClient) {}
 
-  obtenerAsignaciones(): Observable<any> {
-    return this.http.get(this.apiUrl);
+  // Todas las asignaciones, las más recientes primero (GET /asignaciones/
+  // devuelve páginas de a lo sumo 1000: se sigue X-Siguiente-Cursor)
+  obtenerAsignaciones(): Observable<any[]> {
+    return todasLasPaginas<any>(this.http, this.apiUrl);
   }
 
   agregarAsignacion(asignacion: any): Observable<any> {
@@ -25,4 +28,17 @@ export class AsignacionesService {
   eliminarAsignacion(id: number): Observable<any> {
     return this.http.delete(`${this.apiUrl}${id}`);  // ✅ Sin / al final
   }
+
+  // Operaciones en lote (una petición y una transacción para todo el lote)
+  agregarAsignacionesLote(items: any[]): Observable<any> {
+    return this.http.post(`${this.apiUrl}batch`, { items });
+  }
+
+  actualizarAsignacionesLote(items: any[]): Observable<any> {
+    return this.http.patch(`${this.apiUrl}batch`, { items });
+  }
+
+  eliminarAsignacionesLote(ids: number[]): Observable<any> {
+    return this.http.post(`${this.apiUrl}batch/eliminar`, { ids });
+  }
 }
\ No newline at end of file
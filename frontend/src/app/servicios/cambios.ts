@@ -0,0 +1,71 @@
+import { Injectable, OnDestroy } from '@angular/core';
+import { Observable, Subject } from 'rxjs';
+import { filter } from 'rxjs/operators';
+
+export interface MensajeCambio {
+  tipo: 'hola' | 'cambio' | 'reinicio';
+  epoca?: string;
+  seq: number;
+  coleccion?: 'vehiculos' | 'mecanicos' | 'asignaciones';
+  operacion?: 'crear' | 'actualizar' | 'eliminar' | 'reinicio';
+  ids?: number[];
+  filas?: any[];
+  cambios?: { [campo: string]: any };
+  cantidad?: number;
+}
+
+// Feed de cambios del backend (/ws/cambios). Guarda la última secuencia
+// recibida y al reconectar pide solo lo que se perdió; si el servidor ya
+// no lo tiene, llega un 'reinicio' y hay que volver a cargar la lista.
+@Injectable({
+  providedIn: 'root'
+})
+export class CambiosService implements OnDestroy {
+  private url = 'ws://localhost:8000/ws/cambios';
+  private ws: WebSocket | null = null;
+  private epoca: string | null = null;
+  private seq: number | null = null;
+  private reintento: any = null;
+  private mensajes = new Subject<MensajeCambio>();
+
+  // Cambios de una colección y los reinicios (que afectan a todas)
+  de(coleccion: string): Observable<MensajeCambio> {
+    this.conectar();
+    return this.mensajes.pipe(
+      filter(m => m.tipo === 'reinicio' || (m.tipo === 'cambio' && m.coleccion === coleccion))
+    );
+  }
+
+  private conectar() {
+    if (this.ws) return;
+    const reanudar = this.epoca !== null && this.seq !== null
+      ? `?epoca=${this.epoca}&desde=${this.seq}` : '';
+    this.ws = new WebSocket(this.url + reanudar);
+
+    this.ws.onmessage = (event) => {
+      const mensaje: MensajeCambio = JSON.parse(event.data);
+      if (mensaje.epoca) this.epoca = mensaje.epoca;
+      if (mensaje.tipo === 'hola') {
+        // Al reanudar, la secuencia avanza con los cambios que se reenvían
+        // (o con el 'reinicio' si el servidor ya no los tiene)
+        if (!reanudar) this.seq = mensaje.seq;
+        return;
+      }
+      this.seq = mensaje.seq;
+      this.mensajes.next(mensaje);
+    };
+
+    this.ws.onclose = () => {
+      this.ws = null;
+      this.reintento = setTimeout(() => this.conectar(), 3000);
+    };
+  }
+
+  ngOnDestroy() {
+    clearTimeout(this.reintento);
+    if (this.ws) {
+      this.ws.onclose = null;
+      this.ws.close();
+    }
+  }
+}
@@ -12,13 +12,15 @@ export interface ValidacionResponse {
     mensaje?: string;
   }>; 
   total_columnas: number;
-  total_filas: number;
+  total_filas: number | null;  // estimada (dimensión de la hoja); null si el formato no la declara
+  upload_id?: string;
 }
 
 export interface PreviewResponse {
   columnas: string[];
   filas: any[];
   total_registros: number;
+  upload_id?: string;
 }
 
 export interface CargaResponse {
@@ -43,6 +45,23 @@ export interface ListarVehiculosResponse {
   }>;
 }
 
+export interface ResumenNumerico {
+  minimo: number | null;
+  promedio: number | null;
+  maximo: number | null;
+}
+
+export interface EstadisticasResponse {
+  total: number;
+  por_segmento: Array<{ valor: string | null; cantidad: number }>;
+  por_tipo_combustible: Array<{ valor: string | null; cantidad: number }>;
+  por_marca: Array<{ valor: string | null; cantidad: number }>;
+  por_anio: Array<{ anio: number | null; cantidad: number }>;
+  caballos: ResumenNumerico;
+  kilometraje: ResumenNumerico;
+  torque: ResumenNumerico;
+}
+
 @Injectable({
   providedIn: 'root'
 })
@@ -58,21 +77,29 @@ export class ExcelService {
     return this.http.post<ValidacionResponse>(`${this.baseUrl}/excel/validar`, formData);
   }
 
-  // Obtener vista previa
-  obtenerPreview(file: File): Observable<PreviewResponse> {
-    const formData = new FormData();
-    formData.append('file', file);
-    return this.http.post<PreviewResponse>(`${this.baseUrl}/excel/preview`, formData);
+  // Obtener vista previa (con uploadId reutiliza el archivo ya validado)
+  obtenerPreview(file: File, uploadId?: string): Observable<PreviewResponse> {
+    return this.http.post<PreviewResponse>(`${this.baseUrl}/excel/preview`, this.archivoOUploadId(file, uploadId));
   }
 
   // Subir y cargar el archivo Excel (usa /excel/cargar)
-  uploadFile(file: File, sessionId: string): Observable<any> {
-  const formData = new FormData();
-  formData.append('file', file);
+  uploadFile(file: File, sessionId: string, uploadId?: string): Observable<any> {
+  const formData = this.archivoOUploadId(file, uploadId);
   formData.append('sessionId', sessionId); // 👈 agrega este campo
   return this.http.post<any>(`${this.baseUrl}/excel/cargar_directo`, formData);
 }
 
+  // Si el backend ya parseó el archivo, basta con enviar su upload_id
+  private archivoOUploadId(file: File, uploadId?: string): FormData {
+    const formData = new FormData();
+    if (uploadId) {
+      formData.append('upload_id', uploadId);
+    } else {
+      formData.append('file', file);
+    }
+    return formData;
+  }
+
 
 
   // Listar datos guardados desde la base de datos
@@ -80,6 +107,12 @@ export class ExcelService {
     return this.http.get<ListarVehiculosResponse>(`${this.baseUrl}/excel/listar`);
   }
 
+  // Conteos y promedios de la flota calculados en el servidor
+  // (para tableros: evita descargar todos los vehículos con listarVehiculos)
+  obtenerEstadisticas(): Observable<EstadisticasResponse> {
+    return this.http.get<EstadisticasResponse>(`${this.baseUrl}/vehiculos/estadisticas`);
+  }
+
   // Vaciar tabla (opcional, solo para pruebas)
   limpiarTabla(): Observable<{ mensaje: string }> {
     return this.http.delete<{ mensaje: string }>(`${this.baseUrl}/excel/limpiar`);
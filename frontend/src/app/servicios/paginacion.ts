@@ -0,0 +1,30 @@
+import { HttpClient, HttpParams, HttpResponse } from '@angular/common/http';
+import { EMPTY, Observable } from 'rxjs';
+import { expand, map, reduce } from 'rxjs/operators';
+
+// Máximo de filas por página que aceptan los listados del backend
+export const LIMITE_PAGINA = 1000;
+
+// Recorre un listado paginado por cursor: pide páginas de LIMITE_PAGINA
+// siguiendo la cabecera X-Siguiente-Cursor hasta que no venga más, y
+// entrega todas las filas juntas.
+export function todasLasPaginas<T>(
+  http: HttpClient,
+  url: string,
+  filtros: { [param: string]: string | number } = {}
+): Observable<T[]> {
+  const pedir = (cursor: string | null) => {
+    let params = new HttpParams({ fromObject: filtros }).set('limite', LIMITE_PAGINA);
+    if (cursor) params = params.set('cursor', cursor);
+    return http.get<T[]>(url, { params, observe: 'response' });
+  };
+
+  return pedir(null).pipe(
+    expand((respuesta: HttpResponse<T[]>) => {
+      const siguiente = respuesta.headers.get('X-Siguiente-Cursor');
+      return siguiente ? pedir(siguiente) : EMPTY;
+    }),
+    map(respuesta => respuesta.body || []),
+    reduce((todas, pagina) => todas.concat(pagina), [] as T[])
+  );
+}
@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
 import { Observable } from 'rxjs';
+import { todasLasPaginas } from './paginacion';
 
 
 @Injectable({
@@ -11,8 +12,9 @@ export class VehiculosService {  // <-- Asegúrate de que tenga 'export'
 
   constructor(private http: HttpClient) {}
 
-  obtenerVehiculos(): Observable<any> {
-    return this.http.get(this.apiUrl);
+  // GET /vehiculos devuelve páginas de a lo sumo 1000: se recorren todas
+  obtenerVehiculos(): Observable<any[]> {
+    return todasLasPaginas<any>(this.http, this.apiUrl);
   }
 
   crearVehiculo(vehiculo: any): Observable<any> {